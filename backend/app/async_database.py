@@ -0,0 +1,41 @@
+import os
+from uuid import uuid4
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from .database import DATABASE_URL, DB_PGBOUNCER, pool_args
+
+# Async drivers of the backends in use: asyncpg for Postgres, aiosqlite for the SQLite stand-in
+ASYNC_DRIVERS = {"postgresql": "postgresql+asyncpg", "sqlite": "sqlite+aiosqlite"}
+
+def async_url(url: str) -> str:
+    """DATABASE_URL with its driver swapped for the backend's async one"""
+    scheme, rest = url.split("://", 1)
+    return f"{ASYNC_DRIVERS.get(scheme.split('+')[0], scheme)}://{rest}"
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or async_url(DATABASE_URL)
+
+# asyncpg prepares every statement on its connection; behind PgBouncer the next transaction
+# may run on another server connection, so use uniquely named statements and cache none of them
+connect_args = {}
+if DB_PGBOUNCER and ASYNC_DATABASE_URL.startswith("postgresql+asyncpg"):
+    connect_args = {
+        "statement_cache_size": 0,
+        "prepared_statement_cache_size": 0,
+        "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__"
+    }
+
+# Same pool settings as the sync engine (see database.py); aiosqlite would default to no pooling
+async_pool_args = dict(pool_args)
+if ASYNC_DATABASE_URL.startswith("sqlite") and "poolclass" not in async_pool_args:
+    async_pool_args["poolclass"] = AsyncAdaptedQueuePool
+
+# Engine of the read-heavy API endpoints
+async_engine = create_async_engine(ASYNC_DATABASE_URL, connect_args=connect_args, **async_pool_args)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, expire_on_commit=False)
+
+async def get_async_db():
+    db = AsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
@@ -0,0 +1,155 @@
+import os
+import threading
+from datetime import datetime, timedelta
+from typing import Optional
+from uuid import UUID
+import numpy as np
+from sqlalchemy import delete, insert, select
+from sqlalchemy.orm import Session
+from .database import SessionLocal
+from .models import Job, ComputeMetric, ComputeMetricSummary
+from .services.telemetry_service import COMPUTE_SERIES
+
+# Raw compute samples older than this many days are rolled up into summaries; 0 keeps them forever
+COMPUTE_RAW_RETENTION_DAYS = float(os.getenv("COMPUTE_RAW_RETENTION_DAYS", "30"))
+# Summaries older than this many days are deleted; 0 keeps them forever
+COMPUTE_SUMMARY_RETENTION_DAYS = float(os.getenv("COMPUTE_SUMMARY_RETENTION_DAYS", "0"))
+# Seconds of samples rolled up into each summary row
+COMPACTION_BUCKET_SEC = int(os.getenv("COMPACTION_BUCKET_SEC", "300"))
+# Seconds between compaction runs
+COMPACTION_INTERVAL = float(os.getenv("COMPACTION_INTERVAL", "3600"))
+# Jobs compacted per batch, each in its own transaction
+COMPACTION_BATCH_JOBS = int(os.getenv("COMPACTION_BATCH_JOBS", "50"))
+
+# Jobs that may still write samples are left alone
+ACTIVE_STATUSES = ("pending", "running")
+EPOCH = datetime(1970, 1, 1)
+
+def bucket_start(at: datetime, width: int = COMPACTION_BUCKET_SEC) -> datetime:
+    """Start of the `width`-second bucket holding `at`"""
+    return EPOCH + timedelta(seconds=(at - EPOCH) // timedelta(seconds=width) * width)
+
+def unchanged_until(oldest: datetime) -> Optional[float]:
+    """Unix time before which neither compaction nor summary expiry touches a job's telemetry from `oldest` on; None if never"""
+    days = [days for days in (COMPUTE_RAW_RETENTION_DAYS, COMPUTE_SUMMARY_RETENTION_DAYS) if days > 0]
+    if not days:
+        return None
+    return (oldest - EPOCH).total_seconds() + min(days) * 24 * 3600
+
+def summarize(job_id: UUID, rows: list, width: int = COMPACTION_BUCKET_SEC) -> list:
+    """Summary rows of (timestamp, *COMPUTE_SERIES) samples sorted by timestamp"""
+    bucket = timedelta(seconds=width)
+    indices = np.array([(row[0] - EPOCH) // bucket for row in rows])
+    values = np.array([row[1:] for row in rows], dtype=float)
+    starts, firsts = np.unique(indices, return_index=True)
+    summaries = []
+    for index, first, end in zip(starts, firsts, [*firsts[1:], len(rows)]):
+        chunk = values[first:end]
+        stats = zip(chunk.mean(axis=0), chunk.min(axis=0), chunk.max(axis=0), np.percentile(chunk, 95, axis=0))
+        summary = {"job_id": job_id, "bucket_start": EPOCH + bucket * int(index), "samples": len(chunk)}
+        for name, (mean, low, high, p95) in zip(COMPUTE_SERIES, stats):
+            summary.update({
+                name: float(mean), f"{name}_min": float(low), f"{name}_max": float(high), f"{name}_p95": float(p95)
+            })
+        summaries.append(summary)
+    return summaries
+
+def compact_job(db: Session, job_id: UUID, cutoff: datetime) -> int:
+    """Replace a job's raw samples taken before `cutoff` with summaries; returns the number of samples.
+
+    `cutoff` must be a bucket boundary, so a bucket is only ever summarized
+    once. Jobs locked by another compactor are skipped.
+    """
+    job = db.execute(
+        select(Job.id).where(Job.id == job_id, Job.status.notin_(ACTIVE_STATUSES)).with_for_update(skip_locked=True)
+    ).first()
+    if job is None:
+        db.rollback()
+        return 0
+    rows = db.execute(
+        select(ComputeMetric.timestamp, *(getattr(ComputeMetric, name) for name in COMPUTE_SERIES))
+        .where(ComputeMetric.job_id == job_id, ComputeMetric.timestamp < cutoff)
+        .order_by(ComputeMetric.timestamp)
+    ).all()
+    if rows:
+        db.execute(insert(ComputeMetricSummary), summarize(job_id, rows))
+        db.execute(delete(ComputeMetric).where(ComputeMetric.job_id == job_id, ComputeMetric.timestamp < cutoff))
+    db.commit()
+    return len(rows)
+
+def compact(db: Session, now: datetime = None, batch_jobs: int = COMPACTION_BATCH_JOBS) -> tuple:
+    """Compact up to `batch_jobs` finished jobs with samples past the raw retention period and expire old summaries.
+
+    Returns (jobs compacted, samples compacted, summaries deleted); a full
+    batch means more jobs are waiting.
+    """
+    now = now or datetime.utcnow()
+    jobs = samples = 0
+    if COMPUTE_RAW_RETENTION_DAYS > 0:
+        cutoff = bucket_start(now - timedelta(days=COMPUTE_RAW_RETENTION_DAYS))
+        job_ids = db.execute(
+            select(ComputeMetric.job_id).join(Job, Job.id == ComputeMetric.job_id)
+            .where(ComputeMetric.timestamp < cutoff, Job.status.notin_(ACTIVE_STATUSES))
+            .distinct().limit(batch_jobs)
+        ).scalars().all()
+        db.rollback()
+        for job_id in job_ids:
+            compacted = compact_job(db, job_id, cutoff)
+            jobs += compacted > 0
+            samples += compacted
+
+    expired = 0
+    if COMPUTE_SUMMARY_RETENTION_DAYS > 0:
+        expired = db.execute(delete(ComputeMetricSummary).where(
+            ComputeMetricSummary.bucket_start < now - timedelta(days=COMPUTE_SUMMARY_RETENTION_DAYS)
+        )).rowcount
+        db.commit()
+    return jobs, samples, expired
+
+class Compactor(threading.Thread):
+    """Background thread running compact() every COMPACTION_INTERVAL seconds, batch after batch until caught up"""
+
+    def __init__(self, interval: float = None):
+        super().__init__(daemon=True, name="compactor")
+        self.interval = COMPACTION_INTERVAL if interval is None else interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Compactor error: {e}")
+
+    def tick(self):
+        db = SessionLocal()
+        try:
+            total_jobs = total_samples = total_expired = 0
+            while not self.stopped.is_set():
+                jobs, samples, expired = compact(db)
+                total_jobs, total_samples, total_expired = total_jobs + jobs, total_samples + samples, total_expired + expired
+                if jobs < COMPACTION_BATCH_JOBS:
+                    break
+        finally:
+            db.close()
+        if total_samples or total_expired:
+            print(f"Compacted {total_samples} compute samples of {total_jobs} jobs, deleted {total_expired} old summaries")
+
+    def stop(self):
+        self.stopped.set()
+
+def start_compactor():
+    """Start the compactor unless both retention periods are disabled"""
+    if COMPUTE_RAW_RETENTION_DAYS <= 0 and COMPUTE_SUMMARY_RETENTION_DAYS <= 0:
+        return None
+    compactor = Compactor()
+    compactor.start()
+    return compactor
+
+if __name__ == "__main__":
+    db = SessionLocal()
+    try:
+        jobs, samples, expired = compact(db)
+        print(f"Compacted {samples} compute samples of {jobs} jobs, deleted {expired} old summaries")
+    finally:
+        db.close()
@@ -0,0 +1,292 @@
+import asyncio
+import concurrent.futures
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from sqlalchemy import and_, or_, select, update
+from sqlalchemy.orm import Session, joinedload
+from app.database import SessionLocal
+from app.instrumentation import JOB_STAGE_LATENCY
+from app.models import Job, Metric, RiskAnalysis, Insight
+from app.services.openai_service import generate_job_insights, generate_batch_insights
+from app.services.insight_cache import insight_cache
+
+# Batches (or single jobs) whose insights may be in flight at once
+INSIGHT_CONCURRENCY = int(os.getenv("INSIGHT_CONCURRENCY", "8"))
+# Finished jobs are collected for up to INSIGHT_BATCH_WINDOW seconds, at most
+# INSIGHT_BATCH_SIZE per request; a size of 1 sends two requests per job
+INSIGHT_BATCH_SIZE = int(os.getenv("INSIGHT_BATCH_SIZE", "10"))
+INSIGHT_BATCH_WINDOW = float(os.getenv("INSIGHT_BATCH_WINDOW", "0.5"))
+
+def insights_enabled() -> bool:
+    """True when an OpenAI API key is configured"""
+    api_key = os.getenv("OPENAI_API_KEY")
+    return bool(api_key) and api_key != "your_openai_api_key_here"
+
+def insight_payload(job: Job, loss: float, accuracy: float, detection_score: float, risk: dict) -> dict:
+    """Keyword arguments for generate_job_insights"""
+    scenario = job.scenario
+    return {
+        "job_data": {
+            "compute_tier": job.compute_tier,
+            "epochs": job.epochs,
+            "weather": scenario.weather,
+            "traffic_density": scenario.traffic_density
+        },
+        "metrics_data": {
+            "final_loss": loss,
+            "final_accuracy": accuracy,
+            "detection_score": detection_score
+        },
+        "risk_data": risk,
+        "scenario_data": {
+            "weather": scenario.weather,
+            "time_of_day": scenario.time_of_day,
+            "traffic_density": scenario.traffic_density
+        }
+    }
+
+def stored_payload(db: Session, job: Job) -> dict:
+    """Rebuild a job's insight payload from its last metrics row and risk analysis"""
+    last = db.query(Metric).filter(Metric.job_id == job.id).order_by(Metric.epoch.desc()).first()
+    risk = db.query(RiskAnalysis).filter(RiskAnalysis.job_id == job.id).first()
+    return insight_payload(job, last.loss, last.accuracy, last.detection_score, {
+        "collision_probability": risk.collision_probability,
+        "pedestrian_risk": risk.pedestrian_risk,
+        "visibility_risk": risk.visibility_risk,
+        "safety_score": risk.safety_score
+    })
+
+def insights_claimable(now: datetime):
+    """Condition matching completed jobs whose insights are pending and not leased to a live worker"""
+    return and_(
+        Job.status == "completed", Job.insight_status == "pending",
+        or_(Job.lease_expires_at.is_(None), Job.lease_expires_at < now)
+    )
+
+def claim_insights(db: Session, owner: str, lease_expires_at: datetime, limit: int) -> list:
+    """Atomically lease up to `limit` jobs with unclaimed pending insights to `owner`; returns their ids.
+
+    Candidates are locked with FOR UPDATE SKIP LOCKED and claimed with a
+    conditional UPDATE, as in worker.claim_jobs, so each job is generated by
+    one worker even when every process and replica recovers at once.
+    """
+    now = datetime.utcnow()
+    candidate_ids = db.execute(
+        select(Job.id).where(insights_claimable(now)).limit(limit).with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not candidate_ids:
+        db.rollback()
+        return []
+    claimed = db.execute(
+        update(Job)
+        .where(Job.id.in_(candidate_ids), insights_claimable(now))
+        .values(worker_id=owner, lease_expires_at=lease_expires_at)
+        .returning(Job.id)
+    ).scalars().all()
+    db.commit()
+    return claimed
+
+def release_insights(db: Session, owner: str, job_ids: list = None) -> int:
+    """Drop `owner`'s leases on pending insights (of `job_ids`, or all of them) so any worker can claim them"""
+    query = update(Job).where(Job.worker_id == owner, Job.status == "completed", Job.insight_status == "pending")
+    if job_ids is not None:
+        query = query.where(Job.id.in_(job_ids))
+    released = db.execute(query.values(lease_expires_at=None)).rowcount
+    db.commit()
+    return released
+
+def store_insights(results: list, owner: str):
+    """Write (job_id, texts, status) results of a batch in one transaction.
+
+    Only jobs still leased to `owner` are written: a job whose lease expired
+    may have been claimed by another worker, which stores its insights instead.
+    """
+    db = SessionLocal()
+    try:
+        for job_id, texts, status in results:
+            stored = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.worker_id == owner, Job.insight_status == "pending")
+                .values(insight_status=status, lease_expires_at=None)
+            ).rowcount
+            if stored:
+                db.add_all(Insight(job_id=job_id, insight_text=text) for text in texts)
+            else:
+                print(f"Lost the insight lease of job {job_id}, dropping its insights")
+        db.commit()
+    finally:
+        db.close()
+
+class InsightStage(threading.Thread):
+    """Generates OpenAI insights for completed jobs on its own asyncio event loop.
+
+    The worker marks a job completed as soon as metrics and risk are stored,
+    sets insight_status to "pending" under its lease and hands the job over
+    with submit(). Submitted jobs are gathered for up to `batch_window`
+    seconds into batches of at most `batch_size`, each answered by one
+    structured prompt; up to `concurrency` batches are in flight. Leases of
+    jobs in the stage are extended by renew_leases(); pending jobs whose lease
+    expired (their worker died) are claimed and resubmitted by recover().
+    """
+
+    def __init__(
+        self,
+        owner: str,
+        lease_sec: float,
+        concurrency: int = None,
+        batch_size: int = None,
+        batch_window: float = None
+    ):
+        super().__init__(name="insights", daemon=True)
+        self.owner = owner
+        self.lease_sec = lease_sec
+        self.concurrency = INSIGHT_CONCURRENCY if concurrency is None else concurrency
+        self.batch_size = INSIGHT_BATCH_SIZE if batch_size is None else batch_size
+        self.batch_window = INSIGHT_BATCH_WINDOW if batch_window is None else batch_window
+        self.loop = asyncio.new_event_loop()
+        self.ready = threading.Event()
+        # Future of each submitted job -> job id
+        self.futures = {}
+        self.futures_lock = threading.Lock()
+
+    def run(self):
+        asyncio.set_event_loop(self.loop)
+        self.semaphore = asyncio.Semaphore(self.concurrency)
+        self.queue = asyncio.Queue()
+        self.batcher = self.loop.create_task(self._collect())
+        self.ready.set()
+        self.loop.run_forever()
+        self.loop.close()
+
+    def submit(self, job_id, payload: dict):
+        """Queue insight generation for a completed job; returns a concurrent.futures.Future"""
+        self.ready.wait()
+        future = asyncio.run_coroutine_threadsafe(self._enqueue(job_id, payload), self.loop)
+        with self.futures_lock:
+            self.futures[future] = job_id
+        future.add_done_callback(self._forget)
+        return future
+
+    def _forget(self, future):
+        with self.futures_lock:
+            self.futures.pop(future, None)
+
+    def lease_deadline(self) -> datetime:
+        return datetime.utcnow() + timedelta(seconds=self.lease_sec)
+
+    async def _enqueue(self, job_id, payload: dict):
+        done = self.loop.create_future()
+        await self.queue.put((job_id, payload, done))
+        await done
+
+    async def _collect(self):
+        """Group queued jobs into batches and start one task per batch"""
+        while True:
+            batch = [await self.queue.get()]
+            deadline = time.monotonic() + self.batch_window
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            await self.semaphore.acquire()
+            self.loop.create_task(self._generate(batch))
+
+    async def _generate(self, batch: list):
+        timer = time.perf_counter()
+        try:
+            try:
+                if len(batch) == 1:
+                    job_texts = [await generate_job_insights(**batch[0][1])]
+                else:
+                    job_texts = await generate_batch_insights([payload for _, payload, _ in batch])
+                results = [
+                    (job_id, texts, "completed") if texts is not None else (job_id, [], "failed")
+                    for (job_id, _, _), texts in zip(batch, job_texts)
+                ]
+                failed = sum(status == "failed" for _, _, status in results)
+                print(f"Generated AI insights for {len(batch) - failed} jobs" + (f", {failed} failed" if failed else ""))
+            except Exception as e:
+                print(f"Failed to generate insights for {len(batch)} jobs: {e}")
+                results = [(job_id, [], "failed") for job_id, _, _ in batch]
+            await asyncio.to_thread(store_insights, results, self.owner)
+            JOB_STAGE_LATENCY.labels("insights").observe(time.perf_counter() - timer)
+            for _, _, done in batch:
+                done.set_result(None)
+        except Exception as e:
+            for _, _, done in batch:
+                if not done.done():
+                    done.set_exception(e)
+        finally:
+            self.semaphore.release()
+
+    async def _shutdown(self):
+        self.batcher.cancel()
+        try:
+            await self.batcher
+        except asyncio.CancelledError:
+            pass
+
+    def recover(self) -> int:
+        """Claim and resubmit completed jobs whose pending insights no live worker holds; returns their count"""
+        limit = self.concurrency * self.batch_size - self.pending()
+        if limit <= 0:
+            return 0
+        db = SessionLocal()
+        try:
+            job_ids = claim_insights(db, self.owner, self.lease_deadline(), limit)
+            if not job_ids:
+                return 0
+            jobs = db.query(Job).options(joinedload(Job.scenario)).filter(Job.id.in_(job_ids)).all()
+            for job in jobs:
+                self.submit(job.id, stored_payload(db, job))
+            return len(jobs)
+        finally:
+            db.close()
+
+    def renew_leases(self, db: Session):
+        """Extend the leases of jobs whose insights are in the stage"""
+        with self.futures_lock:
+            job_ids = list(self.futures.values())
+        if not job_ids:
+            return
+        db.execute(
+            update(Job)
+            .where(Job.id.in_(job_ids), Job.worker_id == self.owner, Job.insight_status == "pending")
+            .values(lease_expires_at=self.lease_deadline())
+        )
+        db.commit()
+
+    def pending(self) -> int:
+        with self.futures_lock:
+            return len(self.futures)
+
+    def stop(self, timeout: float = None):
+        """Wait up to `timeout` seconds in all for in-flight insights, then stop the loop and release the unfinished ones"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        def remaining():
+            return None if deadline is None else max(0.0, deadline - time.monotonic())
+        with self.futures_lock:
+            futures = list(self.futures)
+        concurrent.futures.wait(futures, timeout)
+        with self.futures_lock:
+            unfinished = list(self.futures.values())
+        if unfinished:
+            db = SessionLocal()
+            try:
+                release_insights(db, self.owner, unfinished)
+            finally:
+                db.close()
+        try:
+            asyncio.run_coroutine_threadsafe(self._shutdown(), self.loop).result(remaining())
+        except concurrent.futures.TimeoutError:
+            pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.join(remaining())
+        insight_cache.flush_hits()
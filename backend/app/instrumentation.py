@@ -0,0 +1,131 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from prometheus_client import Gauge, Histogram, REGISTRY, CONTENT_TYPE_LATEST, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from sqlalchemy import event, func
+from sqlalchemy.engine import Engine
+from .database import DB_POOL_ROLE, SessionLocal
+from .models import Job
+
+# Opt-in profiling: requests slower than this (ms) get their sampled stacks dumped to PROFILE_DIR
+PROFILE_SLOW_REQUEST_MS = float(os.getenv("PROFILE_SLOW_REQUEST_MS", "0"))
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+# Seconds between stack samples while profiling
+PROFILE_INTERVAL = float(os.getenv("PROFILE_INTERVAL", "0.005"))
+
+# Scope of the request being served, so SQL time is attributed to its endpoint once routing has matched it
+current_request = ContextVar("current_request", default=None)
+
+REQUEST_LATENCY = Histogram(
+    "api_request_duration_seconds", "HTTP request latency",
+    ["router", "method", "route", "status"]
+)
+QUERY_LATENCY = Histogram(
+    "db_query_duration_seconds", "SQL statement execution time, by API endpoint (empty outside requests)",
+    ["role", "endpoint", "operation"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+)
+JOB_STAGE_LATENCY = Histogram(
+    "job_stage_duration_seconds", "Time spent in each stage of a job: simulate, metrics (one batch write), risk, "
+    "complete (final write), insights (one OpenAI batch), laps",
+    ["stage"]
+)
+JOB_WAIT = Histogram(
+    "job_queue_wait_seconds", "Time from job creation until a worker claims it",
+    ["tier"], buckets=(0.1, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800, 3600)
+)
+OPENAI_LATENCY = Histogram(
+    "openai_request_duration_seconds", "OpenAI chat completion latency, per attempt",
+    ["request"], buckets=(0.25, 0.5, 1, 2, 4, 8, 15, 30, 60)
+)
+WORKER_RUNNING_JOBS = Gauge("worker_running_jobs", "Jobs running in this worker process")
+
+class JobCountCollector:
+    """Pending and running job counts, read from the database at scrape time"""
+
+    def collect(self):
+        gauge = GaugeMetricFamily("jobs", "Jobs by status", labels=["status"])
+        db = SessionLocal()
+        try:
+            counts = dict(db.query(Job.status, func.count(Job.id)).filter(
+                Job.status.in_(("pending", "running"))
+            ).group_by(Job.status).all())
+        finally:
+            db.close()
+        for status in ("pending", "running"):
+            gauge.add_metric([status], counts.get(status, 0))
+        yield gauge
+
+def render_metrics() -> tuple:
+    """Body and content type of a Prometheus scrape of this process"""
+    return generate_latest(REGISTRY), CONTENT_TYPE_LATEST
+
+def route_of(scope) -> tuple:
+    """(router, route template) of a matched request; the router is its first tag"""
+    route = scope.get("route") if scope else None
+    if route is None:
+        return "", ""
+    return (route.tags[0] if getattr(route, "tags", None) else ""), route.path
+
+@event.listens_for(Engine, "before_cursor_execute")
+def start_query_timer(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+@event.listens_for(Engine, "after_cursor_execute")
+def stop_query_timer(conn, cursor, statement, parameters, context, executemany):
+    elapsed = time.perf_counter() - conn.info["query_start"].pop()
+    operation = statement.lstrip().split(None, 1)[0].upper() if statement.strip() else ""
+    QUERY_LATENCY.labels(DB_POOL_ROLE, route_of(current_request.get())[1], operation).observe(elapsed)
+
+@event.listens_for(Engine, "handle_error")
+def drop_query_timer(context):
+    starts = context.connection.info.get("query_start") if context.connection is not None else None
+    if starts:
+        starts.pop()
+
+class StackSampler(threading.Thread):
+    """Samples the stacks of every thread of the process every `interval` seconds.
+
+    Samples are kept for the last `window` seconds, so the stacks of a request
+    that turned out slow can be written after it finished, in the folded format
+    read by flamegraph.pl and speedscope. Samples from requests running at the
+    same time are included too.
+    """
+
+    def __init__(self, interval: float = None, window: float = 120):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.interval = PROFILE_INTERVAL if interval is None else interval
+        self.samples = deque(maxlen=max(1, int(window / self.interval)))
+
+    def run(self):
+        names = {}
+        while True:
+            now = time.perf_counter()
+            stacks = []
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == self.ident:
+                    continue
+                if thread_id not in names:
+                    names = {thread.ident: thread.name for thread in threading.enumerate()}
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)})")
+                    frame = frame.f_back
+                stack.append(names.get(thread_id, str(thread_id)))
+                stacks.append(";".join(reversed(stack)))
+            self.samples.append((now, stacks))
+            time.sleep(self.interval)
+
+    def dump(self, start: float, end: float, path: str) -> int:
+        """Write the stacks sampled between two perf_counter() times; returns the number of samples"""
+        counts = Counter(stack for at, stacks in list(self.samples) if start <= at <= end for stack in stacks)
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with open(path, "w") as f:
+            for stack, count in counts.items():
+                f.write(f"{stack} {count}\n")
+        return sum(counts.values())
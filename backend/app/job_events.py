@@ -0,0 +1,54 @@
+import select
+import threading
+import time
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from .database import DB_PGBOUNCER, engine
+
+# Postgres channel used to wake workers as soon as a job is enqueued
+JOB_CREATED_CHANNEL = "job_created"
+
+def supports_notify() -> bool:
+    """Whether workers can LISTEN for new jobs; PgBouncer's transaction pooling does not support LISTEN"""
+    return engine.dialect.name == "postgresql" and not DB_PGBOUNCER
+
+def notify_job_created(db: Session, payload: str = ""):
+    """Queue a job_created notification; Postgres delivers it when the transaction commits"""
+    if db.bind.dialect.name != "postgresql":
+        return
+    db.execute(text("SELECT pg_notify(:channel, :payload)"), {"channel": JOB_CREATED_CHANNEL, "payload": payload})
+
+class JobListener(threading.Thread):
+    """Background thread that LISTENs on a channel and sets `event` for every notification"""
+
+    def __init__(self, event: threading.Event, channel: str = JOB_CREATED_CHANNEL):
+        super().__init__(daemon=True, name=f"listen-{channel}")
+        self.event = event
+        self.channel = channel
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.is_set():
+            try:
+                self.listen()
+            except Exception as e:
+                print(f"Listener error on {self.channel}: {e}")
+                # Anything enqueued while disconnected is picked up by the fallback poll
+                time.sleep(5)
+
+    def listen(self):
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.exec_driver_sql(f"LISTEN {self.channel}")
+            pg_conn = conn.connection.driver_connection
+            while not self.stopped.is_set():
+                # Wake up regularly so stop() is honoured even without traffic
+                readable, _, _ = select.select([pg_conn], [], [], 1.0)
+                if not readable:
+                    continue
+                pg_conn.poll()
+                if pg_conn.notifies:
+                    pg_conn.notifies.clear()
+                    self.event.set()
+
+    def stop(self):
+        self.stopped.set()
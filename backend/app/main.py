@@ -1,7 +1,10 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
-from .routers import scenarios, jobs, metrics, compute, risk, insights
-from .database import engine, Base
+from .routers import scenarios, jobs, sweeps, metrics, compute, risk, insights, sessions, stream, analytics, export
+from .database import DB_POOL_CAPACITY, engine, Base
+from .async_database import async_engine
+from .instrumentation import JobCountCollector, REGISTRY, render_metrics
+from .middleware import RequestGate, RequestMetrics
 import os
 
 # Create database tables
@@ -22,20 +25,47 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Frame-Count", "ETag"],
 )
 
+# No more requests at once than pooled connections; streams and exports stay open as long as
+# clients read, so they bypass the gate and read through capped engines of their own
+if DB_POOL_CAPACITY:
+    app.add_middleware(RequestGate, limit=DB_POOL_CAPACITY, exempt=("/api/stream", "/api/export", "/health"))
+
+# Outermost, so request latency includes time queued at the gate
+app.add_middleware(RequestMetrics)
+# Queue depth for the /metrics scrape; workers export their own metrics (WORKER_METRICS_PORT)
+REGISTRY.register(JobCountCollector())
+
 # Register routers
 app.include_router(scenarios.router, prefix="/api/scenarios", tags=["Scenarios"])
 app.include_router(jobs.router, prefix="/api/jobs", tags=["Jobs"])
+app.include_router(sweeps.router, prefix="/api/sweeps", tags=["Sweeps"])
 app.include_router(metrics.router, prefix="/api/metrics", tags=["Metrics"])
 app.include_router(compute.router, prefix="/api/compute", tags=["Compute"])
 app.include_router(risk.router, prefix="/api/risk", tags=["Risk"])
 app.include_router(insights.router, prefix="/api/insights", tags=["Insights"])
+app.include_router(sessions.router, prefix="/api/sessions", tags=["Sessions"])
+app.include_router(stream.router, prefix="/api/stream", tags=["Stream"])
+app.include_router(analytics.router, prefix="/api/analytics", tags=["Analytics"])
+app.include_router(export.router, prefix="/api/export", tags=["Export"])
+
+@app.on_event("shutdown")
+async def close_async_engine():
+    """Close pooled async connections, whose driver threads (aiosqlite) would keep the process alive"""
+    await async_engine.dispose()
 
 @app.get("/")
 def root():
     return {"message": "Aumovio AI Compute Platform API"}
 
+@app.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """Prometheus scrape of this API process"""
+    body, content_type = render_metrics()
+    return Response(body, media_type=content_type)
+
 @app.get("/health")
 def health():
     return {"status": "healthy"}
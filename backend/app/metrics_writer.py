@@ -0,0 +1,107 @@
+import os
+import time
+from sqlalchemy import and_, insert, update
+from .database import SessionLocal
+from .instrumentation import JOB_STAGE_LATENCY
+from .models import Job, Metric, ComputeMetric
+
+# Flush once this many rows are buffered, or once this many seconds have passed since the last flush
+METRICS_FLUSH_ROWS = int(os.getenv("METRICS_FLUSH_ROWS", "50"))
+METRICS_FLUSH_INTERVAL = float(os.getenv("METRICS_FLUSH_INTERVAL", "2"))
+
+class JobInterrupted(Exception):
+    """Raised inside a running job when its worker drains or loses the job's lease"""
+
+def still_leased(job: Job):
+    """Condition matching a job only while it is running under the lease it was loaded with.
+
+    started_at is set by every claim, so a later claim of the job, even by
+    the same worker process, no longer matches.
+    """
+    owner = Job.worker_id.is_(None) if job.worker_id is None else Job.worker_id == job.worker_id
+    started = Job.started_at.is_(None) if job.started_at is None else Job.started_at == job.started_at
+    return and_(Job.id == job.id, Job.status == "running", owner, started)
+
+class MetricsWriter:
+    """Buffers a job's Metric/ComputeMetric rows and writes them with multi-row INSERTs.
+
+    Job progress is committed together with each batch, so the API never reports
+    progress for epochs whose metrics are not yet visible. Every batch is written
+    in its own short session, so no connection or transaction is held between
+    batches. A batch is only written while the job is still leased to the
+    worker that loaded it; otherwise flush() rolls it back and raises
+    JobInterrupted. Use it as a context manager: the buffer is flushed on exit
+    whether the job finished or failed.
+    """
+
+    def __init__(self, job: Job, max_rows: int = None, max_interval: float = None):
+        self.job_id = job.id
+        self.lease = still_leased(job)
+        self.max_rows = METRICS_FLUSH_ROWS if max_rows is None else max_rows
+        self.max_interval = METRICS_FLUSH_INTERVAL if max_interval is None else max_interval
+        self.metrics = []
+        self.compute_metrics = []
+        self.progress = None
+        self.last_flush = time.monotonic()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            self.flush()
+        except Exception as e:
+            if exc_type is None:
+                raise
+            # Don't mask the job's own failure with a secondary flush error
+            print(f"Failed to flush metrics for job {self.job_id}: {e}")
+        return False
+
+    def add(self, metric: dict, compute_metric: dict, progress: float, runtime_sec: float):
+        """Buffer one epoch of metrics and the job progress it brings"""
+        self.metrics.append({"job_id": self.job_id, **metric})
+        self.compute_metrics.append({"job_id": self.job_id, **compute_metric})
+        self.progress = (progress, runtime_sec)
+
+        buffered = len(self.metrics) + len(self.compute_metrics)
+        if buffered >= self.max_rows or time.monotonic() - self.last_flush >= self.max_interval:
+            self.flush()
+
+    def discard(self):
+        """Drop buffered rows without writing them, e.g. when the job is abandoned"""
+        self.metrics = []
+        self.compute_metrics = []
+        self.progress = None
+
+    def flush(self):
+        """Write all buffered rows and the latest progress in a single transaction.
+
+        The progress update comes first and matches the job only under its
+        lease, locking the row; if the lease was lost (the job was requeued),
+        nothing is written and JobInterrupted is raised.
+        """
+        if not self.metrics and not self.compute_metrics and self.progress is None:
+            return
+        db = SessionLocal()
+        timer = time.perf_counter()
+        try:
+            # add() always sets progress along with the rows it buffers
+            progress, runtime_sec = self.progress
+            leased = db.execute(update(Job).where(self.lease).values(progress=progress, runtime_sec=runtime_sec))
+            if not leased.rowcount:
+                db.rollback()
+                self.discard()
+                raise JobInterrupted(self.job_id)
+            if self.metrics:
+                db.execute(insert(Metric).values(self.metrics))
+            if self.compute_metrics:
+                db.execute(insert(ComputeMetric).values(self.compute_metrics))
+            db.commit()
+            JOB_STAGE_LATENCY.labels("metrics").observe(time.perf_counter() - timer)
+        finally:
+            db.close()
+
+        self.metrics = []
+        self.compute_metrics = []
+        self.progress = None
+        self.last_flush = time.monotonic()
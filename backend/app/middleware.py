@@ -0,0 +1,71 @@
+import asyncio
+import os
+import re
+import time
+from .instrumentation import PROFILE_DIR, PROFILE_SLOW_REQUEST_MS, REQUEST_LATENCY, StackSampler, current_request, route_of
+
+class RequestGate:
+    """ASGI middleware admitting at most `limit` HTTP requests at once; the rest wait their turn.
+
+    A sync endpoint keeps its pooled connection until FastAPI has validated the
+    response, which needs a threadpool thread. Once more requests run than the
+    pool has connections, threads waiting for a connection can starve those
+    validations and every request stalls until the pool timeout. Admitting no
+    more requests than connections keeps the pool from ever running dry.
+    Paths starting with an `exempt` prefix (long-lived streams and downloads,
+    which read through engines of their own) bypass the gate.
+    """
+
+    def __init__(self, app, limit: int, exempt: tuple = ()):
+        self.app = app
+        self.semaphore = asyncio.Semaphore(limit)
+        self.exempt = exempt
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(self.exempt):
+            return await self.app(scope, receive, send)
+        async with self.semaphore:
+            await self.app(scope, receive, send)
+
+class RequestMetrics:
+    """ASGI middleware recording request latency per router and route, and exposing the request to SQL timing.
+
+    With PROFILE_SLOW_REQUEST_MS set, a stack sampler runs in the background and
+    requests slower than that get the stacks sampled while they ran written to
+    PROFILE_DIR as folded flame graph data.
+    """
+
+    def __init__(self, app, slow_request_ms: float = None):
+        self.app = app
+        self.slow_request_ms = PROFILE_SLOW_REQUEST_MS if slow_request_ms is None else slow_request_ms
+        self.sampler = None
+        if self.slow_request_ms > 0:
+            self.sampler = StackSampler()
+            self.sampler.start()
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+        status = 500
+
+        async def send_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        token = current_request.set(scope)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            end = time.perf_counter()
+            current_request.reset(token)
+            router, route = route_of(scope)
+            # Unmatched paths share one label so scans of random URLs don't add series
+            REQUEST_LATENCY.labels(router, scope["method"], route or "unmatched", str(status)).observe(end - start)
+            if self.sampler is not None and (end - start) * 1000 >= self.slow_request_ms:
+                name = re.sub(r"[^A-Za-z0-9]+", "_", (route or scope["path"]).strip("/"))
+                path = os.path.join(PROFILE_DIR, f"{int(time.time() * 1000)}-{scope['method']}-{name}.folded")
+                samples = await asyncio.to_thread(self.sampler.dump, start, end, path)
+                print(f"Slow request {scope['method']} {scope['path']} ({(end - start) * 1000:.0f} ms), {samples} samples in {path}")
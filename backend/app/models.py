@@ -1,14 +1,34 @@
-from sqlalchemy import Column, String, Integer, Float, ForeignKey, DateTime, Text
+from sqlalchemy import Column, String, Integer, Float, Boolean, ForeignKey, DateTime, Text, Index, Sequence, LargeBinary, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from datetime import datetime
+import os
+import time
 import uuid
 from .database import Base
 
+def time_ordered_uuid() -> uuid.UUID:
+    """UUIDv7 layout: 48-bit Unix time in ms, then random bits.
+
+    High-volume rows get keys that grow with insertion time, so inserts append
+    to the end of the primary key index instead of splitting random pages.
+    """
+    value = (time.time_ns() // 1_000_000) << 80 | int.from_bytes(os.urandom(10), "big")
+    value = value & ~(0xF << 76) | 0x7 << 76  # version 7
+    value = value & ~(0x3 << 62) | 0x2 << 62  # RFC 4122 variant
+    return uuid.UUID(int=value)
+
 class Scenario(Base):
     __tablename__ = "scenarios"
+    __table_args__ = (
+        # id breaks ties in the list order: a sweep inserts many rows with the same created_at
+        Index("ix_scenarios_created_at_id", "created_at", "id"),
+        Index("ix_scenarios_weather_created_at_id", "weather", "created_at", "id"),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Display number (#1 = oldest), assigned from a database sequence on insert
+    seq = Column(Integer, Sequence("scenarios_seq_seq"), unique=True)
     weather = Column(String, nullable=False)
     time_of_day = Column(String, nullable=False)
     traffic_density = Column(Float, nullable=False)
@@ -19,29 +39,82 @@ class Scenario(Base):
     
     jobs = relationship("Job", back_populates="scenario")
 
+    @property
+    def index(self):
+        return self.seq
+
+class Sweep(Base):
+    __tablename__ = "sweeps"
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    total_jobs = Column(Integer, nullable=False)
+    scenario_count = Column(Integer, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    jobs = relationship("Job", back_populates="sweep")
+
 class Job(Base):
     __tablename__ = "jobs"
+    __table_args__ = (
+        # id breaks ties in the list order: a sweep inserts many rows with the same created_at
+        Index("ix_jobs_created_at_id", "created_at", "id"),
+        Index("ix_jobs_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_jobs_scenario_id", "scenario_id"),
+        Index("ix_jobs_sweep_id_status", "sweep_id", "status"),
+        Index("ix_jobs_status_lease_expires_at", "status", "lease_expires_at"),
+        # Completed jobs whose insights are pending, for workers claiming them; excludes every finished job
+        Index("ix_jobs_insights_pending", "lease_expires_at", postgresql_where=text("insight_status = 'pending'")),
+    )
     
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Display number (#1 = oldest), assigned from a database sequence on insert
+    seq = Column(Integer, Sequence("jobs_seq_seq"), unique=True)
     scenario_id = Column(UUID(as_uuid=True), ForeignKey("scenarios.id"), nullable=False)
+    sweep_id = Column(UUID(as_uuid=True), ForeignKey("sweeps.id"), nullable=True)
     compute_tier = Column(String, nullable=False)
     epochs = Column(Integer, nullable=False)
     status = Column(String, default="pending")
     progress = Column(Float, default=0.0)
     runtime_sec = Column(Float, default=0.0)
     cost_estimate = Column(Float, nullable=False)
+    # Fast-forward jobs are synthesized in batches without simulated wall-clock time
+    fast_forward = Column(Boolean, nullable=False, default=False)
     created_at = Column(DateTime, default=datetime.utcnow)
+    started_at = Column(DateTime, nullable=True)
+    # Lease of a running job: the claiming worker ("host:pid") renews it while alive,
+    # and the reaper requeues running jobs whose lease has expired
+    worker_id = Column(String, nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    attempts = Column(Integer, nullable=False, default=0)
+    # OpenAI insights are generated after completion: pending -> completed / failed (NULL when not requested)
+    insight_status = Column(String, nullable=True)
+    # "training", or "lap_simulation": `cars` AI drivers race `epochs` laps on `map`
+    job_type = Column(String, nullable=False, default="training")
+    map = Column(String, nullable=True)
+    cars = Column(Integer, nullable=True)
     
     scenario = relationship("Scenario", back_populates="jobs")
+    sweep = relationship("Sweep", back_populates="jobs")
     metrics = relationship("Metric", back_populates="job", cascade="all, delete-orphan")
     compute_metrics = relationship("ComputeMetric", back_populates="job", cascade="all, delete-orphan")
     risk_analysis = relationship("RiskAnalysis", back_populates="job", uselist=False, cascade="all, delete-orphan")
     insights = relationship("Insight", back_populates="job", cascade="all, delete-orphan")
+    lap_results = relationship("LapResult", back_populates="job", cascade="all, delete-orphan")
+
+    @property
+    def index(self):
+        return self.seq
+
+# Tiers are matched case-insensitively, as the worker and the analytics rollups compare them
+Index("ix_jobs_lower_compute_tier_created_at_id", func.lower(Job.compute_tier), Job.created_at, Job.id)
 
 class Metric(Base):
     __tablename__ = "metrics"
+    __table_args__ = (
+        Index("ix_metrics_job_id_epoch", "job_id", "epoch"),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=time_ordered_uuid)
     job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), nullable=False)
     epoch = Column(Integer, nullable=False)
     loss = Column(Float, nullable=False)
@@ -52,8 +125,13 @@ class Metric(Base):
 
 class ComputeMetric(Base):
     __tablename__ = "compute_metrics"
+    __table_args__ = (
+        Index("ix_compute_metrics_job_id_timestamp", "job_id", "timestamp"),
+        # Rows arrive in time order, so a BRIN index finds old samples for compaction at a fraction of a B-tree's size
+        Index("ix_compute_metrics_timestamp", "timestamp", postgresql_using="brin"),
+    )
     
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=time_ordered_uuid)
     job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), nullable=False)
     gpu_utilization = Column(Float, nullable=False)
     vram_usage = Column(Float, nullable=False)
@@ -62,6 +140,31 @@ class ComputeMetric(Base):
     
     job = relationship("Job", back_populates="compute_metrics")
 
+class ComputeMetricSummary(Base):
+    __tablename__ = "compute_metric_summaries"
+    __table_args__ = (
+        Index("ix_compute_metric_summaries_job_id_bucket_start", "job_id", "bucket_start"),
+    )
+    
+    # Compute samples older than the raw retention period, rolled up per job and COMPACTION_BUCKET_SEC bucket
+    id = Column(UUID(as_uuid=True), primary_key=True, default=time_ordered_uuid)
+    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), nullable=False)
+    bucket_start = Column(DateTime, nullable=False)
+    samples = Column(Integer, nullable=False)
+    # Mean of the bucket's samples, plus their min, max and 95th percentile
+    gpu_utilization = Column(Float, nullable=False)
+    gpu_utilization_min = Column(Float, nullable=False)
+    gpu_utilization_max = Column(Float, nullable=False)
+    gpu_utilization_p95 = Column(Float, nullable=False)
+    vram_usage = Column(Float, nullable=False)
+    vram_usage_min = Column(Float, nullable=False)
+    vram_usage_max = Column(Float, nullable=False)
+    vram_usage_p95 = Column(Float, nullable=False)
+    cpu_usage = Column(Float, nullable=False)
+    cpu_usage_min = Column(Float, nullable=False)
+    cpu_usage_max = Column(Float, nullable=False)
+    cpu_usage_p95 = Column(Float, nullable=False)
+
 class RiskAnalysis(Base):
     __tablename__ = "risk_analysis"
     
@@ -83,3 +186,124 @@ class Insight(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
     
     job = relationship("Job", back_populates="insights")
+
+class InsightCacheEntry(Base):
+    __tablename__ = "insight_cache"
+    __table_args__ = (
+        Index("ix_insight_cache_last_used_at", "last_used_at"),
+        Index("ix_insight_cache_created_at", "created_at"),
+    )
+    
+    # sha256 of model, versioned prompt template and quantized inputs
+    key = Column(String(64), primary_key=True)
+    model = Column(String, nullable=False)
+    template = Column(String, nullable=False)
+    insight_text = Column(Text, nullable=False)
+    # Cost of the request that produced the text, counted as saved on every hit
+    latency_ms = Column(Float, nullable=False, default=0.0)
+    total_tokens = Column(Integer, nullable=False, default=0)
+    hits = Column(Integer, nullable=False, default=0)
+    generations = Column(Integer, nullable=False, default=1)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    last_used_at = Column(DateTime, default=datetime.utcnow)
+
+class DrivingSession(Base):
+    __tablename__ = "driving_sessions"
+    __table_args__ = (
+        Index("ix_driving_sessions_created_at", "created_at"),
+        Index("ix_driving_sessions_map_created_at", "map", "created_at"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    map = Column(String, nullable=True)
+    driver = Column(String, nullable=False, default="human")  # human, ai
+    status = Column(String, nullable=False, default="recording")  # recording, completed
+    # Time range of the stored frames (client clock, ms)
+    t_start = Column(Float, nullable=True)
+    t_end = Column(Float, nullable=True)
+    chunk_count = Column(Integer, nullable=False, default=0)
+    # Running feature totals, see driving_telemetry.FeatureAccumulator
+    frames = Column(Integer, nullable=False, default=0)
+    speed_sum = Column(Float, nullable=False, default=0.0)
+    max_speed = Column(Float, nullable=False, default=0.0)
+    grass_frames = Column(Integer, nullable=False, default=0)
+    trail_braking_frames = Column(Integer, nullable=False, default=0)
+    # Positional totals over frames with an x/y position, when the map is a known preset
+    positioned_frames = Column(Integer, nullable=False, default=0)
+    off_road_frames = Column(Integer, nullable=False, default=0)
+    centerline_sum = Column(Float, nullable=False, default=0.0)
+    # Coaching result as JSON, set when the session is analyzed
+    advice = Column(Text, nullable=True)
+    # Lap simulation job an AI session was recorded by
+    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    chunks = relationship("DrivingSessionChunk", back_populates="session", cascade="all, delete-orphan")
+
+class DrivingSessionChunk(Base):
+    __tablename__ = "driving_session_chunks"
+    __table_args__ = (
+        Index("ix_driving_session_chunks_session_id_t_start", "session_id", "t_start"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    session_id = Column(UUID(as_uuid=True), ForeignKey("driving_sessions.id"), nullable=False)
+    seq = Column(Integer, nullable=False)
+    t_start = Column(Float, nullable=False)
+    t_end = Column(Float, nullable=False)
+    frame_count = Column(Integer, nullable=False)
+    # zlib-compressed frames: byte-shuffled FRAME_DTYPE columns, one after another
+    data = Column(LargeBinary, nullable=False)
+    
+    session = relationship("DrivingSession", back_populates="chunks")
+
+class LapResult(Base):
+    __tablename__ = "lap_results"
+    __table_args__ = (
+        Index("ix_lap_results_job_id_total_time", "job_id", "total_time"),
+    )
+    
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    job_id = Column(UUID(as_uuid=True), ForeignKey("jobs.id"), nullable=False)
+    car = Column(Integer, nullable=False)
+    laps = Column(Integer, nullable=False)
+    # Seconds; NULL when the car completed no lap / not all laps
+    best_lap = Column(Float, nullable=True)
+    total_time = Column(Float, nullable=True)
+    off_track_frames = Column(Integer, nullable=False, default=0)
+    # AI driver parameters, see lap_engine.driver_params
+    target_speed = Column(Float, nullable=False)
+    brake_angle = Column(Float, nullable=False)
+    boost_angle = Column(Float, nullable=False)
+    reach_radius = Column(Float, nullable=False)
+    
+    job = relationship("Job", back_populates="lap_results")
+
+class AnalyticsRollup(Base):
+    __tablename__ = "analytics_rollups"
+    
+    # One row per compute tier x scenario cell; the worker adds every completed training job to its cell
+    compute_tier = Column(String, primary_key=True)
+    weather = Column(String, primary_key=True)
+    time_of_day = Column(String, primary_key=True)
+    road_type = Column(String, primary_key=True)
+    jobs = Column(Integer, nullable=False, default=0)
+    # Sums over the cell's jobs: runtime, cost estimate, final accuracy and loss, safety score
+    runtime_sec = Column(Float, nullable=False, default=0.0)
+    cost = Column(Float, nullable=False, default=0.0)
+    accuracy = Column(Float, nullable=False, default=0.0)
+    loss = Column(Float, nullable=False, default=0.0)
+    safety_score = Column(Float, nullable=False, default=0.0)
+
+class AnalyticsHistogram(Base):
+    __tablename__ = "analytics_histograms"
+    
+    # Jobs per value bucket of a final metric in each rollup cell, for percentiles
+    compute_tier = Column(String, primary_key=True)
+    weather = Column(String, primary_key=True)
+    time_of_day = Column(String, primary_key=True)
+    road_type = Column(String, primary_key=True)
+    # accuracy, loss or safety_score; bucket = floor(value / width), see services.analytics
+    metric = Column(String, primary_key=True)
+    bucket = Column(Integer, primary_key=True)
+    jobs = Column(Integer, nullable=False, default=0)
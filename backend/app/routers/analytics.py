@@ -0,0 +1,31 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..async_database import get_async_db
+from ..schemas import AnalyticsGroup
+from ..services.analytics import DIMENSIONS, rollup_groups
+from typing import List, Optional
+
+router = APIRouter()
+
+@router.get("/", response_model=List[AnalyticsGroup])
+async def get_analytics(
+    group_by: List[str] = Query(["compute_tier"]),
+    compute_tier: Optional[str] = None,
+    weather: Optional[str] = None,
+    time_of_day: Optional[str] = None,
+    road_type: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Final accuracy/loss and safety score distributions, runtime and cost of completed training jobs.
+
+    Jobs are grouped by any of compute_tier, weather, time_of_day and road_type
+    (`group_by` may be repeated) and can be filtered by the same dimensions,
+    e.g. `?group_by=compute_tier&weather=fog` compares tiers in fog.
+    """
+    unknown = [name for name in group_by if name not in DIMENSIONS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Cannot group by {', '.join(unknown)}; use {', '.join(DIMENSIONS)}")
+
+    filters = {"compute_tier": compute_tier.lower() if compute_tier else None, "weather": weather,
+               "time_of_day": time_of_day, "road_type": road_type}
+    return await rollup_groups(db, list(dict.fromkeys(group_by)), {name: value for name, value in filters.items() if value})
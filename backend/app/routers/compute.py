@@ -1,20 +1,71 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..database import get_db
-from ..models import ComputeMetric, Job
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..async_database import get_async_db
+from ..compaction import unchanged_until
 from ..schemas import ComputeMetricResponse
-from typing import List
+from ..services.response_cache import cached_response, job_response
+from ..services.telemetry_service import (
+    compute_metrics_query, job_rows, downsampled_compute_metrics, encode_compute_cursor, decode_compute_cursor,
+    COMPUTE_METRICS_ORDER, MAX_PAGE_SIZE, MAX_POINTS
+)
+from datetime import datetime
+from typing import List, Optional
 from uuid import UUID
 
 router = APIRouter()
 
+COMPUTE_METRICS_ADAPTER = TypeAdapter(List[ComputeMetricResponse])
+
 @router.get("/{job_id}", response_model=List[ComputeMetricResponse])
-def get_compute_metrics(job_id: UUID, db: Session = Depends(get_db)):
-    """Get compute telemetry for a specific job"""
-    # Verify job exists
-    job = db.query(Job).filter(Job.id == job_id).first()
-    if not job:
+async def get_compute_metrics(
+    job_id: UUID,
+    request: Request,
+    since: Optional[datetime] = None,
+    cursor: Optional[str] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    points: Optional[int] = Query(None, ge=3, le=MAX_POINTS),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get compute telemetry for a specific job.
+
+    `since` returns only samples taken after that timestamp. When a `limit`-sized
+    page comes back full, `X-Next-Cursor` holds the `cursor` for the next page.
+    `points` instead returns a shape-preserving (LTTB) downsample of at most that
+    many samples. Samples past the raw retention period come back as one row per
+    compaction bucket, with `samples` and the min/max/p95 of each series set.
+    Responses carry an ETag; those of completed jobs are also cached until
+    compaction could change them.
+    """
+    if points is not None and (limit is not None or cursor):
+        raise HTTPException(status_code=400, detail="Use either points or limit/cursor, not both")
+    cached = cached_response(request, job_id)
+    if cached is not None:
+        return cached
+
+    after_id = None
+    if cursor:
+        try:
+            since, after_id = decode_compute_cursor(cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    # The job's existence is checked by the same query that reads its telemetry
+    if points is not None:
+        found = await downsampled_compute_metrics(db, job_id, points, since)
+    else:
+        found = await job_rows(db, compute_metrics_query(job_id, since, limit, after_id), job_id, COMPUTE_METRICS_ORDER)
+    if found is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    
-    compute_metrics = db.query(ComputeMetric).filter(ComputeMetric.job_id == job_id).order_by(ComputeMetric.timestamp).all()
-    return compute_metrics
+
+    status, compute_metrics = found
+    headers = {}
+    if points is None and limit is not None and len(compute_metrics) == limit:
+        last = compute_metrics[-1]
+        headers["X-Next-Cursor"] = encode_compute_cursor(last["timestamp"], last["id"])
+    # Rows are in time order: the first one is the first compaction may rewrite
+    expires_at = unchanged_until(compute_metrics[0]["timestamp"]) if compute_metrics else None
+    return job_response(
+        request, job_id, compute_metrics, COMPUTE_METRICS_ADAPTER, status == "completed",
+        expires_at=expires_at, headers=headers, exclude_none=True
+    )
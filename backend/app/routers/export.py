@@ -0,0 +1,47 @@
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
+from ..services.export import DATASETS, FORMATS, acquire_export_slot, export, export_engine, job_filters
+from typing import List, Optional
+from uuid import UUID
+
+router = APIRouter()
+
+@router.get("/{dataset}")
+def export_dataset(
+    dataset: str,
+    format: str = "parquet",
+    status: Optional[str] = None,
+    tier: Optional[str] = None,
+    weather: Optional[str] = None,
+    sweep_id: Optional[UUID] = None,
+    job_id: Optional[List[UUID]] = Query(None),
+):
+    """Stream `jobs` (settings, scenario and risk), `metrics` or `compute` rows of the filtered jobs as a file.
+
+    `format` is parquet, arrow (IPC stream) or csv. Jobs are filtered like the
+    job list, or picked with repeated `job_id`; rows carry `job_id` to join on.
+    At most EXPORT_CONCURRENCY exports run at once; beyond that the answer is 503.
+    """
+    if dataset not in DATASETS:
+        raise HTTPException(status_code=404, detail=f"Unknown dataset {dataset}; one of {', '.join(DATASETS)}")
+    if format not in FORMATS:
+        raise HTTPException(status_code=400, detail=f"Unknown format {format}; one of {', '.join(FORMATS)}")
+    filters = job_filters(status, tier, weather, sweep_id, job_id)
+    release = acquire_export_slot()
+    if release is None:
+        raise HTTPException(status_code=503, detail="Too many exports in progress", headers={"Retry-After": "30"})
+
+    def body():
+        # The connection and slot are held for the whole download and returned when it ends or the client goes away
+        try:
+            with export_engine.connect() as conn:
+                yield from export(conn, dataset, format, filters)
+        finally:
+            release()
+
+    media_type, extension = FORMATS[format]
+    # The background task also releases the slot of a download whose body never started
+    return StreamingResponse(body(), media_type=media_type, background=BackgroundTask(release), headers={
+        "Content-Disposition": f'attachment; filename="{dataset}.{extension}"'
+    })
@@ -1,26 +1,53 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from ..async_database import get_async_db
 from ..database import get_db
 from ..models import Insight, Job
-from ..schemas import InsightResponse
+from ..schemas import InsightResponse, InsightCacheStats
+from ..services.insight_cache import cache_stats
+from ..services.response_cache import cached_response, job_response
 from typing import List
 from uuid import UUID
 
 router = APIRouter()
 
+INSIGHTS_ADAPTER = TypeAdapter(List[InsightResponse])
+
+@router.get("/cache/stats", response_model=InsightCacheStats)
+def get_cache_stats():
+    """Insight cache hits, misses and the request time and tokens saved by hits"""
+    return cache_stats()
+
 @router.get("/{job_id}", response_model=List[InsightResponse])
-def get_insights(job_id: UUID, db: Session = Depends(get_db)):
-    """Get AI-generated insights for a specific job"""
-    # Verify job exists
-    job = db.query(Job).filter(Job.id == job_id).first()
-    if not job:
+async def get_insights(job_id: UUID, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Get AI-generated insights for a specific job; cached once the job and its insights are done"""
+    cached = cached_response(request, job_id)
+    if cached is not None:
+        return cached
+    # The job's existence is checked by the same query that reads its insights
+    rows = (await db.execute(
+        select(Job.status, Job.insight_status, Insight).outerjoin(Insight, Insight.job_id == Job.id).where(Job.id == job_id).order_by(Insight.created_at)
+    )).all()
+    if not rows:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    insights = db.query(Insight).filter(Insight.job_id == job_id).order_by(Insight.created_at).all()
-    return insights
+    status, insight_status, _ = rows[0]
+    insights = [insight for _, _, insight in rows if insight is not None]
+    # Insights are generated after completion, so they only stop changing once that is done
+    return job_response(request, job_id, insights, INSIGHTS_ADAPTER, status == "completed", final=insight_status != "pending")
 
-from ..schemas import DrivingSession, DrivingAdvice
-from ..services.openai_service import analyze_driving_session
+import json
+from typing import Optional
+from fastapi import Request
+from starlette.concurrency import run_in_threadpool
+from .. import models
+from ..schemas import DrivingSession, DrivingAdvice, DrivingUploadResponse, DrivingSessionCreate
+from ..services.openai_service import analyze_driving_session, coach_driving
+from ..services.driving_telemetry import FeatureAccumulator, append_frames, decode_binary, decode_columnar
+from ..services.track_maps import find_map
 
 @router.post("/driving-session", response_model=DrivingAdvice)
 def analyze_driving(session: DrivingSession):
@@ -34,3 +61,59 @@ def analyze_driving(session: DrivingSession):
         
     result = analyze_driving_session(frames)
     return result
+
+async def read_frames(request: Request):
+    """Decode a packed binary (application/octet-stream) or columnar JSON frame payload"""
+    payload = await request.body()
+    try:
+        if request.headers.get("content-type", "").startswith("application/octet-stream"):
+            return decode_binary(payload)
+        return decode_columnar(payload)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/driving-session/columnar", response_model=DrivingAdvice)
+async def analyze_driving_columnar(request: Request, map: Optional[str] = None):
+    """Analyze a whole session sent as packed binary frames or per-field JSON arrays; a preset `map` adds positional features"""
+    accumulator = FeatureAccumulator(find_map(map))
+    accumulator.add(await read_frames(request))
+    return await run_in_threadpool(coach_driving, accumulator.features())
+
+@router.post("/driving-sessions", response_model=DrivingUploadResponse)
+def start_driving_upload(session: Optional[DrivingSessionCreate] = None, db: Session = Depends(get_db)):
+    """Start a recorded session; frames are sent with the chunks endpoint while driving"""
+    session = session or DrivingSessionCreate()
+    record = models.DrivingSession(map=session.map, driver=session.driver)
+    db.add(record)
+    db.commit()
+    return {"session_id": record.id, "features": FeatureAccumulator().features()}
+
+def store_chunk(db: Session, session_id: UUID, frames):
+    # Lock the session row so concurrent chunks don't lose feature updates
+    record = db.query(models.DrivingSession).filter(models.DrivingSession.id == session_id).with_for_update().first()
+    if not record:
+        raise HTTPException(status_code=404, detail="Driving session not found")
+    append_frames(db, record, frames)
+    db.commit()
+    return {"session_id": session_id, "features": FeatureAccumulator.from_session(record).features()}
+
+@router.post("/driving-sessions/{session_id}/chunks", response_model=DrivingUploadResponse)
+async def upload_driving_chunk(session_id: UUID, request: Request, db: Session = Depends(get_db)):
+    """Store a chunk of frames and fold it into the session's running features"""
+    frames = await read_frames(request)
+    return await run_in_threadpool(store_chunk, db, session_id, frames)
+
+@router.post("/driving-sessions/{session_id}/analyze", response_model=DrivingAdvice)
+def analyze_driving_upload(session_id: UUID, db: Session = Depends(get_db)):
+    """Finish a recorded session and return AI coaching advice"""
+    record = db.query(models.DrivingSession).filter(models.DrivingSession.id == session_id).first()
+    if not record:
+        raise HTTPException(status_code=404, detail="Driving session not found")
+    features = FeatureAccumulator.from_session(record).features()
+    # End the read transaction so the pooled connection is not held during the OpenAI call
+    db.commit()
+    advice = coach_driving(features)
+    record.advice = json.dumps(advice)
+    record.status = "completed"
+    db.commit()
+    return advice
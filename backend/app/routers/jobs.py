@@ -1,13 +1,22 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session, joinedload
+from ..async_database import get_async_db
 from ..database import get_db
-from ..models import Job, Scenario
-from ..schemas import JobCreate, JobResponse
-from typing import List
+from ..models import Job, Scenario, LapResult, DrivingSession
+from ..job_events import notify_job_created
+from ..schemas import JobCreate, JobResponse, LapSummary
+from ..services.track_maps import get_map
+from typing import List, Optional
 from uuid import UUID
+import os
 
 router = APIRouter()
 
+# Upper bound on AI drivers in one lap simulation job
+MAX_LAP_CARS = int(os.getenv("MAX_LAP_CARS", "10000"))
+
 # Compute tier pricing
 COMPUTE_TIERS = {
     "small": {"name": "T4 GPU", "vram": 8, "cost_per_hour": 0.5},
@@ -15,6 +24,27 @@ COMPUTE_TIERS = {
     "large": {"name": "H100 GPU", "vram": 80, "cost_per_hour": 8.0}
 }
 
+def estimate_cost(compute_tier: str, epochs: int) -> float:
+    """Estimated cost in USD of running `epochs` epochs on a compute tier"""
+    tier = COMPUTE_TIERS.get(compute_tier.lower(), COMPUTE_TIERS["small"])
+    estimated_time_hours = (epochs * 2) / 60  # Rough estimate
+    return round(tier["cost_per_hour"] * estimated_time_hours, 2)
+
+def validate_lap_job(job_data: JobCreate):
+    """Reject lap simulations on unknown or unraceable maps and out-of-range car counts"""
+    if job_data.fast_forward:
+        raise HTTPException(status_code=400, detail="Lap simulations cannot be fast-forwarded")
+    if job_data.epochs < 1:
+        raise HTTPException(status_code=400, detail="A lap simulation needs at least one lap")
+    if not job_data.cars or not 1 <= job_data.cars <= MAX_LAP_CARS:
+        raise HTTPException(status_code=400, detail=f"cars must be between 1 and {MAX_LAP_CARS}")
+    try:
+        track = get_map(job_data.map or "")
+    except KeyError:
+        raise HTTPException(status_code=400, detail=f"Unknown map {job_data.map}")
+    if not track.lappable:
+        raise HTTPException(status_code=400, detail=f"Map {job_data.map} cannot be raced (waypoints or finish line missing)")
+
 @router.post("/", response_model=JobResponse)
 def create_job(job_data: JobCreate, db: Session = Depends(get_db)):
     """Launch a new simulation job"""
@@ -22,48 +52,87 @@ def create_job(job_data: JobCreate, db: Session = Depends(get_db)):
     scenario = db.query(Scenario).filter(Scenario.id == job_data.scenario_id).first()
     if not scenario:
         raise HTTPException(status_code=404, detail="Scenario not found")
-    
-    # Calculate cost estimate
-    tier = COMPUTE_TIERS.get(job_data.compute_tier.lower(), COMPUTE_TIERS["small"])
-    estimated_time_hours = (job_data.epochs * 2) / 60  # Rough estimate
-    cost_estimate = tier["cost_per_hour"] * estimated_time_hours
+    if job_data.job_type == "lap_simulation":
+        validate_lap_job(job_data)
     
     db_job = Job(
         scenario_id=job_data.scenario_id,
         compute_tier=job_data.compute_tier,
         epochs=job_data.epochs,
-        cost_estimate=round(cost_estimate, 2),
+        fast_forward=job_data.fast_forward,
+        job_type=job_data.job_type,
+        map=job_data.map if job_data.job_type == "lap_simulation" else None,
+        cars=job_data.cars if job_data.job_type == "lap_simulation" else None,
+        cost_estimate=estimate_cost(job_data.compute_tier, job_data.epochs),
         status="pending"
     )
     db.add(db_job)
+    db.flush()
+    # Delivered on commit, waking idle workers immediately
+    notify_job_created(db, str(db_job.id))
     db.commit()
     db.refresh(db_job)
     return db_job
 
 @router.get("/", response_model=List[JobResponse])
-def list_jobs(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """List all jobs"""
-    jobs = db.query(Job).options(joinedload(Job.scenario)).order_by(Job.created_at.desc()).offset(skip).limit(limit).all()
-    
-    # Calculate indices
-    total_jobs = db.query(Job).count()
+async def list_jobs(
+    skip: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    tier: Optional[str] = None,
+    weather: Optional[str] = None,
+    sweep_id: Optional[UUID] = None,
+    db: AsyncSession = Depends(get_async_db)
+):
+    """List jobs, newest first, optionally filtered by status, compute tier, scenario weather or sweep"""
+    stmt = select(Job).options(joinedload(Job.scenario))
+    if status:
+        stmt = stmt.where(Job.status == status)
+    if tier:
+        stmt = stmt.where(func.lower(Job.compute_tier) == tier.lower())
+    if weather:
+        stmt = stmt.where(Job.scenario.has(Scenario.weather == weather))
+    if sweep_id:
+        stmt = stmt.where(Job.sweep_id == sweep_id)
     
-    # Get scenario indices map
-    # Order by creation ASC so index 1 is oldest
-    scenario_ids = db.query(Scenario.id).order_by(Scenario.created_at.asc()).all()
-    scenario_map = {sid[0]: i + 1 for i, sid in enumerate(scenario_ids)}
-    
-    for i, job in enumerate(jobs):
-        job.index = total_jobs - skip - i
-        if job.scenario_id in scenario_map:
-            job.scenario.index = scenario_map[job.scenario_id]
-            
-    return jobs
+    # Display indices come from the persisted seq columns, so only this page is read
+    return (await db.scalars(stmt.order_by(Job.created_at.desc(), Job.id.desc()).offset(skip).limit(limit))).all()
 
 @router.get("/{job_id}", response_model=JobResponse)
-def get_job(job_id: UUID, db: Session = Depends(get_db)):
+async def get_job(job_id: UUID, db: AsyncSession = Depends(get_async_db)):
     """Get a specific job by ID"""
-    job = db.query(Job).options(joinedload(Job.scenario)).filter(Job.id == job_id).first()
+    job = await db.scalar(select(Job).options(joinedload(Job.scenario)).where(Job.id == job_id))
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     return job
+
+@router.get("/{job_id}/laps", response_model=LapSummary)
+def get_job_laps(job_id: UUID, limit: int = Query(100, le=10000), db: Session = Depends(get_db)):
+    """Lap simulation results: summary plus the fastest cars, finishers first"""
+    job = db.query(Job).filter(Job.id == job_id).first()
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.job_type != "lap_simulation":
+        raise HTTPException(status_code=400, detail="Job is not a lap simulation")
+    
+    finished, best_lap = db.query(func.count(LapResult.total_time), func.min(LapResult.best_lap)).filter(
+        LapResult.job_id == job_id
+    ).one()
+    median = db.query(LapResult.total_time).filter(
+        LapResult.job_id == job_id, LapResult.total_time.isnot(None)
+    ).order_by(LapResult.total_time).offset(finished // 2).limit(1).scalar()
+    results = db.query(LapResult).filter(LapResult.job_id == job_id).order_by(
+        LapResult.total_time.is_(None), LapResult.total_time, LapResult.laps.desc(), LapResult.car
+    ).limit(limit).all()
+    session_id = db.query(DrivingSession.id).filter(DrivingSession.job_id == job_id).scalar()
+    return {
+        "job_id": job_id,
+        "map": job.map,
+        "cars": job.cars,
+        "laps": job.epochs,
+        "finished": finished,
+        "best_lap": best_lap,
+        "median_total_time": median,
+        "session_id": session_id,
+        "results": results
+    }
@@ -1,20 +1,52 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..database import get_db
-from ..models import Metric, Job
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..async_database import get_async_db
+from ..models import Metric
 from ..schemas import MetricResponse
-from typing import List
+from ..services.response_cache import cached_response, job_response
+from ..services.telemetry_service import (
+    metrics_query, job_rows, downsampled_metrics, METRICS_ORDER, MAX_PAGE_SIZE, MAX_POINTS
+)
+from typing import List, Optional
 from uuid import UUID
 
 router = APIRouter()
 
+METRICS_ADAPTER = TypeAdapter(List[MetricResponse])
+
 @router.get("/{job_id}", response_model=List[MetricResponse])
-def get_job_metrics(job_id: UUID, db: Session = Depends(get_db)):
-    """Get training metrics for a specific job"""
-    # Verify job exists
-    job = db.query(Job).filter(Job.id == job_id).first()
-    if not job:
+async def get_job_metrics(
+    job_id: UUID,
+    request: Request,
+    since_epoch: Optional[int] = None,
+    limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE),
+    points: Optional[int] = Query(None, ge=3, le=MAX_POINTS),
+    db: AsyncSession = Depends(get_async_db)
+):
+    """Get training metrics for a specific job.
+
+    `since_epoch` returns only later epochs. When a `limit`-sized page comes back
+    full, `X-Next-Cursor` holds the `since_epoch` for the next page. `points`
+    instead returns a shape-preserving (LTTB) downsample of at most that many epochs.
+    Responses carry an ETag; those of completed jobs are also cached.
+    """
+    if points is not None and limit is not None:
+        raise HTTPException(status_code=400, detail="Use either points or limit, not both")
+    cached = cached_response(request, job_id)
+    if cached is not None:
+        return cached
+
+    # The job's existence is checked by the same query that reads its metrics
+    if points is not None:
+        found = await downsampled_metrics(db, job_id, points, since_epoch)
+    else:
+        found = await job_rows(db, metrics_query(job_id, since_epoch, limit), job_id, METRICS_ORDER, Metric)
+    if found is None:
         raise HTTPException(status_code=404, detail="Job not found")
-    
-    metrics = db.query(Metric).filter(Metric.job_id == job_id).order_by(Metric.epoch).all()
-    return metrics
+
+    status, metrics = found
+    headers = {}
+    if points is None and limit is not None and len(metrics) == limit:
+        headers["X-Next-Cursor"] = str(metrics[-1].epoch)
+    return job_response(request, job_id, metrics, METRICS_ADAPTER, status == "completed", headers=headers)
@@ -1,22 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from ..database import get_db
+from fastapi import APIRouter, Depends, HTTPException, Request
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..async_database import get_async_db
 from ..models import RiskAnalysis, Job
-from ..schemas import RiskAnalysisResponse
+from ..schemas import RiskAnalysisResponse, RiskBatchRequest, RiskBatchResponse
+from ..services.response_cache import cached_response, job_response
+from ..services.risk_engine import evaluate_risk_batch, batch_records
 from uuid import UUID
+import os
 
 router = APIRouter()
 
+# Largest number of candidates a single batch evaluation may score
+MAX_RISK_CANDIDATES = int(os.getenv("MAX_RISK_CANDIDATES", "100000"))
+
+RISK_ADAPTER = TypeAdapter(RiskAnalysisResponse)
+
+@router.post("/batch-evaluate", response_model=RiskBatchResponse)
+def batch_evaluate(request: RiskBatchRequest):
+    """Score what-if (scenario, accuracy, detection score) candidates without launching jobs"""
+    if len(request.candidates) > MAX_RISK_CANDIDATES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_RISK_CANDIDATES} candidates per request")
+    if request.noise < 0:
+        raise HTTPException(status_code=400, detail="noise must be non-negative")
+
+    candidates = request.candidates
+    scores = evaluate_risk_batch(
+        [c.weather for c in candidates],
+        [c.time_of_day for c in candidates],
+        [c.traffic_density for c in candidates],
+        [c.accuracy for c in candidates],
+        [c.detection_score for c in candidates],
+        noise=request.noise,
+        seed=request.seed
+    )
+    return {"results": batch_records(scores)}
+
 @router.get("/{job_id}", response_model=RiskAnalysisResponse)
-def get_risk_analysis(job_id: UUID, db: Session = Depends(get_db)):
-    """Get safety risk analysis for a specific job"""
-    # Verify job exists
-    job = db.query(Job).filter(Job.id == job_id).first()
-    if not job:
+async def get_risk_analysis(job_id: UUID, request: Request, db: AsyncSession = Depends(get_async_db)):
+    """Get safety risk analysis for a specific job; responses of completed jobs are cached"""
+    cached = cached_response(request, job_id)
+    if cached is not None:
+        return cached
+    # One query tells a missing job apart from a job without analysis
+    row = (await db.execute(
+        select(Job.status, RiskAnalysis).outerjoin(RiskAnalysis, RiskAnalysis.job_id == Job.id).where(Job.id == job_id).limit(1)
+    )).first()
+    if not row:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    risk = db.query(RiskAnalysis).filter(RiskAnalysis.job_id == job_id).first()
+    status, risk = row
     if not risk:
         raise HTTPException(status_code=404, detail="Risk analysis not found")
     
-    return risk
+    return job_response(request, job_id, risk, RISK_ADAPTER, status == "completed")
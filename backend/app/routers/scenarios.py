@@ -1,9 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from ..async_database import get_async_db
 from ..database import get_db
 from ..models import Scenario
 from ..schemas import ScenarioCreate, ScenarioResponse
-from typing import List
+from typing import List, Optional
+from uuid import UUID
 import random
 
 router = APIRouter()
@@ -18,21 +22,19 @@ def create_scenario(scenario: ScenarioCreate, db: Session = Depends(get_db)):
     return db_scenario
 
 @router.get("/", response_model=List[ScenarioResponse])
-def list_scenarios(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """List all generated scenarios"""
-    total_count = db.query(Scenario).count()
-    scenarios = db.query(Scenario).order_by(Scenario.created_at.desc()).offset(skip).limit(limit).all()
+async def list_scenarios(skip: int = 0, limit: int = 100, weather: Optional[str] = None, db: AsyncSession = Depends(get_async_db)):
+    """List generated scenarios, newest first, optionally filtered by weather"""
+    stmt = select(Scenario)
+    if weather:
+        stmt = stmt.where(Scenario.weather == weather)
     
-    # Assign index
-    for i, s in enumerate(scenarios):
-        s.index = total_count - skip - i
-        
-    return scenarios
+    # Display indices come from the persisted seq column, so only this page is read
+    return (await db.scalars(stmt.order_by(Scenario.created_at.desc(), Scenario.id.desc()).offset(skip).limit(limit))).all()
 
 @router.get("/{scenario_id}", response_model=ScenarioResponse)
-def get_scenario(scenario_id: str, db: Session = Depends(get_db)):
+async def get_scenario(scenario_id: UUID, db: AsyncSession = Depends(get_async_db)):
     """Get a specific scenario by ID"""
-    scenario = db.query(Scenario).filter(Scenario.id == scenario_id).first()
+    scenario = await db.scalar(select(Scenario).where(Scenario.id == scenario_id))
     if not scenario:
         raise HTTPException(status_code=404, detail="Scenario not found")
     return scenario
@@ -0,0 +1,96 @@
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+from ..database import get_db
+from ..models import DrivingSession
+from ..schemas import DrivingSessionResponse
+from ..services.driving_telemetry import CHUNK_FRAMES, FeatureAccumulator, append_frames, columns, load_frames
+from .insights import read_frames
+from typing import List, Literal, Optional
+from uuid import UUID
+
+router = APIRouter()
+
+def session_response(session: DrivingSession) -> dict:
+    features = FeatureAccumulator.from_session(session).features()
+    return {
+        "id": session.id,
+        "map": session.map,
+        "driver": session.driver,
+        "job_id": session.job_id,
+        "status": session.status,
+        "frames": session.frames,
+        "chunk_count": session.chunk_count,
+        "duration_sec": features["duration_sec"],
+        "features": features,
+        "advice": json.loads(session.advice) if session.advice else None,
+        "created_at": session.created_at
+    }
+
+def get_session_or_404(db: Session, session_id: UUID) -> DrivingSession:
+    session = db.query(DrivingSession).filter(DrivingSession.id == session_id).first()
+    if not session:
+        raise HTTPException(status_code=404, detail="Driving session not found")
+    return session
+
+@router.get("/", response_model=List[DrivingSessionResponse])
+def list_sessions(
+    skip: int = 0,
+    limit: int = Query(100, le=1000),
+    map: Optional[str] = None,
+    driver: Optional[Literal["human", "ai"]] = None,
+    db: Session = Depends(get_db)
+):
+    """List recorded driving sessions, newest first"""
+    query = db.query(DrivingSession)
+    if map:
+        query = query.filter(DrivingSession.map == map)
+    if driver:
+        query = query.filter(DrivingSession.driver == driver)
+    sessions = query.order_by(DrivingSession.created_at.desc()).offset(skip).limit(limit).all()
+    return [session_response(session) for session in sessions]
+
+def import_frames(db: Session, map: Optional[str], driver: str, frames) -> dict:
+    session = DrivingSession(map=map, driver=driver, status="completed")
+    db.add(session)
+    db.flush()
+    append_frames(db, session, frames, chunk_frames=CHUNK_FRAMES)
+    db.commit()
+    return session_response(session)
+
+@router.post("/", response_model=DrivingSessionResponse, status_code=201)
+async def import_session(
+    request: Request,
+    map: Optional[str] = None,
+    driver: Literal["human", "ai"] = "human",
+    db: Session = Depends(get_db)
+):
+    """Store a whole session sent as packed binary frames or per-field JSON arrays, e.g. an AI lap"""
+    frames = await read_frames(request)
+    if not len(frames):
+        raise HTTPException(status_code=400, detail="Session has no frames")
+    return await run_in_threadpool(import_frames, db, map, driver, frames)
+
+@router.get("/{session_id}", response_model=DrivingSessionResponse)
+def get_session(session_id: UUID, db: Session = Depends(get_db)):
+    """Get a driving session with its features and coaching advice"""
+    return session_response(get_session_or_404(db, session_id))
+
+@router.get("/{session_id}/frames")
+def get_session_frames(
+    session_id: UUID,
+    start: Optional[float] = Query(None, ge=0, description="Seconds from the first frame"),
+    end: Optional[float] = Query(None, ge=0, description="Seconds from the first frame"),
+    format: Literal["json", "binary"] = "json",
+    db: Session = Depends(get_db)
+):
+    """Frames of a session within a time window, as per-field JSON arrays or packed binary frames"""
+    if start is not None and end is not None and end < start:
+        raise HTTPException(status_code=400, detail="end must not be before start")
+    session = get_session_or_404(db, session_id)
+    frames = load_frames(db, session, start, end)
+    if format == "binary":
+        return Response(content=frames.tobytes(), media_type="application/octet-stream",
+                        headers={"X-Frame-Count": str(len(frames))})
+    return {"session_id": session_id, "t0": session.t_start, "frames": len(frames), **columns(frames)}
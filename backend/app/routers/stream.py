@@ -0,0 +1,288 @@
+from fastapi import APIRouter, Header, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
+from sqlalchemy import and_, or_, select
+from sqlalchemy.orm import sessionmaker
+from ..database import dedicated_engine
+from ..models import Job
+from ..schemas import MetricResponse, ComputeMetricResponse
+from ..services.telemetry_service import (
+    metrics_query, compute_metrics_query, encode_compute_cursor, decode_compute_cursor
+)
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+import asyncio
+import json
+import os
+
+router = APIRouter()
+
+# Seconds between checks for new data on an open stream
+STREAM_INTERVAL = float(os.getenv("STREAM_INTERVAL", "1"))
+# Max rows of each series pushed per event; larger backlogs are sent in several events
+STREAM_BATCH_LIMIT = int(os.getenv("STREAM_BATCH_LIMIT", "500"))
+# Metrics/telemetry reads of job streams at once, each on a connection of the stream engine
+STREAM_DB_CONCURRENCY = int(os.getenv("STREAM_DB_CONCURRENCY", "2"))
+
+# Streams stay open as long as clients watch, so they read through a pool of their own
+# (the shared poller plus the row reads) instead of the API pool the request gate protects
+stream_engine = dedicated_engine(STREAM_DB_CONCURRENCY + 1)
+StreamSession = sessionmaker(autocommit=False, autoflush=False, bind=stream_engine)
+
+ACTIVE_STATUSES = ("pending", "running")
+TERMINAL_STATUSES = ("completed", "failed")
+
+SSE_HEADERS = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+
+def sse(event: str, data, event_id: str = None) -> str:
+    """Format one Server-Sent Event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+def job_state(row) -> dict:
+    return {
+        "id": str(row.id),
+        "status": row.status,
+        "progress": row.progress,
+        "runtime_sec": row.runtime_sec
+    }
+
+def parse_cursor(value: str):
+    """Parse a "<epoch>|<timestamp>[|<sample id>]" event id into (since_epoch, since, after_id)"""
+    epoch, _, compute_cursor = value.partition("|")
+    since_epoch = int(epoch) if epoch else None
+    if "|" in compute_cursor:
+        return (since_epoch, *decode_compute_cursor(compute_cursor))
+    return since_epoch, (datetime.fromisoformat(compute_cursor) if compute_cursor else None), None
+
+def format_cursor(since_epoch: Optional[int], since: Optional[datetime], after_id: Optional[UUID]) -> str:
+    if since is None:
+        compute_cursor = ""
+    elif after_id is None:
+        compute_cursor = since.isoformat()
+    else:
+        compute_cursor = encode_compute_cursor(since, after_id)
+    return f"{'' if since_epoch is None else since_epoch}|{compute_cursor}"
+
+def poll_states(job_ids: list, limit: int):
+    """Ids of the newest `limit` jobs, newest first, and the states of those still active plus of `job_ids`"""
+    db = StreamSession()
+    try:
+        newest = db.scalars(select(Job.id).order_by(Job.created_at.desc(), Job.id.desc()).limit(limit)).all() if limit else []
+        rows = db.query(Job.id, Job.status, Job.progress, Job.runtime_sec).filter(or_(
+            Job.id.in_(job_ids),
+            and_(Job.id.in_(newest), Job.status.in_(ACTIVE_STATUSES))
+        )).all()
+        return newest, {row.id: job_state(row) for row in rows}
+    finally:
+        db.close()
+
+def poll_job(job_id: UUID, since_epoch: Optional[int], since: Optional[datetime], after_id: Optional[UUID]):
+    """Job state and the metrics/telemetry rows appended after the cursor"""
+    db = StreamSession()
+    try:
+        # Read the job first: the worker commits progress together with its metrics,
+        # so a terminal status here guarantees the queries below see every row
+        job = db.query(Job.id, Job.status, Job.progress, Job.runtime_sec).filter(Job.id == job_id).first()
+        metrics = db.scalars(metrics_query(job_id, since_epoch, STREAM_BATCH_LIMIT)).all()
+        compute_metrics = db.execute(compute_metrics_query(job_id, since, STREAM_BATCH_LIMIT, after_id)).mappings().all()
+        return (
+            job,
+            [MetricResponse.model_validate(m).model_dump(mode="json") for m in metrics],
+            [ComputeMetricResponse.model_validate(c).model_dump(mode="json", exclude_none=True) for c in compute_metrics]
+        )
+    finally:
+        db.close()
+
+class Subscription:
+    """What one open stream needs polled: the newest `newest` jobs and the jobs in `job_ids`"""
+
+    def __init__(self, newest: int = 0, job_ids=()):
+        self.newest = newest
+        self.job_ids = set(job_ids)
+
+class StreamHub:
+    """Polls job states once per `interval` for every open stream of this process.
+
+    Each tick is one poll_states call, however many clients are connected;
+    streams wait for the next tick instead of querying themselves, and the
+    poller stops while no stream is open. Job streams read metrics and
+    telemetry only when the tick shows their job changed, at most
+    STREAM_DB_CONCURRENCY at once.
+    """
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self.subscriptions = set()
+        # Result of the last tick: newest job ids, states by job id, and the job_ids it looked up
+        self.newest = []
+        self.states = {}
+        self.polled = frozenset()
+        self.ticked = asyncio.Event()
+        self.read_slots = asyncio.Semaphore(STREAM_DB_CONCURRENCY)
+        self.task = None
+
+    def subscribe(self, subscription: Subscription):
+        self.subscriptions.add(subscription)
+        if self.task is None:
+            self.task = asyncio.create_task(self.run())
+
+    def unsubscribe(self, subscription: Subscription):
+        self.subscriptions.discard(subscription)
+
+    async def wait(self):
+        """Until the next tick"""
+        await self.ticked.wait()
+
+    async def read(self, func, *args):
+        """Run a stream's row read in the threadpool, within the read slots"""
+        async with self.read_slots:
+            return await run_in_threadpool(func, *args)
+
+    async def run(self):
+        try:
+            while self.subscriptions:
+                job_ids = frozenset().union(*(s.job_ids for s in self.subscriptions))
+                limit = max(s.newest for s in self.subscriptions)
+                try:
+                    self.newest, self.states = await run_in_threadpool(poll_states, list(job_ids), limit)
+                    self.polled = job_ids
+                except Exception as e:
+                    print(f"Stream poll failed: {e}")
+                else:
+                    ticked, self.ticked = self.ticked, asyncio.Event()
+                    ticked.set()
+                await asyncio.sleep(self.interval)
+        finally:
+            self.task = None
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+
+# Created on startup, inside the event loop it serves
+hub: Optional[StreamHub] = None
+
+@router.on_event("startup")
+async def start_hub():
+    global hub
+    hub = StreamHub(STREAM_INTERVAL)
+
+@router.on_event("shutdown")
+async def stop_hub():
+    hub.stop()
+
+@router.get("/jobs")
+async def stream_jobs(request: Request, limit: int = Query(100, ge=1, le=STREAM_BATCH_LIMIT)):
+    """Push status/progress changes of the pending and running jobs among the newest `limit`.
+
+    `limit` matches the job list page the client shows, so each poll reads a
+    bounded number of rows however many jobs a sweep has queued. A job the
+    client has not listed yet shows up here once it is among the newest.
+    """
+    subscription = Subscription(newest=limit)
+
+    async def events():
+        last_states = {}
+        hub.subscribe(subscription)
+        try:
+            while True:
+                await hub.wait()
+                if await request.is_disconnected():
+                    return
+                visible = set(hub.newest[:limit])
+                states = {}
+                for job_id, state in hub.states.items():
+                    if job_id not in last_states and not (job_id in visible and state["status"] in ACTIVE_STATUSES):
+                        continue
+                    if last_states.get(job_id) != state:
+                        yield sse("job", state)
+                    # Finished jobs are reported once, then no longer tracked
+                    if state["status"] not in TERMINAL_STATUSES:
+                        states[job_id] = state
+                # Tracked jobs the tick did not look up yet (it started before they were tracked)
+                for job_id, state in last_states.items():
+                    if job_id not in hub.states and job_id not in hub.polled:
+                        states[job_id] = state
+                last_states = states
+                subscription.job_ids = set(states)
+        finally:
+            hub.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
+
+@router.get("/jobs/{job_id}")
+async def stream_job(
+    job_id: UUID,
+    request: Request,
+    since_epoch: Optional[int] = None,
+    since: Optional[datetime] = None,
+    last_event_id: Optional[str] = Header(None)
+):
+    """Push a job's progress plus newly written metrics and compute telemetry.
+
+    Resume from `since_epoch`/`since`, or from the `Last-Event-ID` header that
+    EventSource sends automatically after a reconnect. The stream ends with an
+    `end` event once the job has finished and every row has been sent.
+    """
+    after_id = None
+    if last_event_id:
+        try:
+            since_epoch, since, after_id = parse_cursor(last_event_id)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+
+    job, metrics, compute_metrics = await hub.read(poll_job, job_id, since_epoch, since, after_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    subscription = Subscription(job_ids=[job_id])
+
+    async def wait_for_change(state: dict) -> bool:
+        """Wait for a tick showing the job's state changed; False once the client left or the job is gone"""
+        while True:
+            await hub.wait()
+            if await request.is_disconnected():
+                return False
+            if job_id in hub.polled and job_id not in hub.states:
+                return False
+            if hub.states.get(job_id, state) != state:
+                return True
+
+    async def events():
+        nonlocal job, metrics, compute_metrics, since_epoch, since, after_id
+        last_state = None
+        hub.subscribe(subscription)
+        try:
+            while True:
+                if metrics:
+                    since_epoch = metrics[-1]["epoch"]
+                    yield sse("metrics", metrics, format_cursor(since_epoch, since, after_id))
+                if compute_metrics:
+                    since = datetime.fromisoformat(compute_metrics[-1]["timestamp"])
+                    after_id = UUID(compute_metrics[-1]["id"])
+                    yield sse("compute", compute_metrics, format_cursor(since_epoch, since, after_id))
+
+                state = job_state(job)
+                if state != last_state:
+                    yield sse("job", state)
+                    last_state = state
+
+                backlog = len(metrics) == STREAM_BATCH_LIMIT or len(compute_metrics) == STREAM_BATCH_LIMIT
+                if job.status in TERMINAL_STATUSES and not backlog:
+                    yield sse("end", state)
+                    return
+                # The worker commits progress together with its rows, so nothing new can be read before the state changes
+                if not backlog and not await wait_for_change(state):
+                    return
+                job, metrics, compute_metrics = await hub.read(poll_job, job_id, since_epoch, since, after_id)
+                if not job:
+                    return
+        finally:
+            hub.unsubscribe(subscription)
+
+    return StreamingResponse(events(), media_type="text/event-stream", headers=SSE_HEADERS)
@@ -0,0 +1,90 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy import func, insert
+from sqlalchemy.orm import Session
+from ..database import get_db
+from ..models import Sweep, Scenario, Job
+from ..job_events import notify_job_created
+from ..schemas import SweepCreate, SweepResponse
+from .jobs import estimate_cost
+from datetime import datetime
+from itertools import product
+from uuid import UUID, uuid4
+import os
+
+router = APIRouter()
+
+# Largest grid a single sweep may expand to
+MAX_SWEEP_JOBS = int(os.getenv("MAX_SWEEP_JOBS", "100000"))
+
+def sweep_progress(db: Session, sweep: Sweep) -> SweepResponse:
+    """Aggregate job status counts and overall progress of a sweep in one grouped query"""
+    rows = db.query(Job.status, func.count(Job.id), func.sum(Job.progress)).filter(
+        Job.sweep_id == sweep.id
+    ).group_by(Job.status).all()
+    total_progress = sum(progress or 0.0 for _, _, progress in rows)
+    return SweepResponse(
+        id=sweep.id,
+        total_jobs=sweep.total_jobs,
+        scenario_count=sweep.scenario_count,
+        created_at=sweep.created_at,
+        status_counts={status: count for status, count, _ in rows},
+        progress=round(total_progress / sweep.total_jobs, 2) if sweep.total_jobs else 0.0
+    )
+
+@router.post("/", response_model=SweepResponse)
+def create_sweep(sweep_data: SweepCreate, db: Session = Depends(get_db)):
+    """Expand a parameter grid into scenarios x tiers x epochs jobs in one transaction"""
+    scenario_grid = list(product(
+        sweep_data.weather, sweep_data.time_of_day, sweep_data.traffic_density, sweep_data.road_type
+    ))
+    job_grid = list(product(sweep_data.compute_tier, sweep_data.epochs))
+    total_jobs = len(scenario_grid) * len(job_grid)
+    if total_jobs == 0:
+        raise HTTPException(status_code=400, detail="Every sweep dimension needs at least one value")
+    if total_jobs > MAX_SWEEP_JOBS:
+        raise HTTPException(status_code=400, detail=f"Sweep expands to {total_jobs} jobs (max {MAX_SWEEP_JOBS})")
+
+    now = datetime.utcnow()
+    sweep = Sweep(id=uuid4(), total_jobs=total_jobs, scenario_count=len(scenario_grid), created_at=now)
+    db.add(sweep)
+    db.flush()
+
+    # Ids are generated here so scenarios and jobs go in as two multi-row INSERTs
+    # (Core executemany), without per-row ORM objects or refreshes
+    scenario_rows = [
+        {"id": uuid4(), "weather": weather, "time_of_day": time_of_day, "traffic_density": traffic_density,
+         "road_type": road_type, "object_count": sweep_data.object_count,
+         "dataset_size_mb": sweep_data.dataset_size_mb, "created_at": now}
+        for weather, time_of_day, traffic_density, road_type in scenario_grid
+    ]
+    costs = {(tier, epochs): estimate_cost(tier, epochs) for tier, epochs in job_grid}
+    job_rows = [
+        {"id": uuid4(), "scenario_id": scenario["id"], "sweep_id": sweep.id, "compute_tier": tier,
+         "epochs": epochs, "status": "pending", "progress": 0.0, "runtime_sec": 0.0,
+         "cost_estimate": costs[(tier, epochs)], "fast_forward": sweep_data.fast_forward, "created_at": now}
+        for scenario in scenario_rows
+        for tier, epochs in job_grid
+    ]
+
+    connection = db.connection()
+    connection.execute(insert(Scenario.__table__), scenario_rows)
+    connection.execute(insert(Job.__table__), job_rows)
+    # One notification wakes the workers for the whole grid
+    notify_job_created(db, f"sweep:{sweep.id}")
+    db.commit()
+
+    return SweepResponse(
+        id=sweep.id,
+        total_jobs=total_jobs,
+        scenario_count=len(scenario_rows),
+        created_at=now,
+        status_counts={"pending": total_jobs}
+    )
+
+@router.get("/{sweep_id}", response_model=SweepResponse)
+def get_sweep(sweep_id: UUID, db: Session = Depends(get_db)):
+    """Get a sweep with its aggregate job progress"""
+    sweep = db.query(Sweep).filter(Sweep.id == sweep_id).first()
+    if not sweep:
+        raise HTTPException(status_code=404, detail="Sweep not found")
+    return sweep_progress(db, sweep)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Optional, List, Dict, Literal
 from uuid import UUID
 
 # Scenario Schemas
@@ -31,6 +31,11 @@ class JobCreate(BaseModel):
     scenario_id: UUID
     compute_tier: str
     epochs: int
+    fast_forward: bool = False
+    # Lap simulations race `cars` AI drivers for `epochs` laps on `map`
+    job_type: Literal["training", "lap_simulation"] = "training"
+    map: Optional[str] = None
+    cars: Optional[int] = None
 
 class JobResponse(BaseModel):
     id: UUID
@@ -42,12 +47,42 @@ class JobResponse(BaseModel):
     progress: float
     runtime_sec: float
     cost_estimate: float
+    fast_forward: bool = False
+    sweep_id: Optional[UUID] = None
     created_at: datetime
+    started_at: Optional[datetime] = None
+    insight_status: Optional[str] = None
+    job_type: str = "training"
+    map: Optional[str] = None
+    cars: Optional[int] = None
     index: Optional[int] = None
 
     class Config:
         from_attributes = True
 
+# Sweep Schemas
+class SweepCreate(BaseModel):
+    weather: List[str]
+    time_of_day: List[str]
+    traffic_density: List[float]
+    road_type: List[str]
+    compute_tier: List[str]
+    epochs: List[int]
+    object_count: int = 20
+    dataset_size_mb: float = 100.0
+    fast_forward: bool = False
+
+class SweepResponse(BaseModel):
+    id: UUID
+    total_jobs: int
+    scenario_count: int
+    created_at: datetime
+    status_counts: Dict[str, int] = {}
+    progress: float = 0.0
+
+    class Config:
+        from_attributes = True
+
 # Metric Schemas
 class MetricResponse(BaseModel):
     id: UUID
@@ -68,6 +103,17 @@ class ComputeMetricResponse(BaseModel):
     vram_usage: float
     cpu_usage: float
     timestamp: datetime
+    # Set only on compacted rows, whose values are the means of `samples` raw samples
+    samples: Optional[int] = None
+    gpu_utilization_min: Optional[float] = None
+    gpu_utilization_max: Optional[float] = None
+    gpu_utilization_p95: Optional[float] = None
+    vram_usage_min: Optional[float] = None
+    vram_usage_max: Optional[float] = None
+    vram_usage_p95: Optional[float] = None
+    cpu_usage_min: Optional[float] = None
+    cpu_usage_max: Optional[float] = None
+    cpu_usage_p95: Optional[float] = None
 
     class Config:
         from_attributes = True
@@ -84,6 +130,28 @@ class RiskAnalysisResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class RiskCandidate(BaseModel):
+    weather: str
+    time_of_day: str
+    traffic_density: float
+    accuracy: float
+    detection_score: float
+
+class RiskBatchRequest(BaseModel):
+    candidates: List[RiskCandidate]
+    # Std-dev of Gaussian noise applied to accuracy/detection; 0 disables it
+    noise: float = 0.0
+    seed: Optional[int] = None
+
+class RiskEvaluation(BaseModel):
+    collision_probability: float
+    pedestrian_risk: float
+    visibility_risk: float
+    safety_score: float
+
+class RiskBatchResponse(BaseModel):
+    results: List[RiskEvaluation]
+
 # Insight Schemas
 class InsightResponse(BaseModel):
     id: UUID
@@ -94,6 +162,14 @@ class InsightResponse(BaseModel):
     class Config:
         from_attributes = True
 
+class InsightCacheStats(BaseModel):
+    entries: int
+    hits: int
+    misses: int
+    hit_rate: float
+    saved_seconds: float
+    saved_tokens: int
+
 # Driving Session Schemas
 class InputState(BaseModel):
     up: bool
@@ -112,8 +188,88 @@ class TelemetryFrame(BaseModel):
 class DrivingSession(BaseModel):
     telemetry: list[TelemetryFrame]
 
+class DrivingFeatures(BaseModel):
+    frames: int
+    duration_sec: float
+    max_speed: float
+    avg_speed: float
+    grass_percent: float
+    trail_braking_frames: int
+    # From the map's surface grids; None when the map or positions are unknown
+    off_road_percent: Optional[float] = None
+    avg_centerline_distance: Optional[float] = None
+
+class DrivingUploadResponse(BaseModel):
+    session_id: UUID
+    features: DrivingFeatures
+
 class DrivingAdvice(BaseModel):
     safety_score: int
     aggression_score: int
     analysis_text: str
     coach_tip: str
+
+class DrivingSessionCreate(BaseModel):
+    map: Optional[str] = None
+    driver: Literal["human", "ai"] = "human"
+
+class DrivingSessionResponse(BaseModel):
+    id: UUID
+    map: Optional[str]
+    driver: str
+    job_id: Optional[UUID] = None
+    status: str
+    frames: int
+    chunk_count: int
+    duration_sec: float
+    features: DrivingFeatures
+    advice: Optional[DrivingAdvice]
+    created_at: datetime
+
+# Lap Simulation Schemas
+class LapResultResponse(BaseModel):
+    car: int
+    laps: int
+    best_lap: Optional[float]
+    total_time: Optional[float]
+    off_track_frames: int
+    target_speed: float
+    brake_angle: float
+    boost_angle: float
+    reach_radius: float
+
+    class Config:
+        from_attributes = True
+
+class LapSummary(BaseModel):
+    job_id: UUID
+    map: str
+    cars: int
+    laps: int
+    finished: int
+    best_lap: Optional[float]
+    median_total_time: Optional[float]
+    # AI session holding the fastest car's telemetry
+    session_id: Optional[UUID]
+    results: List[LapResultResponse]
+
+# Analytics Schemas
+class AnalyticsDistribution(BaseModel):
+    mean: float
+    p10: float
+    p25: float
+    p50: float
+    p75: float
+    p90: float
+
+class AnalyticsGroup(BaseModel):
+    # Values of the group_by dimensions, e.g. {"compute_tier": "large", "weather": "fog"}
+    group: Dict[str, str]
+    jobs: int
+    runtime_sec_total: float
+    runtime_sec_mean: float
+    cost_total: float
+    cost_mean: float
+    accuracy: AnalyticsDistribution
+    loss: AnalyticsDistribution
+    safety_score: AnalyticsDistribution
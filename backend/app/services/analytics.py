@@ -0,0 +1,154 @@
+import math
+from collections import defaultdict
+from sqlalchemy import and_, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from ..models import AnalyticsRollup, AnalyticsHistogram, Job, Metric, RiskAnalysis, Scenario
+
+# Dimensions completed jobs are rolled up by: compute tier x scenario
+DIMENSIONS = ("compute_tier", "weather", "time_of_day", "road_type")
+# Sums kept per cell; the endpoint reports them as totals and means
+SUMS = ("runtime_sec", "cost", "accuracy", "loss", "safety_score")
+# Histogram bucket width per final metric; percentiles are accurate to half a bucket
+HISTOGRAM_WIDTHS = {"accuracy": 0.005, "loss": 0.005, "safety_score": 0.5}
+PERCENTILES = (10, 25, 50, 75, 90)
+
+def rollup_entry(job: Job, runtime_sec: float, loss: float, accuracy: float, safety_score: float) -> dict:
+    """A completed training job's contribution to its rollup cell; `job` needs its scenario loaded"""
+    scenario = job.scenario
+    return {
+        "compute_tier": job.compute_tier.lower(),
+        "weather": scenario.weather,
+        "time_of_day": scenario.time_of_day,
+        "road_type": scenario.road_type,
+        "runtime_sec": runtime_sec,
+        "cost": job.cost_estimate,
+        "accuracy": accuracy,
+        "loss": loss,
+        "safety_score": safety_score
+    }
+
+def upsert_counters(db: Session, model, rows: list, counters: list):
+    """Add `rows` onto the rows of `model` with the same primary key, inserting the missing ones"""
+    table = model.__table__
+    keys = [column.name for column in table.primary_key]
+    dialect = postgresql if db.bind.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=keys, set_={name: table.c[name] + stmt.excluded[name] for name in counters}
+    )
+    # Every transaction locks cells in key order, so concurrent workers cannot deadlock on them
+    db.execute(stmt, sorted(rows, key=lambda row: tuple(row[key] for key in keys)))
+
+def add_to_rollups(db: Session, entries: list):
+    """Add completed jobs (see rollup_entry) to the rollups, in the caller's transaction"""
+    if not entries:
+        return
+    cells = {}
+    buckets = defaultdict(int)
+    for entry in entries:
+        key = tuple(entry[name] for name in DIMENSIONS)
+        cell = cells.setdefault(key, {**dict(zip(DIMENSIONS, key)), "jobs": 0, **dict.fromkeys(SUMS, 0.0)})
+        cell["jobs"] += 1
+        for name in SUMS:
+            cell[name] += entry[name]
+        for metric, width in HISTOGRAM_WIDTHS.items():
+            buckets[key + (metric, math.floor(entry[metric] / width))] += 1
+
+    upsert_counters(db, AnalyticsRollup, list(cells.values()), ["jobs", *SUMS])
+    upsert_counters(db, AnalyticsHistogram, [
+        {**dict(zip(DIMENSIONS + ("metric", "bucket"), key)), "jobs": count} for key, count in buckets.items()
+    ], ["jobs"])
+
+def rebuild_rollups(db: Session, chunk_size: int = 10000) -> int:
+    """Recompute the rollups from every completed training job; returns the number of jobs.
+
+    Needed once for jobs completed before the rollups existed. Jobs completing
+    while it runs can be missed, so run it with the workers stopped.
+    """
+    db.query(AnalyticsHistogram).delete()
+    db.query(AnalyticsRollup).delete()
+    rows = db.execute(select(
+        Job.compute_tier, Scenario.weather, Scenario.time_of_day, Scenario.road_type, Job.runtime_sec,
+        Job.cost_estimate, Metric.accuracy, Metric.loss, RiskAnalysis.safety_score
+    ).join(Scenario, Scenario.id == Job.scenario_id).join(
+        Metric, and_(Metric.job_id == Job.id, Metric.epoch == Job.epochs)
+    ).join(RiskAnalysis, RiskAnalysis.job_id == Job.id).where(
+        Job.status == "completed", Job.job_type == "training"
+    ).execution_options(yield_per=chunk_size))
+
+    total = 0
+    for chunk in rows.partitions():
+        add_to_rollups(db, [
+            {"compute_tier": tier.lower(), "weather": weather, "time_of_day": time_of_day, "road_type": road_type,
+             "runtime_sec": runtime_sec, "cost": cost, "accuracy": accuracy, "loss": loss, "safety_score": safety_score}
+            for tier, weather, time_of_day, road_type, runtime_sec, cost, accuracy, loss, safety_score in chunk
+        ])
+        total += len(chunk)
+    db.commit()
+    return total
+
+def percentiles(buckets: list, width: float) -> dict:
+    """Percentiles (bucket midpoints) of a histogram given as ascending (bucket, count) pairs"""
+    total = sum(count for _, count in buckets)
+    result = {}
+    for p in PERCENTILES:
+        rank = p / 100 * (total - 1)
+        seen = 0
+        for bucket, count in buckets:
+            seen += count
+            if seen > rank:
+                result[f"p{p}"] = round((bucket + 0.5) * width, 4)
+                break
+    return result
+
+async def rollup_groups(db: AsyncSession, group_by: list, filters: dict) -> list:
+    """Totals, means and percentiles of completed jobs grouped by `group_by` dimensions, within `filters`.
+
+    Reads only the rollup tables, whose size is bounded by the number of
+    tier x scenario cells rather than the number of jobs.
+    """
+    groups = [getattr(AnalyticsRollup, name) for name in group_by]
+    totals = (await db.execute(
+        select(*groups, func.sum(AnalyticsRollup.jobs), *(func.sum(getattr(AnalyticsRollup, name)) for name in SUMS))
+        .where(*(getattr(AnalyticsRollup, name) == value for name, value in filters.items()))
+        .group_by(*groups).order_by(*groups)
+    )).all()
+
+    hist_groups = [getattr(AnalyticsHistogram, name) for name in group_by]
+    histograms = defaultdict(list)
+    for *key, metric, bucket, count in (await db.execute(
+        select(*hist_groups, AnalyticsHistogram.metric, AnalyticsHistogram.bucket, func.sum(AnalyticsHistogram.jobs))
+        .where(*(getattr(AnalyticsHistogram, name) == value for name, value in filters.items()))
+        .group_by(*hist_groups, AnalyticsHistogram.metric, AnalyticsHistogram.bucket)
+        .order_by(AnalyticsHistogram.bucket)
+    )).all():
+        histograms[(*key, metric)].append((bucket, count))
+
+    results = []
+    for row in totals:
+        key, (jobs, *sums) = tuple(row[:len(group_by)]), row[len(group_by):]
+        sums = dict(zip(SUMS, sums))
+        results.append({
+            "group": dict(zip(group_by, key)),
+            "jobs": jobs,
+            "runtime_sec_total": sums["runtime_sec"],
+            "runtime_sec_mean": sums["runtime_sec"] / jobs,
+            "cost_total": sums["cost"],
+            "cost_mean": sums["cost"] / jobs,
+            **{
+                metric: {"mean": sums[metric] / jobs, **percentiles(histograms[(*key, metric)], width)}
+                for metric, width in HISTOGRAM_WIDTHS.items()
+            }
+        })
+    return results
+
+if __name__ == "__main__":
+    from ..database import SessionLocal
+
+    db = SessionLocal()
+    try:
+        print(f"Rolled up {rebuild_rollups(db)} completed jobs")
+    finally:
+        db.close()
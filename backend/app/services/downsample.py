@@ -0,0 +1,47 @@
+import numpy as np
+
+def _normalize(values: np.ndarray) -> np.ndarray:
+    """Scale each row to [0, 1] so series with different units weigh the same"""
+    low = values.min(axis=-1, keepdims=True)
+    span = values.max(axis=-1, keepdims=True) - low
+    return (values - low) / np.where(span == 0, 1, span)
+
+def lttb_indices(x: np.ndarray, ys: np.ndarray, points: int) -> np.ndarray:
+    """Largest-Triangle-Three-Buckets over one or more series sharing an x axis.
+
+    `ys` has shape (series, samples). Each bucket keeps the sample whose triangle
+    with the previously kept sample and the next bucket's centroid is largest,
+    summed over all (normalized) series, so one set of indices preserves the
+    shape of every series. Returns sorted indices, at most `points` of them,
+    always including the first and last sample.
+    """
+    samples = len(x)
+    if points >= samples:
+        return np.arange(samples)
+    if points < 3:
+        return np.array([0, samples - 1])[:points]
+
+    x = _normalize(np.asarray(x, dtype=float))
+    ys = _normalize(np.atleast_2d(np.asarray(ys, dtype=float)))
+
+    # points - 2 buckets between the fixed first and last samples
+    edges = np.linspace(1, samples - 1, points - 1).astype(int)
+    selected = np.empty(points, dtype=int)
+    selected[0], selected[-1] = 0, samples - 1
+
+    anchor = 0
+    for bucket in range(points - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        next_end = edges[bucket + 2] if bucket + 2 < len(edges) else samples
+        centroid_x = x[end:next_end].mean()
+        centroid_y = ys[:, end:next_end].mean(axis=1, keepdims=True)
+
+        anchor_x, anchor_y = x[anchor], ys[:, anchor:anchor + 1]
+        areas = np.abs(
+            (anchor_x - centroid_x) * (ys[:, start:end] - anchor_y)
+            - (anchor_x - x[start:end]) * (centroid_y - anchor_y)
+        ).sum(axis=0)
+
+        anchor = start + int(areas.argmax())
+        selected[bucket + 1] = anchor
+    return selected
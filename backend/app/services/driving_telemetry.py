@@ -0,0 +1,252 @@
+import json
+import zlib
+from typing import Optional
+import numpy as np
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+from ..models import DrivingSession, DrivingSessionChunk
+from .track_maps import TrackMap, find_map
+
+# Binary wire format: one packed little-endian record per frame (26 bytes)
+FRAME_DTYPE = np.dtype([
+    ("t", "<f8"), ("x", "<f4"), ("y", "<f4"), ("speed", "<f4"), ("angle", "<f4"), ("surface", "u1"), ("input", "u1")
+])
+FRAME_FIELDS = FRAME_DTYPE.names
+FLOAT_FIELDS = tuple(field for field in FRAME_FIELDS if FRAME_DTYPE[field].kind == "f")
+# Columnar JSON may omit the car position
+OPTIONAL_FIELDS = ("x", "y")
+
+# Codes of the `surface` column
+SURFACE_ROAD = 0
+SURFACE_GRASS = 1
+
+# Bits of the `input` column
+INPUT_UP = 1
+INPUT_DOWN = 2
+INPUT_LEFT = 4
+INPUT_RIGHT = 8
+INPUT_BOOST = 16
+
+# The client logs telemetry at 10 Hz
+FRAME_RATE = 10
+# Braking while turning only counts as trail braking above this speed
+TRAIL_BRAKE_MIN_SPEED = 5.0
+
+# Frames per stored chunk when a whole session is saved at once
+CHUNK_FRAMES = 600
+
+def decode_binary(payload: bytes) -> np.ndarray:
+    """Frames from packed FRAME_DTYPE records; raises ValueError on a partial record or a NaN/inf value"""
+    if len(payload) % FRAME_DTYPE.itemsize:
+        raise ValueError(f"Payload is not a whole number of {FRAME_DTYPE.itemsize}-byte frames")
+    frames = np.frombuffer(payload, dtype=FRAME_DTYPE)
+    for field in FLOAT_FIELDS:
+        if not np.isfinite(frames[field]).all():
+            raise ValueError(f"{field} values must be finite numbers")
+    return frames
+
+def frame_column(field: str, values: list) -> np.ndarray:
+    """One field's values as a 1-D numeric array that fits its FRAME_DTYPE type; raises ValueError otherwise"""
+    try:
+        column = np.array(values)
+    except (OverflowError, ValueError) as e:
+        raise ValueError(f"Invalid {field} values: {e}")
+    if column.ndim != 1 or (column.size and column.dtype.kind not in "biuf"):
+        raise ValueError(f"{field} must be an array of numbers")
+    if not column.size:
+        return column
+    dtype = FRAME_DTYPE[field]
+    if dtype.kind == "u":
+        info = np.iinfo(dtype)
+        if column.dtype.kind == "f" or column.min() < info.min or column.max() > info.max:
+            raise ValueError(f"{field} values must be integers from {info.min} to {info.max}")
+    elif not np.isfinite(column).all() or np.abs(column).max() > np.finfo(dtype).max:
+        raise ValueError(f"{field} values must be finite {dtype.name} numbers")
+    return column
+
+def decode_columnar(payload: bytes) -> np.ndarray:
+    """Frames from a JSON object of equal-length per-field arrays; raises ValueError on malformed input.
+
+    `surface` may hold codes or the surface names the client displays (any name
+    containing "Grass" is grass); `input` holds INPUT_* bitmasks. Every value
+    must fit its FRAME_DTYPE field. Omitted position fields are stored as 0.
+    """
+    data = json.loads(payload)
+    if not isinstance(data, dict):
+        raise ValueError("Expected an object of per-field arrays")
+    fields = [field for field in FRAME_FIELDS if field in data or field not in OPTIONAL_FIELDS]
+    missing = [field for field in fields if field not in data]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+    if not all(isinstance(data[field], list) for field in fields):
+        raise ValueError("Every field must be an array")
+    lengths = {len(data[field]) for field in fields}
+    if len(lengths) != 1:
+        raise ValueError("All fields must have the same number of frames")
+
+    frames = np.zeros(lengths.pop(), dtype=FRAME_DTYPE)
+    try:
+        surface = data["surface"]
+        if surface and isinstance(surface[0], str):
+            if not all(isinstance(name, str) for name in surface):
+                raise ValueError("surface must hold either names or codes, not both")
+            surface = [SURFACE_GRASS if "Grass" in name else SURFACE_ROAD for name in surface]
+        for field in fields:
+            frames[field] = frame_column(field, surface if field == "surface" else data[field])
+    except (TypeError, OverflowError) as e:
+        raise ValueError(f"Invalid frame values: {e}")
+    return frames
+
+def encode_chunk(frames: np.ndarray) -> bytes:
+    """zlib-compress frames column by column, each column byte-shuffled.
+
+    Grouping the n-th byte of every value (exponents together, noisy low
+    mantissa bytes together) compresses slowly varying telemetry far better
+    than packed records.
+    """
+    return zlib.compress(b"".join(
+        np.ascontiguousarray(frames[field]).view(np.uint8).reshape(len(frames), -1).T.tobytes()
+        for field in FRAME_FIELDS
+    ))
+
+def decode_chunk(data: bytes, frame_count: int) -> np.ndarray:
+    raw = np.frombuffer(zlib.decompress(data), dtype=np.uint8)
+    frames = np.empty(frame_count, dtype=FRAME_DTYPE)
+    offset = 0
+    for field in FRAME_FIELDS:
+        size = frame_count * FRAME_DTYPE[field].itemsize
+        column = raw[offset:offset + size].reshape(-1, frame_count).T
+        frames[field] = np.ascontiguousarray(column).view(FRAME_DTYPE[field]).ravel()
+        offset += size
+    return frames
+
+class FeatureAccumulator:
+    """Session features updated one chunk of frames at a time, vectorized within each chunk.
+
+    With the session's TrackMap, positional features come from its precomputed
+    surface grids: frames off the road geometry and the mean distance to the
+    centerline. Frames without a position (x and y both 0) are left out of them.
+    """
+
+    # Running totals, mirrored by the columns of the same name on DrivingSession
+    STATE = ("frames", "speed_sum", "max_speed", "grass_frames", "trail_braking_frames",
+             "positioned_frames", "off_road_frames", "centerline_sum")
+
+    def __init__(self, track: Optional[TrackMap] = None):
+        self.track = track
+        self.frames = 0
+        self.speed_sum = 0.0
+        self.max_speed = 0.0
+        self.grass_frames = 0
+        self.trail_braking_frames = 0
+        self.positioned_frames = 0
+        self.off_road_frames = 0
+        self.centerline_sum = 0.0
+
+    @classmethod
+    def from_session(cls, session: DrivingSession) -> "FeatureAccumulator":
+        accumulator = cls(find_map(session.map))
+        for name in cls.STATE:
+            setattr(accumulator, name, getattr(session, name) or 0)
+        return accumulator
+
+    def save_to(self, session: DrivingSession):
+        for name in self.STATE:
+            setattr(session, name, getattr(self, name))
+
+    def add(self, frames: np.ndarray):
+        if not len(frames):
+            return
+        speed = np.abs(frames["speed"].astype(np.float64))
+        inputs = frames["input"]
+        turning = (inputs & (INPUT_LEFT | INPUT_RIGHT)) != 0
+        braking = (inputs & INPUT_DOWN) != 0
+
+        self.frames += len(frames)
+        self.speed_sum += float(speed.sum())
+        self.max_speed = max(self.max_speed, float(speed.max()))
+        self.grass_frames += int(np.count_nonzero(frames["surface"] == SURFACE_GRASS))
+        self.trail_braking_frames += int(np.count_nonzero(turning & braking & (speed > TRAIL_BRAKE_MIN_SPEED)))
+
+        if self.track is not None:
+            positioned = frames[(frames["x"] != 0) | (frames["y"] != 0)]
+            if len(positioned):
+                x, y = positioned["x"], positioned["y"]
+                self.positioned_frames += len(positioned)
+                self.off_road_frames += int(np.count_nonzero(~self.track.on_road(x, y)))
+                self.centerline_sum += float(self.track.centerline_distance(x, y).sum())
+
+    def features(self) -> dict:
+        """Same keys as openai_service.driving_features, plus positional features (None without a map)"""
+        positioned = self.positioned_frames
+        return {
+            "frames": self.frames,
+            "duration_sec": self.frames / FRAME_RATE,
+            "max_speed": self.max_speed,
+            "avg_speed": self.speed_sum / self.frames if self.frames else 0.0,
+            "grass_percent": self.grass_frames / self.frames * 100 if self.frames else 0.0,
+            "trail_braking_frames": self.trail_braking_frames,
+            "off_road_percent": self.off_road_frames / positioned * 100 if positioned else None,
+            "avg_centerline_distance": self.centerline_sum / positioned if positioned else None
+        }
+
+def append_frames(db: Session, session: DrivingSession, frames: np.ndarray, chunk_frames: Optional[int] = None):
+    """Store frames as compressed chunks and fold them into the session's features and time range.
+
+    The caller commits. Lock the session row first (SELECT ... FOR UPDATE) when
+    chunks of one session may arrive concurrently.
+    """
+    if not len(frames):
+        return
+    size = chunk_frames or len(frames)
+    rows = []
+    for seq, start in enumerate(range(0, len(frames), size), start=session.chunk_count or 0):
+        chunk = frames[start:start + size]
+        rows.append({
+            "session_id": session.id, "seq": seq, "frame_count": len(chunk),
+            "t_start": float(chunk["t"].min()), "t_end": float(chunk["t"].max()), "data": encode_chunk(chunk)
+        })
+    db.execute(insert(DrivingSessionChunk), rows)
+
+    accumulator = FeatureAccumulator.from_session(session)
+    accumulator.add(frames)
+    accumulator.save_to(session)
+    session.chunk_count = (session.chunk_count or 0) + len(rows)
+    t_min, t_max = float(frames["t"].min()), float(frames["t"].max())
+    session.t_start = t_min if session.t_start is None else min(session.t_start, t_min)
+    session.t_end = t_max if session.t_end is None else max(session.t_end, t_max)
+
+def load_frames(db: Session, session: DrivingSession, start: Optional[float] = None, end: Optional[float] = None) -> np.ndarray:
+    """Frames with session-relative time in [start, end] seconds, in time order.
+
+    Only chunks overlapping the window are read and decompressed, found through
+    ix_driving_session_chunks_session_id_t_start.
+    """
+    if session.t_start is None:
+        return np.empty(0, dtype=FRAME_DTYPE)
+    t_from = session.t_start + start * 1000 if start is not None else None
+    t_to = session.t_start + end * 1000 if end is not None else None
+
+    query = db.query(DrivingSessionChunk.data, DrivingSessionChunk.frame_count).filter(
+        DrivingSessionChunk.session_id == session.id
+    )
+    if t_from is not None:
+        query = query.filter(DrivingSessionChunk.t_end >= t_from)
+    if t_to is not None:
+        query = query.filter(DrivingSessionChunk.t_start <= t_to)
+    chunks = [decode_chunk(data, count) for data, count in query.order_by(DrivingSessionChunk.t_start, DrivingSessionChunk.seq)]
+    if not chunks:
+        return np.empty(0, dtype=FRAME_DTYPE)
+
+    frames = np.concatenate(chunks)
+    mask = np.ones(len(frames), dtype=bool)
+    if t_from is not None:
+        mask &= frames["t"] >= t_from
+    if t_to is not None:
+        mask &= frames["t"] <= t_to
+    frames = frames[mask]
+    return frames[np.argsort(frames["t"], kind="stable")]
+
+def columns(frames: np.ndarray) -> dict:
+    """Per-field lists, the columnar JSON format"""
+    return {field: frames[field].tolist() for field in FRAME_FIELDS}
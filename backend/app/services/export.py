@@ -0,0 +1,192 @@
+import csv
+import io
+import os
+import threading
+from typing import Iterator, Optional
+from uuid import UUID
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import DateTime, Float, Integer, String, cast, func, null, select, union_all
+from sqlalchemy.engine import Connection
+from ..database import dedicated_engine
+from ..models import Job, Scenario, Metric, ComputeMetric, ComputeMetricSummary, RiskAnalysis
+from .telemetry_service import COMPUTE_SERIES, COMPUTE_SUMMARY_STATS
+
+# Rows fetched per round trip of the server-side cursor; also the size of each Arrow batch / Parquet row group
+EXPORT_CHUNK_ROWS = int(os.getenv("EXPORT_CHUNK_ROWS", "20000"))
+# Exports the API streams at once; each holds a connection for the whole download
+EXPORT_CONCURRENCY = int(os.getenv("EXPORT_CONCURRENCY", "4"))
+
+# Downloads last as long as the client reads, so they get connections of their own instead of the API pool's
+export_engine = dedicated_engine(EXPORT_CONCURRENCY)
+export_slots = threading.BoundedSemaphore(EXPORT_CONCURRENCY)
+
+def acquire_export_slot():
+    """Take an export slot: a release function (safe to call twice), or None when all are taken"""
+    if not export_slots.acquire(blocking=False):
+        return None
+    lock = threading.Lock()
+    held = [True]
+
+    def release():
+        with lock:
+            if held:
+                held.pop()
+                export_slots.release()
+    return release
+
+# Export format -> (media type, file extension)
+FORMATS = {
+    "parquet": ("application/vnd.apache.parquet", "parquet"),
+    "arrow": ("application/vnd.apache.arrow.stream", "arrows"),
+    "csv": ("text/csv", "csv"),
+}
+
+def as_text(column, name: str):
+    """A UUID column cast to text in SQL; the driver would otherwise hand every row a uuid.UUID Arrow cannot take"""
+    return cast(column, String).label(name)
+
+def job_filters(
+    status: Optional[str] = None,
+    tier: Optional[str] = None,
+    weather: Optional[str] = None,
+    sweep_id: Optional[UUID] = None,
+    job_ids: Optional[list] = None
+) -> list:
+    """Predicates on Job selecting the jobs to export, with the filters of the job list"""
+    filters = []
+    if status:
+        filters.append(Job.status == status)
+    if tier:
+        filters.append(func.lower(Job.compute_tier) == tier.lower())
+    if weather:
+        filters.append(Job.scenario_id.in_(select(Scenario.id).where(Scenario.weather == weather)))
+    if sweep_id:
+        filters.append(Job.sweep_id == sweep_id)
+    if job_ids:
+        filters.append(Job.id.in_(job_ids))
+    return filters
+
+def of_jobs(job_id_column, filters: list) -> list:
+    """Restrict rows keyed by `job_id_column` to the filtered jobs"""
+    return [job_id_column.in_(select(Job.id).where(*filters))] if filters else []
+
+def jobs_export(filters: list):
+    """One row per job: its settings, scenario attributes and risk analysis (NULL until completed)"""
+    return select(
+        as_text(Job.id, "job_id"), Job.seq, as_text(Job.sweep_id, "sweep_id"), Job.status, Job.job_type,
+        Job.compute_tier, Job.epochs, Job.runtime_sec, Job.cost_estimate, Job.created_at, Job.started_at,
+        as_text(Job.scenario_id, "scenario_id"), Scenario.weather, Scenario.time_of_day, Scenario.traffic_density,
+        Scenario.road_type, Scenario.object_count, Scenario.dataset_size_mb,
+        RiskAnalysis.collision_probability, RiskAnalysis.pedestrian_risk, RiskAnalysis.visibility_risk,
+        RiskAnalysis.safety_score
+    ).join(Scenario, Scenario.id == Job.scenario_id).outerjoin(
+        RiskAnalysis, RiskAnalysis.job_id == Job.id
+    ).where(*filters).order_by(Job.created_at)
+
+def metrics_export(filters: list):
+    """Training metrics of the jobs, per job in epoch order"""
+    return select(
+        as_text(Metric.job_id, "job_id"), Metric.epoch, Metric.loss, Metric.accuracy, Metric.detection_score
+    ).where(*of_jobs(Metric.job_id, filters)).order_by(Metric.job_id, Metric.epoch)
+
+def compute_export(filters: list):
+    """Compute telemetry of the jobs, per job in time order; compacted rows have `samples` and the stats set"""
+    raw = select(
+        ComputeMetric.job_id, ComputeMetric.timestamp, *(getattr(ComputeMetric, name) for name in COMPUTE_SERIES),
+        null().cast(Integer).label("samples"), *(null().cast(Float).label(name) for name in COMPUTE_SUMMARY_STATS)
+    ).where(*of_jobs(ComputeMetric.job_id, filters))
+    summaries = select(
+        ComputeMetricSummary.job_id, ComputeMetricSummary.bucket_start.label("timestamp"),
+        *(getattr(ComputeMetricSummary, name) for name in COMPUTE_SERIES + ["samples"] + COMPUTE_SUMMARY_STATS)
+    ).where(*of_jobs(ComputeMetricSummary.job_id, filters))
+    # Both sides are ordered by their (job_id, timestamp) index, so the database can merge them as it streams
+    samples = union_all(summaries, raw).subquery("samples")
+    return select(
+        as_text(samples.c.job_id, "job_id"), *(column for column in samples.c if column.key != "job_id")
+    ).order_by(samples.c.job_id, samples.c.timestamp)
+
+# Exportable datasets: name -> query of the rows for a list of job_filters()
+DATASETS = {"jobs": jobs_export, "metrics": metrics_export, "compute": compute_export}
+
+def arrow_schema(stmt) -> pa.Schema:
+    """Arrow schema of the columns `stmt` selects"""
+    fields = []
+    for column in stmt.selected_columns:
+        if isinstance(column.type, DateTime):
+            arrow_type = pa.timestamp("us")
+        elif isinstance(column.type, Integer):
+            arrow_type = pa.int64()
+        elif isinstance(column.type, Float):
+            arrow_type = pa.float64()
+        else:
+            arrow_type = pa.string()
+        fields.append(pa.field(column.key, arrow_type))
+    return pa.schema(fields)
+
+def stream_rows(conn: Connection, stmt, chunk_rows: int) -> Iterator[list]:
+    """Rows of `stmt` as lists of plain tuples, fetched from a server-side cursor `chunk_rows` at a time"""
+    result = conn.execution_options(stream_results=True, yield_per=chunk_rows).execute(stmt)
+    yield from result.partitions()
+
+class ChunkSink:
+    """Write-only file object collecting what a writer produced since the last take()"""
+
+    closed = False
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self.chunks.append(data)
+        self.position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self.position
+
+    def flush(self):
+        pass
+
+    def take(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks.clear()
+        return data
+
+def csv_chunks(columns: list, chunks: Iterator[list]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    for chunk in chunks:
+        writer.writerows(chunk)
+        yield buffer.getvalue().encode()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue().encode()
+
+def arrow_chunks(schema: pa.Schema, chunks: Iterator[list], parquet: bool) -> Iterator[bytes]:
+    """An Arrow IPC stream or a Parquet file with one record batch / row group per chunk"""
+    sink = ChunkSink()
+    writer = pq.ParquetWriter(sink, schema) if parquet else pa.ipc.new_stream(sink, schema)
+    for chunk in chunks:
+        columns = zip(*chunk)
+        writer.write_batch(pa.RecordBatch.from_arrays(
+            [pa.array(values, type=field.type) for values, field in zip(columns, schema)], schema=schema
+        ))
+        yield sink.take()
+    writer.close()
+    yield sink.take()
+
+def export(conn: Connection, dataset: str, format: str, filters: list, chunk_rows: int = None) -> Iterator[bytes]:
+    """Stream a dataset of the filtered jobs as Parquet, an Arrow IPC stream or CSV.
+
+    Rows are read as tuples from a server-side cursor and encoded chunk by
+    chunk, so memory stays bounded by one chunk however many rows there are.
+    """
+    stmt = DATASETS[dataset](filters)
+    chunks = stream_rows(conn, stmt, chunk_rows or EXPORT_CHUNK_ROWS)
+    if format == "csv":
+        return csv_chunks([column.key for column in stmt.selected_columns], chunks)
+    return arrow_chunks(arrow_schema(stmt), chunks, parquet=format == "parquet")
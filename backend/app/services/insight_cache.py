@@ -0,0 +1,290 @@
+import asyncio
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Optional
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from ..database import SessionLocal
+from ..models import InsightCacheEntry
+
+# Cached insights older than this are regenerated (seconds, default 7 days)
+INSIGHT_CACHE_TTL = float(os.getenv("INSIGHT_CACHE_TTL", str(7 * 24 * 3600)))
+# Entries kept in the in-process LRU
+INSIGHT_CACHE_MEMORY_SIZE = int(os.getenv("INSIGHT_CACHE_MEMORY_SIZE", "1024"))
+# Rows kept in the insight_cache table; least recently used rows beyond this are evicted
+INSIGHT_CACHE_MAX_ROWS = int(os.getenv("INSIGHT_CACHE_MAX_ROWS", "100000"))
+# Significant digits kept when quantizing numeric prompt inputs
+INSIGHT_CACHE_DIGITS = int(os.getenv("INSIGHT_CACHE_DIGITS", "2"))
+
+# Pending hit counts are written back after this many hits or seconds
+HIT_FLUSH_COUNT = 50
+HIT_FLUSH_INTERVAL = 30
+# Table eviction runs once every this many stores
+EVICT_EVERY = 100
+
+def quantize(inputs: dict) -> dict:
+    """Round floats to INSIGHT_CACHE_DIGITS significant digits and normalize strings.
+
+    Prompts are built from the quantized values, so near-identical inputs (e.g.
+    accuracy 0.912 vs 0.914) share one cache entry and one cached answer.
+    """
+    quantized = {}
+    for name, value in inputs.items():
+        if isinstance(value, float):
+            value = float(f"{value:.{INSIGHT_CACHE_DIGITS}g}")
+        elif isinstance(value, str):
+            value = value.strip().lower()
+        quantized[name] = value
+    return quantized
+
+def cache_key(model: str, template: str, inputs: dict) -> str:
+    """Content address of a prompt: sha256 over model, versioned template name and inputs"""
+    payload = json.dumps({"model": model, "template": template, "inputs": inputs}, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+class InsightCache:
+    """Two-level cache of LLM insight texts: an in-process LRU over the insight_cache table.
+
+    Both levels honor INSIGHT_CACHE_TTL. Hits are counted per row (batched into
+    periodic UPDATEs), each regeneration bumps `generations`, and every row keeps
+    the latency and token usage of the request that produced it, so cache_stats()
+    can report hit rate and the time and tokens saved across all processes.
+    Concurrent async misses for the same key share a single request.
+    """
+
+    def __init__(self, memory_size: int = None, ttl: float = None):
+        self.memory_size = INSIGHT_CACHE_MEMORY_SIZE if memory_size is None else memory_size
+        self.ttl = INSIGHT_CACHE_TTL if ttl is None else ttl
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.pending_hits = {}
+        self.last_flush = time.monotonic()
+        self.stores = 0
+        self.inflight = {}
+
+    def _memory_get(self, key: str) -> Optional[str]:
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry is None:
+                return None
+            text, expires_at = entry
+            if expires_at < time.time():
+                del self.memory[key]
+                return None
+            self.memory.move_to_end(key)
+            return text
+
+    def _memory_put(self, key: str, text: str, created_at: datetime):
+        age = (datetime.utcnow() - created_at).total_seconds()
+        with self.lock:
+            self.memory[key] = (text, time.time() + self.ttl - age)
+            self.memory.move_to_end(key)
+            while len(self.memory) > self.memory_size:
+                self.memory.popitem(last=False)
+
+    def _record_hit(self, key: str) -> bool:
+        """Count a hit; True when pending hits are due to be flushed"""
+        with self.lock:
+            self.pending_hits[key] = self.pending_hits.get(key, 0) + 1
+            return (sum(self.pending_hits.values()) >= HIT_FLUSH_COUNT
+                    or time.monotonic() - self.last_flush >= HIT_FLUSH_INTERVAL)
+
+    def count_hits(self, keys: list):
+        """Count hits for keys served without a lookup, e.g. duplicates answered by one request"""
+        flush = False
+        for key in keys:
+            flush = self._record_hit(key) or flush
+        if flush:
+            self.flush_hits()
+
+    def lookup(self, key: str) -> Optional[str]:
+        """Cached text for a key, checking memory first, then the table"""
+        text = self._memory_get(key)
+        if text is None:
+            db = SessionLocal()
+            try:
+                entry = db.get(InsightCacheEntry, key)
+                if entry and entry.created_at >= datetime.utcnow() - timedelta(seconds=self.ttl):
+                    text = entry.insight_text
+                    self._memory_put(key, text, entry.created_at)
+            finally:
+                db.close()
+        if text is not None and self._record_hit(key):
+            self.flush_hits()
+        return text
+
+    def lookup_many(self, keys: list) -> dict:
+        """key -> cached text for every key that is cached, with one table query for the LRU misses"""
+        found = {}
+        for key in dict.fromkeys(keys):
+            text = self._memory_get(key)
+            if text is not None:
+                found[key] = text
+        remaining = [key for key in dict.fromkeys(keys) if key not in found]
+        if remaining:
+            db = SessionLocal()
+            try:
+                entries = db.query(InsightCacheEntry).filter(
+                    InsightCacheEntry.key.in_(remaining),
+                    InsightCacheEntry.created_at >= datetime.utcnow() - timedelta(seconds=self.ttl)
+                ).all()
+                for entry in entries:
+                    found[entry.key] = entry.insight_text
+                    self._memory_put(entry.key, entry.insight_text, entry.created_at)
+            finally:
+                db.close()
+
+        self.count_hits([key for key in keys if key in found])
+        return found
+
+    def store(self, key: str, model: str, template: str, text: str, latency_ms: float, total_tokens: int):
+        """Insert or refresh a cache row and put it in the LRU"""
+        self.store_many([(key, model, template, text, latency_ms, total_tokens)])
+
+    def store_many(self, entries: list):
+        """Insert or refresh (key, model, template, text, latency_ms, total_tokens) rows in one transaction"""
+        now = datetime.utcnow()
+        db = SessionLocal()
+        try:
+            existing = {
+                entry.key: entry for entry in
+                db.query(InsightCacheEntry).filter(InsightCacheEntry.key.in_([e[0] for e in entries])).all()
+            }
+            for key, model, template, text, latency_ms, total_tokens in entries:
+                entry = existing.get(key)
+                if entry:
+                    entry.insight_text = text
+                    entry.latency_ms = latency_ms
+                    entry.total_tokens = total_tokens
+                    entry.generations += 1
+                    entry.created_at = now
+                    entry.last_used_at = now
+                else:
+                    db.add(InsightCacheEntry(
+                        key=key, model=model, template=template, insight_text=text, latency_ms=latency_ms,
+                        total_tokens=total_tokens, hits=0, generations=1, created_at=now, last_used_at=now
+                    ))
+            db.commit()
+        except IntegrityError:
+            # Another process stored one of these keys first; its row is just as good
+            db.rollback()
+        finally:
+            db.close()
+        for key, _, _, text, _, _ in entries:
+            self._memory_put(key, text, now)
+
+        with self.lock:
+            evict = self.stores // EVICT_EVERY != (self.stores + len(entries)) // EVICT_EVERY
+            self.stores += len(entries)
+        if evict:
+            self.evict()
+        self.flush_hits()
+
+    def flush_hits(self):
+        """Write pending hit counts and last-used times back to the table"""
+        with self.lock:
+            pending, self.pending_hits = self.pending_hits, {}
+            self.last_flush = time.monotonic()
+        if not pending:
+            return
+        table = InsightCacheEntry.__table__
+        db = SessionLocal()
+        try:
+            db.connection().execute(
+                update(table).where(table.c.key == bindparam("cache_key")).values(
+                    hits=table.c.hits + bindparam("new_hits"), last_used_at=bindparam("used_at")
+                ),
+                [{"cache_key": key, "new_hits": hits, "used_at": datetime.utcnow()} for key, hits in pending.items()]
+            )
+            db.commit()
+        finally:
+            db.close()
+
+    def evict(self):
+        """Drop expired rows and the least recently used rows beyond INSIGHT_CACHE_MAX_ROWS"""
+        table = InsightCacheEntry.__table__
+        db = SessionLocal()
+        try:
+            db.execute(delete(table).where(table.c.created_at < datetime.utcnow() - timedelta(seconds=self.ttl)))
+            cutoff = db.execute(
+                select(table.c.last_used_at).order_by(table.c.last_used_at.desc()).offset(INSIGHT_CACHE_MAX_ROWS).limit(1)
+            ).scalar()
+            if cutoff is not None:
+                db.execute(delete(table).where(table.c.last_used_at <= cutoff))
+            db.commit()
+        finally:
+            db.close()
+
+    def get_or_generate(self, model: str, template: str, inputs: dict, generate) -> str:
+        """Cached text, or call `generate()` -> (text, total_tokens) and cache its result"""
+        key = cache_key(model, template, inputs)
+        text = self.lookup(key)
+        if text is not None:
+            return text
+        start = time.perf_counter()
+        text, total_tokens = generate()
+        self.store(key, model, template, text, (time.perf_counter() - start) * 1000, total_tokens)
+        return text
+
+    async def aget_or_generate(self, model: str, template: str, inputs: dict, generate) -> str:
+        """Async get_or_generate; `generate()` returns an awaitable of (text, total_tokens)"""
+        key = cache_key(model, template, inputs)
+        text = await asyncio.to_thread(self.lookup, key)
+        if text is not None:
+            return text
+
+        # Identical prompts in flight (e.g. a sweep) wait for the first request
+        inflight = self.inflight.get(key)
+        if inflight is not None:
+            text = await asyncio.shield(inflight)
+            if self._record_hit(key):
+                await asyncio.to_thread(self.flush_hits)
+            return text
+        future = asyncio.get_running_loop().create_future()
+        self.inflight[key] = future
+        try:
+            start = time.perf_counter()
+            text, total_tokens = await generate()
+            await asyncio.to_thread(
+                self.store, key, model, template, text, (time.perf_counter() - start) * 1000, total_tokens
+            )
+            future.set_result(text)
+            return text
+        except Exception as e:
+            future.set_exception(e)
+            # Nobody may be waiting; keep asyncio from warning about an unretrieved exception
+            future.exception()
+            raise
+        finally:
+            if not future.done():
+                future.cancel()
+            del self.inflight[key]
+
+def cache_stats() -> dict:
+    """Hit/miss totals and savings over every row of the insight_cache table"""
+    db = SessionLocal()
+    try:
+        entries, hits, misses, saved_ms, saved_tokens = db.query(
+            func.count(InsightCacheEntry.key),
+            func.coalesce(func.sum(InsightCacheEntry.hits), 0),
+            func.coalesce(func.sum(InsightCacheEntry.generations), 0),
+            func.coalesce(func.sum(InsightCacheEntry.hits * InsightCacheEntry.latency_ms), 0.0),
+            func.coalesce(func.sum(InsightCacheEntry.hits * InsightCacheEntry.total_tokens), 0)
+        ).one()
+    finally:
+        db.close()
+    return {
+        "entries": entries,
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": round(hits / (hits + misses), 4) if hits + misses else 0.0,
+        "saved_seconds": round(saved_ms / 1000, 2),
+        "saved_tokens": saved_tokens
+    }
+
+insight_cache = InsightCache()
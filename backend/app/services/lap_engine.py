@@ -0,0 +1,178 @@
+import threading
+import numpy as np
+from .track_maps import TrackMap
+from .driving_telemetry import (
+    FRAME_DTYPE, FRAME_RATE, SURFACE_ROAD, SURFACE_GRASS,
+    INPUT_UP, INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT, INPUT_BOOST
+)
+
+# Car physics of InteractiveDriving.jsx (CONFIG), applied once per rendered frame
+ACCEL = 0.13
+BRAKE = 0.35
+FRICTION_ROAD = 0.98
+FRICTION_GRASS = 0.90
+TURN_SPEED = 0.05
+MAX_SPEED = 8.0
+# The browser steps physics at requestAnimationFrame rate and logs every 6th frame
+PHYSICS_RATE = 60
+SAMPLE_EVERY = PHYSICS_RATE // FRAME_RATE
+# Laps shorter than this are not counted (the browser's finish-line debounce, seconds)
+MIN_LAP_SEC = 1.0
+# Speed above which time on grass counts as off track, as in the browser's session stats
+OFF_TRACK_MIN_SPEED = 1.0
+# AI drivers only brake for corners above this speed
+BRAKE_MIN_SPEED = 2.0
+# Cars that have not finished after this many seconds per lap are stopped
+LAP_TIMEOUT_SEC = 120
+# Steps between checks of the `interrupted` event (one simulated second)
+INTERRUPT_CHECK_STEPS = PHYSICS_RATE
+
+# Ranges AI driver parameters are drawn from, one set per car
+TARGET_SPEED = (4.0, MAX_SPEED)   # speed to hold on straights
+BRAKE_ANGLE = (0.3, 1.0)          # heading error (rad) above which the driver brakes
+BOOST_ANGLE = (0.0, 0.2)          # heading error below which the driver boosts
+REACH_RADIUS = (40.0, 80.0)       # distance at which a waypoint counts as reached
+
+def wrap_angle(angle: np.ndarray) -> np.ndarray:
+    return (angle + np.pi) % (2 * np.pi) - np.pi
+
+def crosses(x0, y0, x1, y1, line: np.ndarray) -> np.ndarray:
+    """Whether each move (x0, y0) -> (x1, y1) intersects a segment, like the browser's intersect()"""
+    (x3, y3), (x4, y4) = line
+    den = (y4 - y3) * (x1 - x0) - (x4 - x3) * (y1 - y0)
+    safe = np.where(den == 0, 1.0, den)
+    ua = ((x4 - x3) * (y0 - y3) - (y4 - y3) * (x0 - x3)) / safe
+    ub = ((x1 - x0) * (y0 - y3) - (y1 - y0) * (x0 - x3)) / safe
+    return (den != 0) & (ua >= 0) & (ua <= 1) & (ub >= 0) & (ub <= 1)
+
+# Cars start in this many slots, 50 px apart behind the start position like the browser's rivals
+GRID_SLOTS = 4
+
+def driver_params(cars: int, rng: np.random.Generator) -> dict:
+    """Random AI driver parameters and grid slots for `cars` cars"""
+    return {
+        "target_speed": rng.uniform(*TARGET_SPEED, cars),
+        "brake_angle": rng.uniform(*BRAKE_ANGLE, cars),
+        "boost_angle": rng.uniform(*BOOST_ANGLE, cars),
+        "reach_radius": rng.uniform(*REACH_RADIUS, cars),
+        "grid": np.arange(cars) % GRID_SLOTS
+    }
+
+def select_cars(params: dict, cars) -> dict:
+    """Parameters of a subset of cars, e.g. to re-run one driver with telemetry"""
+    return {name: values[cars] for name, values in params.items()}
+
+def simulate_laps(
+    track: TrackMap,
+    params: dict,
+    laps: int,
+    record: bool = False,
+    interrupted: threading.Event = None
+) -> dict:
+    """Race one AI driver per entry of `params` for `laps` laps, all cars stepped in lockstep as arrays.
+
+    Every car uses the player's physics from the browser (acceleration, braking,
+    surface friction, speed cap, steering) at PHYSICS_RATE steps per second;
+    only the inputs come from a waypoint-following driver. Cars do not interact,
+    so a car's run depends only on its own parameters. Laps are timed at
+    finish-line crossings as in the browser. Returns per-car lap times (NaN for
+    laps not completed) and off-track frames, plus 10 Hz telemetry of every
+    car when `record` is set. Returns None if `interrupted` is set while racing.
+    """
+    if not track.lappable:
+        raise ValueError(f"Map {track.key} cannot be raced (waypoints or finish line missing)")
+    cars = len(params["target_speed"])
+    waypoints = track.waypoints
+    max_steps = int(laps * LAP_TIMEOUT_SEC * PHYSICS_RATE)
+
+    x = np.full(cars, float(track.start["x"])) - 50 * params["grid"]
+    y = np.full(cars, float(track.start["y"]))
+    angle = np.full(cars, float(track.start.get("angle", 0.0)))
+    speed = np.zeros(cars)
+    target = np.zeros(cars, dtype=int)
+
+    last_cross = np.full(cars, -1)
+    laps_done = np.zeros(cars, dtype=int)
+    lap_times = np.full((cars, laps), np.nan)
+    off_track = np.zeros(cars, dtype=int)
+    active = np.ones(cars, dtype=bool)
+
+    samples = max_steps // SAMPLE_EVERY + 1
+    if record:
+        telemetry = {name: np.zeros((samples, cars), dtype=FRAME_DTYPE[name]) for name in ("x", "y", "speed", "angle", "surface", "input")}
+    recorded = 0
+    car_samples = np.zeros(cars, dtype=int)
+
+    for step in range(max_steps):
+        if not active.any():
+            break
+        if interrupted is not None and step % INTERRUPT_CHECK_STEPS == 0 and interrupted.is_set():
+            return None
+
+        # Driver: steer towards the current waypoint, brake when far off heading
+        wp = waypoints[target]
+        dx, dy = wp[:, 0] - x, wp[:, 1] - y
+        diff = wrap_angle(np.arctan2(dy, dx) - angle)
+        left = diff < -TURN_SPEED / 2
+        right = diff > TURN_SPEED / 2
+        down = (np.abs(diff) > params["brake_angle"]) & (speed > BRAKE_MIN_SPEED)
+        up = ~down & (speed < params["target_speed"])
+        boost = up & (np.abs(diff) < params["boost_angle"])
+        reached = dx * dx + dy * dy < params["reach_radius"] ** 2
+        target = np.where(reached, (target + 1) % len(waypoints), target)
+
+        # Physics: surface under the car, then speed, steering and position
+        road = track.on_road(x, y)
+        off_track += active & ~road & (np.abs(speed) > OFF_TRACK_MIN_SPEED)
+        speed = speed + ACCEL * up - BRAKE * down + 2 * ACCEL * boost
+        speed = np.clip(speed * np.where(road, FRICTION_ROAD, FRICTION_GRASS), -MAX_SPEED, MAX_SPEED)
+        moving = np.abs(speed) > 0.1
+        angle = angle + TURN_SPEED * np.sign(speed) * (right.astype(int) - left) * moving
+        x0, y0 = x, y
+        x = (x + np.cos(angle) * speed) % track.width
+        y = (y + np.sin(angle) * speed) % track.height
+
+        if record and step % SAMPLE_EVERY == 0:
+            telemetry["x"][recorded] = x
+            telemetry["y"][recorded] = y
+            telemetry["speed"][recorded] = speed
+            telemetry["angle"][recorded] = angle
+            telemetry["surface"][recorded] = np.where(road, SURFACE_ROAD, SURFACE_GRASS)
+            telemetry["input"][recorded] = (INPUT_UP * up | INPUT_DOWN * down | INPUT_LEFT * left
+                                            | INPUT_RIGHT * right | INPUT_BOOST * boost)
+            recorded += 1
+            car_samples += active
+
+        # Lap timing; wrapping across a canvas edge is not a crossing
+        cross = active & crosses(x0, y0, x, y, track.finish_line) & (np.abs(x - x0) < track.width / 2) & (np.abs(y - y0) < track.height / 2)
+        first = cross & (last_cross < 0)
+        lap = cross & ~first & ((step - last_cross) >= MIN_LAP_SEC * PHYSICS_RATE)
+        cars_lapped = np.flatnonzero(lap)
+        lap_times[cars_lapped, laps_done[cars_lapped]] = (step - last_cross[cars_lapped]) / PHYSICS_RATE
+        laps_done += lap
+        last_cross = np.where(first | lap, step, last_cross)
+        active &= laps_done < laps
+
+    result = {
+        "lap_times": lap_times,
+        "laps": laps_done,
+        "best_lap": np.nanmin(np.where(laps_done[:, None] > 0, lap_times, np.inf), axis=1),
+        "total_time": np.where(laps_done >= laps, np.nansum(lap_times, axis=1), np.nan),
+        "off_track_frames": off_track,
+        "steps": step + 1
+    }
+    result["best_lap"][np.isinf(result["best_lap"])] = np.nan
+    if record:
+        result["telemetry"] = {name: values[:recorded] for name, values in telemetry.items()}
+        result["samples"] = car_samples
+    return result
+
+def car_frames(result: dict, car: int = 0, t0: float = 0.0) -> np.ndarray:
+    """Recorded telemetry of one car as FRAME_DTYPE frames, `t` in ms from t0"""
+    telemetry = result["telemetry"]
+    n = int(result["samples"][car])
+    frames = np.zeros(n, dtype=FRAME_DTYPE)
+    frames["t"] = t0 + np.arange(n) * 1000 / FRAME_RATE
+    for name, values in telemetry.items():
+        frames[name] = values[:n, car]
+    return frames
@@ -1,20 +1,73 @@
-from openai import OpenAI
+from openai import OpenAI, AsyncOpenAI, APIConnectionError, RateLimitError, InternalServerError
+from .insight_cache import insight_cache, quantize, cache_key
+from ..instrumentation import OPENAI_LATENCY
+import asyncio
 import os
 import json
+import random
+import time
 
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
+# Job insights use the async client; retries are handled by complete_chat below
+INSIGHT_MODEL = os.getenv("OPENAI_MODEL", "gpt-3.5-turbo")
+# Seconds allowed for one completion request before it is abandoned and retried
+OPENAI_TIMEOUT = float(os.getenv("OPENAI_TIMEOUT", "20"))
+OPENAI_MAX_RETRIES = int(os.getenv("OPENAI_MAX_RETRIES", "3"))
+# Base delay (seconds) of the exponential backoff between retries
+OPENAI_BACKOFF = float(os.getenv("OPENAI_BACKOFF", "0.5"))
+
+async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"), timeout=OPENAI_TIMEOUT, max_retries=0)
+
+# Bump a template's version whenever its prompt text changes, so cached answers to the old prompt are not reused
+PROMPT_VERSIONS = {"scenario": 1, "performance": 1, "safety": 1}
+
+def template_name(template: str) -> str:
+    return f"{template}@v{PROMPT_VERSIONS[template]}"
+
+# Connection errors include timeouts; 429 and 5xx responses are worth another try
+RETRYABLE_ERRORS = (APIConnectionError, RateLimitError, InternalServerError, asyncio.TimeoutError)
+
+async def complete_chat(
+    system: str,
+    prompt: str,
+    max_tokens: int = 150,
+    temperature: float = 0.7,
+    response_format: dict = None
+) -> tuple:
+    """One chat completion with a hard per-call timeout and jittered exponential backoff on transient errors.
+
+    Returns (text, total_tokens).
+    """
+    extra = {"response_format": response_format} if response_format else {}
+    for attempt in range(OPENAI_MAX_RETRIES + 1):
+        try:
+            with OPENAI_LATENCY.labels("insights").time():
+                response = await asyncio.wait_for(
+                    async_client.chat.completions.create(
+                        model=INSIGHT_MODEL,
+                        messages=[
+                            {"role": "system", "content": system},
+                            {"role": "user", "content": prompt}
+                        ],
+                        max_tokens=max_tokens,
+                        temperature=temperature,
+                        **extra
+                    ),
+                    OPENAI_TIMEOUT
+                )
+            return response.choices[0].message.content.strip(), response.usage.total_tokens if response.usage else 0
+        except RETRYABLE_ERRORS:
+            if attempt == OPENAI_MAX_RETRIES:
+                raise
+            await asyncio.sleep(OPENAI_BACKOFF * 2 ** attempt * random.uniform(0.5, 1.5))
+
 def analyze_driving_session(frames: list[dict]) -> dict:
     """Analyze telemetry frames and return structured coaching advice"""
-    if not frames:
-        return {
-            "safety_score": 0,
-            "aggression_score": 0,
-            "analysis_text": "No data recorded.",
-            "coach_tip": "Drive some distance to get analysis."
-        }
+    return coach_driving(driving_features(frames))
 
-    # 1. Feature Extraction
+def driving_features(frames: list[dict]) -> dict:
+    """Session features from a list of frame dicts (see services.driving_telemetry for the columnar path)"""
     max_speed = 0.0
     grass_frames = 0
     brake_while_turning_frames = 0
@@ -36,19 +89,40 @@ def analyze_driving_session(frames: list[dict]) -> dict:
         if is_turning and is_braking and s > 5.0:
             brake_while_turning_frames += 1
     
-    avg_speed = total_speed / len(frames)
-    grass_percent = (grass_frames / len(frames)) * 100
-    
-    # 2. Construct Prompt
+    return {
+        "frames": len(frames),
+        "duration_sec": len(frames) / 10,
+        "max_speed": max_speed,
+        "avg_speed": total_speed / len(frames) if frames else 0.0,
+        "grass_percent": (grass_frames / len(frames)) * 100 if frames else 0.0,
+        "trail_braking_frames": brake_while_turning_frames
+    }
+
+def coach_driving(features: dict) -> dict:
+    """Structured coaching advice for a session's features"""
+    if not features["frames"]:
+        return {
+            "safety_score": 0,
+            "aggression_score": 0,
+            "analysis_text": "No data recorded.",
+            "coach_tip": "Drive some distance to get analysis."
+        }
+
+    positional = ""
+    if features.get("off_road_percent") is not None:
+        positional = f"""- Time outside the track limits: {features['off_road_percent']:.1f}%
+    - Avg distance from the track centerline: {features['avg_centerline_distance']:.1f} px
+    """
+
     prompt = f"""Analyze this human driving telemetry data and act as a professional racing coach.
     
     Stats:
-    - Duration: {len(frames) / 10:.1f} sec
-    - Max Speed: {max_speed:.1f} (Game Units ~ km/h)
-    - Avg Speed: {avg_speed:.1f}
-    - Time on Grass (Off-track): {grass_percent:.1f}%
-    - Trail Braking events (Brake+Turn): {brake_while_turning_frames} frames
-    
+    - Duration: {features['duration_sec']:.1f} sec
+    - Max Speed: {features['max_speed']:.1f} (Game Units ~ km/h)
+    - Avg Speed: {features['avg_speed']:.1f}
+    - Time on Grass (Off-track): {features['grass_percent']:.1f}%
+    - Trail Braking events (Brake+Turn): {features['trail_braking_frames']} frames
+    {positional}
     Provide a response in JSON format with:
     - safety_score (0-100)
     - aggression_score (0-100)
@@ -57,16 +131,17 @@ def analyze_driving_session(frames: list[dict]) -> dict:
     """
 
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are a racing instructor. Return JSON only."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"},
-            max_tokens=200,
-            temperature=0.7
-        )
+        with OPENAI_LATENCY.labels("coach").time():
+            response = client.chat.completions.create(
+                model="gpt-3.5-turbo",
+                messages=[
+                    {"role": "system", "content": "You are a racing instructor. Return JSON only."},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format={"type": "json_object"},
+                max_tokens=200,
+                temperature=0.7
+            )
         content = response.choices[0].message.content
         return json.loads(content)
     except Exception as e:
@@ -79,9 +154,8 @@ def analyze_driving_session(frames: list[dict]) -> dict:
             "coach_tip": "Check API Key configuration."
         }
 
-def generate_scenario_insight(scenario_data: dict) -> str:
-    """Generate AI insights about a scenario's risk factors"""
-    prompt = f"""Analyze this autonomous driving test scenario and provide engineering insights about potential risks and challenges:
+def scenario_prompt(scenario_data: dict) -> str:
+    return f"""Analyze this autonomous driving test scenario and provide engineering insights about potential risks and challenges:
 
 Weather: {scenario_data.get('weather')}
 Time of Day: {scenario_data.get('time_of_day')}
@@ -94,23 +168,30 @@ Provide a brief technical analysis (2-3 sentences) covering:
 2. Perception challenges the AI model will face
 3. Safety considerations"""
 
+def generate_scenario_insight(scenario_data: dict) -> str:
+    """Generate AI insights about a scenario's risk factors"""
+    scenario_data = quantize(scenario_data)
+
+    def generate():
+        with OPENAI_LATENCY.labels("scenario").time():
+            response = client.chat.completions.create(
+                model=INSIGHT_MODEL,
+                messages=[
+                    {"role": "system", "content": "You are an AI safety engineer analyzing autonomous driving scenarios."},
+                    {"role": "user", "content": scenario_prompt(scenario_data)}
+                ],
+                max_tokens=150,
+                temperature=0.7
+            )
+        return response.choices[0].message.content.strip(), response.usage.total_tokens if response.usage else 0
+
     try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an AI safety engineer analyzing autonomous driving scenarios."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=150,
-            temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
+        return insight_cache.get_or_generate(INSIGHT_MODEL, template_name("scenario"), scenario_data, generate)
     except Exception as e:
         return f"Insight generation unavailable: {str(e)}"
 
-def generate_performance_insight(job_data: dict, metrics_data: dict) -> str:
-    """Generate AI insights about training performance"""
-    prompt = f"""Analyze this AI training job performance and provide engineering recommendations:
+def performance_prompt(job_data: dict, metrics_data: dict) -> str:
+    return f"""Analyze this AI training job performance and provide engineering recommendations:
 
 Compute Tier: {job_data.get('compute_tier')}
 Epochs: {job_data.get('epochs')}
@@ -127,23 +208,8 @@ Provide a brief technical analysis (2-3 sentences) covering:
 2. Compute resource utilization
 3. Recommendations for improvement"""
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an ML engineer analyzing autonomous driving model training."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=150,
-            temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"Insight generation unavailable: {str(e)}"
-
-def generate_safety_insight(risk_data: dict, scenario_data: dict) -> str:
-    """Generate AI insights about safety risks"""
-    prompt = f"""Analyze these autonomous driving safety metrics and provide risk assessment:
+def safety_prompt(risk_data: dict, scenario_data: dict) -> str:
+    return f"""Analyze these autonomous driving safety metrics and provide risk assessment:
 
 Collision Probability: {risk_data.get('collision_probability', 0):.2%}
 Pedestrian Risk: {risk_data.get('pedestrian_risk', 0):.2%}
@@ -160,16 +226,144 @@ Provide a brief safety analysis (2-3 sentences) covering:
 2. Risk mitigation strategies
 3. Validation recommendations"""
 
-    try:
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"role": "system", "content": "You are an autonomous vehicle safety analyst."},
-                {"role": "user", "content": prompt}
-            ],
-            max_tokens=150,
-            temperature=0.7
-        )
-        return response.choices[0].message.content.strip()
-    except Exception as e:
-        return f"Insight generation unavailable: {str(e)}"
+SYSTEM_PROMPTS = {
+    "performance": "You are an ML engineer analyzing autonomous driving model training.",
+    "safety": "You are an autonomous vehicle safety analyst."
+}
+
+# Output tokens budgeted per insight in a batched request
+BATCH_TOKENS_PER_INSIGHT = 120
+BATCH_MAX_TOKENS = 4096
+
+def job_insight_requests(job_data: dict, metrics_data: dict, risk_data: dict, scenario_data: dict) -> list:
+    """(template, cache inputs, prompt) of a job's performance and safety insight, built from quantized inputs"""
+    job_data, metrics_data = quantize(job_data), quantize(metrics_data)
+    risk_data, scenario_data = quantize(risk_data), quantize(scenario_data)
+    return [
+        ("performance", {"job": job_data, "metrics": metrics_data}, performance_prompt(job_data, metrics_data)),
+        ("safety", {"risk": risk_data, "scenario": scenario_data}, safety_prompt(risk_data, scenario_data))
+    ]
+
+async def cached_insight(template: str, inputs: dict, prompt: str) -> str:
+    """One insight through the cache; errors propagate, so only generated text is ever cached or stored"""
+    return await insight_cache.aget_or_generate(
+        INSIGHT_MODEL, template_name(template), inputs,
+        lambda: complete_chat(SYSTEM_PROMPTS[template], prompt)
+    )
+
+async def generate_performance_insight(job_data: dict, metrics_data: dict) -> str:
+    """Generate AI insights about training performance"""
+    job_data, metrics_data = quantize(job_data), quantize(metrics_data)
+    return await cached_insight(
+        "performance", {"job": job_data, "metrics": metrics_data}, performance_prompt(job_data, metrics_data)
+    )
+
+async def generate_safety_insight(risk_data: dict, scenario_data: dict) -> str:
+    """Generate AI insights about safety risks"""
+    risk_data, scenario_data = quantize(risk_data), quantize(scenario_data)
+    return await cached_insight(
+        "safety", {"risk": risk_data, "scenario": scenario_data}, safety_prompt(risk_data, scenario_data)
+    )
+
+async def generate_job_insights(job_data: dict, metrics_data: dict, risk_data: dict, scenario_data: dict) -> list:
+    """Performance and safety insight of a job, requested concurrently; raises if either fails"""
+    return list(await asyncio.gather(
+        generate_performance_insight(job_data, metrics_data),
+        generate_safety_insight(risk_data, scenario_data)
+    ))
+
+def batch_prompt(prompts: dict) -> str:
+    requests = [{"id": request_id, "request": prompt} for request_id, prompt in prompts.items()]
+    return f"""You will answer several independent analysis requests. Answer each one exactly as if it had been asked on its own.
+
+Return a JSON object {{"insights": [{{"id": "<request id>", "text": "<answer>"}}]}} with one entry per request.
+
+Requests:
+{json.dumps(requests)}"""
+
+def parse_batch_answer(content: str, request_ids) -> dict:
+    """request id -> text for every well-formed entry of a batched answer; ValueError if the JSON is unusable"""
+    data = json.loads(content)
+    entries = data.get("insights") if isinstance(data, dict) else None
+    if not isinstance(entries, list):
+        raise ValueError("batched answer has no insights list")
+    answers = {}
+    for entry in entries:
+        if not isinstance(entry, dict):
+            continue
+        request_id, text = str(entry.get("id")), entry.get("text")
+        if request_id in request_ids and isinstance(text, str) and text.strip():
+            answers[request_id] = text.strip()
+    return answers
+
+async def generate_batch_insights(payloads: list) -> list:
+    """Insights for many jobs with one chat completion; returns one [performance, safety] list per payload.
+
+    A job whose insights could not all be generated gets None instead.
+
+    Each payload holds generate_job_insights' arguments. Cached insights are
+    served from the cache, identical prompts are asked once, and the rest go
+    out as a single JSON-mode request whose answers are split back per job
+    and cached individually. Anything the answer is missing, or all of it if
+    the request fails or the JSON cannot be parsed, falls back to per-insight
+    requests.
+    """
+    requests = [job_insight_requests(**payload) for payload in payloads]
+    keys = [[cache_key(INSIGHT_MODEL, template_name(template), inputs) for template, inputs, _ in job]
+            for job in requests]
+    cached = await asyncio.to_thread(insight_cache.lookup_many, [key for job in keys for key in job])
+
+    # Uncached prompts, deduplicated by cache key; repeats count as cache hits
+    missing, repeats = {}, []
+    for job, job_keys in zip(requests, keys):
+        for request, key in zip(job, job_keys):
+            if key in cached:
+                continue
+            if key in missing:
+                repeats.append(key)
+            else:
+                missing[key] = request
+
+    answers = {}
+    if missing:
+        request_ids = {str(i): key for i, key in enumerate(missing)}
+        prompts = {request_id: missing[key][2] for request_id, key in request_ids.items()}
+        start = time.perf_counter()
+        try:
+            content, total_tokens = await complete_chat(
+                "You are an ML engineer and autonomous vehicle safety analyst. Return JSON only.",
+                batch_prompt(prompts),
+                max_tokens=min(BATCH_MAX_TOKENS, BATCH_TOKENS_PER_INSIGHT * len(prompts)),
+                response_format={"type": "json_object"}
+            )
+            try:
+                parsed = parse_batch_answer(content, request_ids)
+            except ValueError as e:
+                print(f"Unparseable batched insight answer ({e}), falling back to single requests")
+                parsed = {}
+            answers = {request_ids[request_id]: text for request_id, text in parsed.items()}
+            if answers:
+                # The batch's latency and tokens are attributed evenly to its insights
+                share = len(answers)
+                latency_ms = (time.perf_counter() - start) * 1000 / share
+                entries = [(key, INSIGHT_MODEL, template_name(missing[key][0]), text, latency_ms, total_tokens // share)
+                           for key, text in answers.items()]
+                await asyncio.to_thread(insight_cache.store_many, entries)
+        except Exception as e:
+            # A failed batch is no verdict on its prompts: each one is retried on its own below
+            print(f"Batched insight request failed ({str(e) or type(e).__name__}), falling back to single requests")
+            answers = {}
+
+        fallback = [key for key in missing if key not in answers]
+        if fallback:
+            texts = await asyncio.gather(*(cached_insight(*missing[key]) for key in fallback), return_exceptions=True)
+            for key, text in zip(fallback, texts):
+                if isinstance(text, Exception):
+                    print(f"Failed to generate a {missing[key][0]} insight: {str(text) or type(text).__name__}")
+                else:
+                    answers[key] = text
+        if repeats:
+            await asyncio.to_thread(insight_cache.count_hits, repeats)
+
+    texts = [[cached.get(key) or answers.get(key) for key in job_keys] for job_keys in keys]
+    return [None if None in job else job for job in texts]
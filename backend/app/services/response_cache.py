@@ -0,0 +1,124 @@
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional
+from uuid import UUID
+from fastapi import Request, Response
+from pydantic import TypeAdapter
+
+# Serialized job responses kept in the in-process LRU
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "1024"))
+# Cache-Control max-age of completed-job data (seconds, default 1 day)
+RESPONSE_CACHE_MAX_AGE = int(os.getenv("RESPONSE_CACHE_MAX_AGE", str(24 * 3600)))
+
+def etag_of(body: bytes) -> str:
+    """Strong validator of a response body"""
+    return f'"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match lists `etag` (or is *)"""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = [tag.strip() for tag in header.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+class ResponseCache:
+    """LRU of serialized responses of completed jobs, keyed by job id and request URL.
+
+    Each entry keeps its body, headers and the Unix time it expires at. All
+    entries of a job are dropped when a request finds the job still running.
+    """
+
+    def __init__(self, size: int = None):
+        self.size = RESPONSE_CACHE_SIZE if size is None else size
+        self.entries = OrderedDict()
+        self.job_urls = {}
+        self.lock = threading.Lock()
+
+    def get(self, job_id: UUID, url: str) -> Optional[tuple]:
+        with self.lock:
+            entry = self.entries.get((job_id, url))
+            if entry is None:
+                return None
+            if entry[2] <= time.time():
+                self._remove(job_id, url)
+                return None
+            self.entries.move_to_end((job_id, url))
+            return entry
+
+    def put(self, job_id: UUID, url: str, body: bytes, headers: dict, expires_at: float):
+        if self.size <= 0:
+            return
+        with self.lock:
+            self.entries[(job_id, url)] = (body, headers, expires_at)
+            self.entries.move_to_end((job_id, url))
+            self.job_urls.setdefault(job_id, set()).add(url)
+            while len(self.entries) > self.size:
+                (old_job_id, old_url), _ = self.entries.popitem(last=False)
+                self._remove(old_job_id, old_url)
+
+    def invalidate(self, job_id: UUID):
+        with self.lock:
+            for url in self.job_urls.pop(job_id, ()):
+                self.entries.pop((job_id, url), None)
+
+    def _remove(self, job_id: UUID, url: str):
+        self.entries.pop((job_id, url), None)
+        urls = self.job_urls.get(job_id)
+        if urls is not None:
+            urls.discard(url)
+            if not urls:
+                del self.job_urls[job_id]
+
+response_cache = ResponseCache()
+
+def request_url(request: Request) -> str:
+    return f"{request.url.path}?{request.url.query}"
+
+def conditional_response(request: Request, body: bytes, headers: dict, cache_control: str) -> Response:
+    """200 with `body`, or 304 when the client already holds this ETag"""
+    headers = {**headers, "Cache-Control": cache_control}
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    return Response(body, media_type="application/json", headers=headers)
+
+def cached_response(request: Request, job_id: UUID) -> Optional[Response]:
+    """Response to `request` from the cache, without touching the database; None on a miss"""
+    entry = response_cache.get(job_id, request_url(request))
+    if entry is None:
+        return None
+    body, headers, expires_at = entry
+    return conditional_response(request, body, headers, f"max-age={int(expires_at - time.time())}")
+
+def job_response(
+    request: Request,
+    job_id: UUID,
+    content,
+    adapter: TypeAdapter,
+    completed: bool,
+    final: bool = True,
+    expires_at: Optional[float] = None,
+    headers: Optional[dict] = None,
+    exclude_none: bool = False
+) -> Response:
+    """Serialize a job resource once and tag it with an ETag.
+
+    Data of `completed` jobs no longer changes, so it is cached here and by
+    clients for RESPONSE_CACHE_MAX_AGE, or until `expires_at` (Unix time) when
+    it changes later on; pass `final=False` for data still being added after
+    completion. Anything else must be revalidated on every use, and a job that
+    is not completed has its cache entries dropped.
+    """
+    body = adapter.dump_json(adapter.validate_python(content, from_attributes=True), exclude_none=exclude_none)
+    headers = {**(headers or {}), "ETag": etag_of(body)}
+    now = time.time()
+    expires_at = min(now + RESPONSE_CACHE_MAX_AGE, float("inf") if expires_at is None else expires_at)
+    if not completed:
+        response_cache.invalidate(job_id)
+    if not (completed and final) or expires_at <= now:
+        return conditional_response(request, body, headers, "no-cache")
+    response_cache.put(job_id, request_url(request), body, headers, expires_at)
+    return conditional_response(request, body, headers, f"max-age={int(expires_at - now)}")
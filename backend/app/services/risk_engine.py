@@ -0,0 +1,79 @@
+from functools import lru_cache
+from typing import Optional
+import numpy as np
+
+# Environmental risk per weather / time of day; unknown values use the defaults
+WEATHER_RISK = {"sunny": 0.1, "rain": 0.4, "fog": 0.7, "snow": 0.8}
+TIME_RISK = {"day": 0.2, "night": 0.5, "dawn": 0.4, "dusk": 0.4}
+DEFAULT_WEATHER_RISK = 0.3
+DEFAULT_TIME_RISK = 0.3
+
+# Upper bound for any single risk probability
+MAX_RISK = 0.95
+
+@lru_cache(maxsize=4096)
+def scenario_factors(weather: str, time_of_day: str, traffic_density: float) -> tuple:
+    """Base (collision, pedestrian, visibility) risk of a scenario before model performance is applied"""
+    weather_risk = WEATHER_RISK.get(weather.lower(), DEFAULT_WEATHER_RISK)
+    time_risk = TIME_RISK.get(time_of_day.lower(), DEFAULT_TIME_RISK)
+    traffic_risk = traffic_density * 0.5
+
+    # Base environmental risks (higher for dangerous conditions)
+    base_collision = (weather_risk * 0.5 + traffic_risk * 0.7) * 0.8
+    base_pedestrian = (time_risk * 0.6 + weather_risk * 0.5 + traffic_risk * 0.3) * 0.7
+    base_visibility = weather_risk * 0.9
+    return base_collision, base_pedestrian, base_visibility
+
+def evaluate_risk_batch(
+    weather,
+    time_of_day,
+    traffic_density,
+    accuracy,
+    detection_score,
+    noise: float = 0.0,
+    seed: Optional[int] = None
+) -> dict:
+    """Score many (scenario, accuracy, detection score) candidates in one vectorized pass.
+
+    Scenario factors come from the cached per-scenario table, so repeated
+    scenarios cost a dict lookup. With `noise` > 0, accuracy and detection score
+    are perturbed by Gaussian noise of that standard deviation drawn from a
+    Generator seeded with `seed`; the same inputs and seed always give the same
+    scores. Returns arrays of shape (candidates,).
+    """
+    factors = np.array(
+        [scenario_factors(w, t, float(d)) for w, t, d in zip(weather, time_of_day, traffic_density)],
+        dtype=float
+    ).reshape(-1, 3)
+    accuracy = np.asarray(accuracy, dtype=float)
+    detection_score = np.asarray(detection_score, dtype=float)
+    if noise > 0:
+        rng = np.random.default_rng(seed)
+        accuracy = np.clip(accuracy + rng.normal(0, noise, accuracy.shape), 0, 1)
+        detection_score = np.clip(detection_score + rng.normal(0, noise, detection_score.shape), 0, 1)
+
+    # Model performance reduces risk, but not completely (dangerous is still dangerous)
+    collision_prob = np.minimum(MAX_RISK, factors[:, 0] * (1 - accuracy * 0.3))
+    pedestrian_risk = np.minimum(MAX_RISK, factors[:, 1] * (1 - detection_score * 0.35))
+    visibility_risk = np.minimum(MAX_RISK, factors[:, 2] * (1 - accuracy * 0.25))
+
+    # Safety score: 0-100 where lower is more dangerous
+    avg_risk = (collision_prob + pedestrian_risk + visibility_risk) / 3
+    safety_score = np.clip((1 - avg_risk) * 100, 0, 100)
+
+    return {
+        "collision_probability": collision_prob.round(4),
+        "pedestrian_risk": pedestrian_risk.round(4),
+        "visibility_risk": visibility_risk.round(4),
+        "safety_score": safety_score.round(2)
+    }
+
+def evaluate_risk(weather: str, time_of_day: str, traffic_density: float, accuracy: float, detection_score: float) -> dict:
+    """Safety risk of one scenario given the model's final accuracy and detection score"""
+    scores = evaluate_risk_batch([weather], [time_of_day], [traffic_density], [accuracy], [detection_score])
+    return {name: float(values[0]) for name, values in scores.items()}
+
+def batch_records(scores: dict) -> list:
+    """Turn the column arrays of evaluate_risk_batch into one dict per candidate"""
+    names = list(scores)
+    return [dict(zip(names, row)) for row in zip(*(scores[name].tolist() for name in names))]
@@ -0,0 +1,70 @@
+import numpy as np
+
+# GPU utilization range (%) per compute tier
+TIER_UTILIZATION = {
+    "small": (60, 75),
+    "medium": (75, 90),
+    "large": (85, 95)
+}
+DEFAULT_UTILIZATION = (70, 85)
+
+def simulate_batch(epochs, compute_tiers, rng) -> dict:
+    """Synthesize training curves and compute telemetry for a batch of jobs in one pass.
+
+    Jobs may have different epoch counts; every array has shape (jobs, max_epochs)
+    and `mask` marks the epochs that exist for each job. Values follow the same
+    curves the live simulation has always produced: exponential loss decay,
+    saturating accuracy, detection derived from accuracy, and tier-dependent GPU
+    utilization. Pass a seeded Generator for reproducible results, or a list of
+    one Generator per job so each job's values do not depend on its batch.
+    """
+    epochs = np.asarray(epochs, dtype=int)
+    jobs, max_epochs = len(epochs), int(epochs.max()) if len(epochs) else 0
+    epoch = np.broadcast_to(np.arange(1, max_epochs + 1), (jobs, max_epochs))
+    shape = (jobs, max_epochs)
+
+    # Uniform [0, 1) draws of the six per-epoch series and of the runtime, scaled below
+    if isinstance(rng, np.random.Generator):
+        unit = [rng.random(shape) for _ in range(6)]
+        unit_runtime = rng.random(jobs)
+    else:
+        unit = np.zeros((6,) + shape)
+        unit_runtime = np.empty(jobs)
+        for j, (job_rng, n) in enumerate(zip(rng, epochs)):
+            for series in range(6):
+                unit[series, j, :n] = job_rng.random(n)
+            unit_runtime[j] = job_rng.random()
+
+    def uniform(low, high, draws):
+        return low + (high - low) * draws
+
+    loss = 2.5 * np.exp(-0.15 * epoch) + uniform(-0.05, 0.05, unit[0])
+    accuracy = np.minimum(0.98, 0.5 + 0.5 * (1 - np.exp(-0.2 * epoch))) + uniform(-0.02, 0.02, unit[1])
+    detection_score = np.minimum(0.95, accuracy * 0.9 + uniform(0, 0.1, unit[2]))
+
+    gpu_range = np.array([TIER_UTILIZATION.get(tier.lower(), DEFAULT_UTILIZATION) for tier in compute_tiers], dtype=float)
+    gpu_utilization = uniform(gpu_range[:, :1], gpu_range[:, 1:], unit[3])
+    vram_usage = uniform(50, 95, unit[4])
+    cpu_usage = uniform(30, 60, unit[5])
+
+    # Job runtime: 10-30 seconds regardless of epochs
+    total_runtime = uniform(10, 30, unit_runtime)
+
+    return {
+        "epoch": epoch,
+        "mask": epoch <= epochs[:, None],
+        "loss": loss.round(4),
+        "accuracy": accuracy.round(4),
+        "detection_score": detection_score.round(4),
+        "gpu_utilization": gpu_utilization.round(2),
+        "vram_usage": vram_usage.round(2),
+        "cpu_usage": cpu_usage.round(2),
+        "total_runtime": total_runtime,
+        "time_per_epoch": total_runtime / np.maximum(epochs, 1)
+    }
+
+def final_values(batch: dict, epochs) -> dict:
+    """Last-epoch loss/accuracy/detection per job, shape (jobs,)"""
+    rows = np.arange(len(epochs))
+    last = np.asarray(epochs, dtype=int) - 1
+    return {name: batch[name][rows, last] for name in ("loss", "accuracy", "detection_score")}
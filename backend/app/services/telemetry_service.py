@@ -0,0 +1,165 @@
+from datetime import datetime
+from typing import Optional
+from uuid import UUID
+import numpy as np
+from sqlalchemy import select, or_, true, null, type_coerce, union_all, Float, Integer, String
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import aliased
+from ..models import Job, Metric, ComputeMetric, ComputeMetricSummary
+from .downsample import lttb_indices
+
+# Upper bound for a single page of metrics or telemetry
+MAX_PAGE_SIZE = 10000
+# Upper bound for `points` on downsampled series
+MAX_POINTS = 5000
+# Columns the queries below order their rows by, for with_job
+METRICS_ORDER = ["epoch"]
+COMPUTE_METRICS_ORDER = ["timestamp", "id"]
+# Compute telemetry series, and the extra statistics compacted summaries keep of each
+COMPUTE_SERIES = ["gpu_utilization", "vram_usage", "cpu_usage"]
+COMPUTE_SUMMARY_STATS = [f"{name}_{stat}" for name in COMPUTE_SERIES for stat in ("min", "max", "p95")]
+
+def metrics_query(job_id: UUID, since_epoch: Optional[int] = None, limit: Optional[int] = None):
+    """Training metrics of a job in epoch order, optionally only those after `since_epoch`.
+
+    Epochs are unique per job, so `since_epoch` doubles as the keyset cursor and
+    the query is a range scan on ix_metrics_job_id_epoch.
+    """
+    stmt = select(Metric).where(Metric.job_id == job_id)
+    if since_epoch is not None:
+        stmt = stmt.where(Metric.epoch > since_epoch)
+    stmt = stmt.order_by(Metric.epoch)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def keyset_after(timestamp_column, id_column, since: Optional[datetime], after_id: Optional[UUID]) -> list:
+    """Predicates selecting rows after the (`since`, `after_id`) keyset cursor, or after `since` alone"""
+    if since is not None and after_id is not None:
+        return [timestamp_column >= since, or_(timestamp_column > since, id_column > after_id)]
+    if since is not None:
+        return [timestamp_column > since]
+    return []
+
+def compute_metrics_query(
+    job_id: UUID,
+    since: Optional[datetime] = None,
+    limit: Optional[int] = None,
+    after_id: Optional[UUID] = None,
+    summary_stats: bool = True
+):
+    """Compute telemetry of a job in (timestamp, id) order, optionally only samples after `since`.
+
+    With `after_id`, samples sharing the `since` timestamp but ordered after that
+    id are included too, which makes (timestamp, id) a gap-free keyset cursor.
+    The predicate is written as a range on timestamp so it stays a scan of
+    ix_compute_metrics_job_id_timestamp.
+
+    Samples past the raw retention period only exist as compacted summaries (see
+    app.compaction). Those are merged in as rows timestamped at their bucket
+    start, with the bucket means as values and the sample count and per-series
+    min/max/p95 filled in (unless `summary_stats` is off); raw samples leave
+    these NULL. Each side is ordered and limited on its own index before the merge.
+    """
+    stats = ["samples", *COMPUTE_SUMMARY_STATS] if summary_stats else []
+    raw = select(
+        ComputeMetric.id, ComputeMetric.job_id, ComputeMetric.timestamp,
+        *(getattr(ComputeMetric, name) for name in COMPUTE_SERIES),
+        *(null().cast(Integer if name == "samples" else Float).label(name) for name in stats)
+    ).where(ComputeMetric.job_id == job_id, *keyset_after(ComputeMetric.timestamp, ComputeMetric.id, since, after_id))
+    summaries = select(
+        ComputeMetricSummary.id, ComputeMetricSummary.job_id, ComputeMetricSummary.bucket_start.label("timestamp"),
+        *(getattr(ComputeMetricSummary, name) for name in COMPUTE_SERIES + stats)
+    ).where(
+        ComputeMetricSummary.job_id == job_id,
+        *keyset_after(ComputeMetricSummary.bucket_start, ComputeMetricSummary.id, since, after_id)
+    )
+    if limit is not None:
+        raw = select(raw.order_by(ComputeMetric.timestamp, ComputeMetric.id).limit(limit).subquery())
+        summaries = select(
+            summaries.order_by(ComputeMetricSummary.bucket_start, ComputeMetricSummary.id).limit(limit).subquery()
+        )
+
+    samples = union_all(summaries, raw).subquery("samples")
+    stmt = select(samples).order_by(samples.c.timestamp, samples.c.id)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+def encode_compute_cursor(timestamp: datetime, sample_id: UUID) -> str:
+    return f"{timestamp.isoformat()}|{sample_id}"
+
+def decode_compute_cursor(cursor: str):
+    """Inverse of encode_compute_cursor; raises ValueError on malformed input"""
+    timestamp, _, sample_id = cursor.partition("|")
+    return datetime.fromisoformat(timestamp), UUID(sample_id)
+
+def with_job(stmt, job_id: UUID, order_by: list, entity=None):
+    """Rows of `stmt` outer-joined onto the job's row, so a single round trip also reads the job's status.
+
+    Each row is (job status, row of `stmt`): no rows at all means there is no such
+    job, a single row without data means the job has none yet. `order_by` names
+    the columns of `stmt` to keep the rows in; pass the ORM `entity` that `stmt`
+    selects to get instances instead of columns.
+    """
+    page = stmt.subquery()
+    rows = aliased(entity, page) if entity is not None else page
+    return (
+        select(Job.status.label("job_status"), rows).select_from(Job).outerjoin(page, true())
+        .where(Job.id == job_id).order_by(*(page.c[key] for key in order_by))
+    )
+
+async def job_rows(db: AsyncSession, stmt, job_id: UUID, order_by: list, entity=None) -> Optional[tuple]:
+    """(job status, instances of `entity` selected by `stmt`), or None when the job does not exist.
+
+    Without `entity` the rows come back as dicts of the selected columns, which
+    response models validate much faster than Row objects.
+    """
+    rows = (await db.execute(with_job(stmt, job_id, order_by, entity))).all()
+    if not rows:
+        return None
+    if entity is not None:
+        return rows[0][0], [row[1] for row in rows if row[1] is not None]
+    keys = list(stmt.selected_columns.keys())
+    return rows[0][0], [dict(zip(keys, row[1:])) for row in rows if row[1] is not None]
+
+async def downsampled_series(db: AsyncSession, stmt, job_id: UUID, order_by: list, points: int) -> Optional[tuple]:
+    """Execute a metrics/compute query and keep the `points` rows that best preserve every series.
+
+    `stmt` selects the id, the x column and the series, in that order. All rows
+    are read as plain tuples of just those columns and reduced with NumPy; only
+    the kept rows are turned into dicts. Ids are read as raw strings and job_id
+    is filled in afterwards instead of building UUIDs for rows that are mostly
+    discarded. Returns (job status, rows), or None when the job does not exist.
+    """
+    rows = (await db.execute(with_job(stmt, job_id, order_by))).all()
+    if not rows:
+        return None
+    status = rows[0][0]
+    rows = [row[1:] for row in rows if row[1] is not None]
+    if not rows:
+        return status, []
+
+    keys = [column.key for column in stmt.selected_columns]
+    ids, x, *ys = zip(*rows)
+    if len(rows) > points:
+        if isinstance(x[0], datetime):
+            x = [value.timestamp() for value in x]
+        kept = lttb_indices(np.array(x, dtype=float), np.array(ys, dtype=float), points)
+        rows = [rows[i] for i in kept]
+    return status, [{"job_id": job_id, **dict(zip(keys, row))} for row in rows]
+
+async def downsampled_metrics(db: AsyncSession, job_id: UUID, points: int, since_epoch: Optional[int] = None) -> Optional[tuple]:
+    """Training metrics reduced to at most `points` rows with LTTB over epochs"""
+    stmt = metrics_query(job_id, since_epoch).with_only_columns(
+        type_coerce(Metric.id, String).label("id"), Metric.epoch, Metric.loss, Metric.accuracy, Metric.detection_score
+    )
+    return await downsampled_series(db, stmt, job_id, METRICS_ORDER, points)
+
+async def downsampled_compute_metrics(db: AsyncSession, job_id: UUID, points: int, since: Optional[datetime] = None) -> Optional[tuple]:
+    """Compute telemetry, raw and compacted alike, reduced to at most `points` rows with LTTB over sample time"""
+    samples = compute_metrics_query(job_id, since, summary_stats=False).subquery()
+    stmt = select(
+        type_coerce(samples.c.id, String).label("id"), samples.c.timestamp, *(samples.c[name] for name in COMPUTE_SERIES)
+    )
+    return await downsampled_series(db, stmt, job_id, COMPUTE_METRICS_ORDER, points)
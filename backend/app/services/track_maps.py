@@ -0,0 +1,207 @@
+import json
+import os
+from functools import cached_property, lru_cache
+from pathlib import Path
+import numpy as np
+
+# Exported from frontend/src/lib/maps.js with `npm run export-maps`
+MAPS_PATH = Path(__file__).resolve().parent.parent / "data" / "maps.json"
+
+# Points per ellipse and per cubic bezier when flattening road strokes
+ELLIPSE_STEPS = 128
+BEZIER_STEPS = 16
+
+# Cell size (canvas px) of the precomputed surface grids; lookups are exact up to about one cell
+TRACK_GRID_CELL = float(os.getenv("TRACK_GRID_CELL", "2"))
+# Grid rows evaluated at once while building, bounding memory to rows x columns x segments
+GRID_BUILD_ROWS = 16
+
+@lru_cache(maxsize=1)
+def load_maps() -> dict:
+    with open(MAPS_PATH) as f:
+        return json.load(f)
+
+def map_keys() -> list:
+    return list(load_maps()["maps"])
+
+def flatten_path(commands: list) -> list:
+    """Polylines (lists of points) of canvas-style M/L/C path commands"""
+    polylines, current = [], []
+    for command in commands:
+        op, args = command[0], command[1:]
+        if op == "M":
+            if len(current) > 1:
+                polylines.append(current)
+            current = [tuple(args)]
+        elif op == "L":
+            current.append(tuple(args))
+        elif op == "C":
+            p0 = np.array(current[-1], dtype=float)
+            p1, p2, p3 = (np.array(args[i:i + 2], dtype=float) for i in (0, 2, 4))
+            t = np.linspace(0, 1, BEZIER_STEPS + 1)[1:, None]
+            points = (1 - t) ** 3 * p0 + 3 * (1 - t) ** 2 * t * p1 + 3 * (1 - t) * t ** 2 * p2 + t ** 3 * p3
+            current.extend(map(tuple, points))
+        else:
+            raise ValueError(f"Unsupported path command {op}")
+    if len(current) > 1:
+        polylines.append(current)
+    return polylines
+
+class TrackMap:
+    """Geometry of one preset map: start, finish line, waypoints and the drivable road.
+
+    The road is the union of thick polyline strokes (ellipses and paths are
+    flattened) and filled rects, matching what the map's draw() paints.
+    """
+
+    def __init__(self, key: str, data: dict, canvas: dict):
+        self.key = key
+        self.name = data["name"]
+        self.width = canvas["width"]
+        self.height = canvas["height"]
+        self.start = data["start"]
+        finish = data.get("finishLine")
+        self.finish_line = None if finish is None else np.array(
+            [[finish["x1"], finish["y1"]], [finish["x2"], finish["y2"]]], dtype=float
+        )
+        self.waypoints = np.array([[wp["x"], wp["y"]] for wp in data.get("waypoints", [])], dtype=float).reshape(-1, 2)
+
+        starts, ends, half_widths, rects = [], [], [], []
+        for shape in data.get("road", []):
+            if shape["type"] == "rect":
+                rects.append([shape["x"], shape["y"], shape["x"] + shape["w"], shape["y"] + shape["h"]])
+                continue
+            if shape["type"] == "ellipse":
+                theta = np.linspace(0, 2 * np.pi, ELLIPSE_STEPS + 1)
+                polylines = [list(zip(shape["cx"] + shape["rx"] * np.cos(theta), shape["cy"] + shape["ry"] * np.sin(theta)))]
+            elif shape["type"] == "path":
+                polylines = flatten_path(shape["commands"])
+            else:
+                raise ValueError(f"Unsupported road shape {shape['type']}")
+            for polyline in polylines:
+                points = np.array(polyline, dtype=float)
+                starts.append(points[:-1])
+                ends.append(points[1:])
+                half_widths.append(np.full(len(points) - 1, shape["width"] / 2))
+        self.segment_starts = np.concatenate(starts) if starts else np.empty((0, 2))
+        self.segment_ends = np.concatenate(ends) if ends else np.empty((0, 2))
+        self.half_widths = np.concatenate(half_widths) if half_widths else np.empty(0)
+        self.rects = np.array(rects, dtype=float).reshape(-1, 4)
+
+        # Centerline: stroke centers plus each rect's long midline, inset by half its width
+        x0, y0, x1, y1 = self.rects.T
+        half = np.minimum(x1 - x0, y1 - y0) / 2
+        horizontal = (x1 - x0) >= (y1 - y0)
+        cx, cy = (x0 + x1) / 2, (y0 + y1) / 2
+        rect_starts = np.stack([np.where(horizontal, x0 + half, cx), np.where(horizontal, cy, y0 + half)], axis=1)
+        rect_ends = np.stack([np.where(horizontal, x1 - half, cx), np.where(horizontal, cy, y1 - half)], axis=1)
+        self.centerline_starts = np.concatenate([self.segment_starts, rect_starts])
+        self.centerline_ends = np.concatenate([self.segment_ends, rect_ends])
+
+    @property
+    def lappable(self) -> bool:
+        """True when AI drivers can race it: a finish line to time laps and waypoints to follow.
+
+        Cars wrap around the canvas edges, so waypoints outside it are unreachable.
+        """
+        inside = ((self.waypoints >= 0) & (self.waypoints <= [self.width, self.height])).all()
+        return len(self.waypoints) > 0 and self.finish_line is not None and bool(inside)
+
+    def exact_distances(self, x: np.ndarray, y: np.ndarray):
+        """(signed distance to the road edge, distance to the centerline) per position, O(segments) each.
+
+        The signed distance is negative on the road: the minimum over strokes of
+        distance-to-segment minus half the stroke width, and over rects of the
+        box distance. Positions on no road shape get +inf / the canvas diagonal.
+        """
+        x = np.asarray(x, dtype=float)[:, None]
+        y = np.asarray(y, dtype=float)[:, None]
+        signed = np.full(x.shape[0], np.inf)
+        if len(self.rects):
+            r = self.rects
+            dx = np.abs(x - (r[:, 0] + r[:, 2]) / 2) - (r[:, 2] - r[:, 0]) / 2
+            dy = np.abs(y - (r[:, 1] + r[:, 3]) / 2) - (r[:, 3] - r[:, 1]) / 2
+            outside = np.hypot(np.maximum(dx, 0), np.maximum(dy, 0))
+            signed = np.minimum(signed, (outside + np.minimum(np.maximum(dx, dy), 0)).min(axis=1))
+        if not len(self.centerline_starts):
+            return signed, np.full(x.shape[0], float(np.hypot(self.width, self.height)))
+        # Stroke segments come first among the centerline segments
+        distances = segment_distance(x, y, self.centerline_starts, self.centerline_ends)
+        strokes = len(self.half_widths)
+        if strokes:
+            signed = np.minimum(signed, (distances[:, :strokes] - self.half_widths).min(axis=1))
+        return signed, distances.min(axis=1)
+
+    def on_road_exact(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Whether each position is on the road, from the geometry itself"""
+        return self.exact_distances(x, y)[0] <= 0
+
+    @cached_property
+    def grids(self) -> dict:
+        """Occupancy, signed distance and centerline distance sampled at cell centers, built once per map"""
+        cell = TRACK_GRID_CELL
+        columns, rows = int(np.ceil(self.width / cell)), int(np.ceil(self.height / cell))
+        xs = (np.arange(columns) + 0.5) * cell
+        signed = np.empty((rows, columns), dtype=np.float32)
+        centerline = np.empty((rows, columns), dtype=np.float32)
+        for row in range(0, rows, GRID_BUILD_ROWS):
+            ys = (np.arange(row, min(row + GRID_BUILD_ROWS, rows)) + 0.5) * cell
+            gx, gy = np.meshgrid(xs, ys)
+            d, c = self.exact_distances(gx.ravel(), gy.ravel())
+            signed[row:row + len(ys)] = d.reshape(len(ys), columns)
+            centerline[row:row + len(ys)] = c.reshape(len(ys), columns)
+        return {"cell": cell, "occupancy": signed <= 0, "signed": signed, "centerline": centerline}
+
+    def _cells(self, x, y):
+        grids = self.grids
+        rows, columns = grids["occupancy"].shape
+        col = np.clip((np.asarray(x) / grids["cell"]).astype(int), 0, columns - 1)
+        row = np.clip((np.asarray(y) / grids["cell"]).astype(int), 0, rows - 1)
+        return row, col
+
+    def _interpolate(self, grid: np.ndarray, x, y) -> np.ndarray:
+        """Bilinear interpolation between cell centers, clamped at the canvas edges"""
+        cell = self.grids["cell"]
+        rows, columns = grid.shape
+        gx = np.clip(np.asarray(x, dtype=float) / cell - 0.5, 0, columns - 1)
+        gy = np.clip(np.asarray(y, dtype=float) / cell - 0.5, 0, rows - 1)
+        c0 = np.minimum(gx.astype(int), columns - 2) if columns > 1 else np.zeros_like(gx, dtype=int)
+        r0 = np.minimum(gy.astype(int), rows - 2) if rows > 1 else np.zeros_like(gy, dtype=int)
+        fx, fy = gx - c0, gy - r0
+        c1, r1 = np.minimum(c0 + 1, columns - 1), np.minimum(r0 + 1, rows - 1)
+        top = grid[r0, c0] * (1 - fx) + grid[r0, c1] * fx
+        bottom = grid[r1, c0] * (1 - fx) + grid[r1, c1] * fx
+        return top * (1 - fy) + bottom * fy
+
+    def on_road(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Whether each position is on the road: one occupancy grid lookup per position"""
+        row, col = self._cells(x, y)
+        return self.grids["occupancy"][row, col]
+
+    def road_distance(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Signed distance (px) to the road edge, negative on the road"""
+        return self._interpolate(self.grids["signed"], x, y)
+
+    def centerline_distance(self, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+        """Distance (px) to the nearest road centerline"""
+        return self._interpolate(self.grids["centerline"], x, y)
+
+def segment_distance(x: np.ndarray, y: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    """Distance from each position (column vectors x, y) to each segment, shape (positions, segments)"""
+    a, d = starts, ends - starts
+    length2 = np.maximum((d ** 2).sum(axis=1), 1e-12)
+    t = np.clip(((x - a[:, 0]) * d[:, 0] + (y - a[:, 1]) * d[:, 1]) / length2, 0, 1)
+    return np.hypot(x - a[:, 0] - t * d[:, 0], y - a[:, 1] - t * d[:, 1])
+
+@lru_cache(maxsize=None)
+def get_map(key: str) -> TrackMap:
+    """TrackMap of a preset; raises KeyError for unknown maps"""
+    data = load_maps()
+    return TrackMap(key, data["maps"][key], data["canvas"])
+
+def find_map(key) -> "TrackMap | None":
+    """TrackMap of a preset, or None for custom (browser-only) and unknown maps"""
+    try:
+        return get_map(key) if key else None
+    except KeyError:
+        return None
@@ -0,0 +1,126 @@
+import os
+
+# Pool settings are read when app.database is first imported: use the WORKER_DB_* ones (workers inherit it)
+os.environ.setdefault("DB_POOL_ROLE", "worker")
+
+import multiprocessing
+import signal
+import time
+from app.compaction import start_compactor
+from app.database import SessionLocal
+from app.insight_stage import release_insights
+from app.models import Job
+from app.worker import WORKER_DRAIN_TIMEOUT, WORKER_LEASE_SEC, reap_stale_jobs, requeue_jobs, worker_id, worker_loop
+
+# Worker processes in the pool; defaults to one per CPU
+WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES") or os.cpu_count() or 1)
+# Seconds a draining worker gets beyond WORKER_DRAIN_TIMEOUT before it is killed
+KILL_GRACE = 5
+# Seconds between checks for dead workers
+CHECK_INTERVAL = 1.0
+
+def run_worker(index: int, processes: int):
+    """Entry point of a pool process; Ctrl+C reaches the supervisor, which drains the pool with SIGTERM"""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    worker_loop(index, processes)
+
+class Supervisor:
+    """Runs a pool of worker processes, each claiming its shard of the tier limits.
+
+    A worker that dies is restarted and the jobs it held are requeued right
+    away instead of waiting for their leases to expire; the supervisor also
+    reaps stale leases left by workers on other hosts and compacts old compute
+    telemetry (see app.compaction). SIGTERM or SIGINT
+    drains every worker, then kills those still running after the drain
+    timeout and requeues their jobs.
+    """
+
+    def __init__(self, processes: int = None):
+        self.processes = WORKER_PROCESSES if processes is None else processes
+        # Spawned (not forked) so no process inherits the parent's database connections
+        self.context = multiprocessing.get_context("spawn")
+        self.workers = {}
+        self.stopping = False
+        self.compactor = None
+
+    def start_worker(self, index: int):
+        process = self.context.Process(target=run_worker, args=(index, self.processes), name=f"worker-{index}")
+        process.start()
+        self.workers[index] = process
+
+    def release(self, process) -> list:
+        """Requeue the running jobs of a worker process that is gone and release its pending insights"""
+        worker = worker_id(process.pid)
+        db = SessionLocal()
+        try:
+            job_ids = [row[0] for row in db.query(Job.id).filter(Job.status == "running", Job.worker_id == worker)]
+            requeued = requeue_jobs(db, job_ids, worker=worker)
+            release_insights(db, worker)
+        finally:
+            db.close()
+        if requeued:
+            print(f"Requeued {len(requeued)} jobs of worker {worker}")
+        return requeued
+
+    def reap(self):
+        db = SessionLocal()
+        try:
+            requeued = reap_stale_jobs(db)
+        finally:
+            db.close()
+        if requeued:
+            print(f"Requeued {len(requeued)} jobs with expired leases")
+
+    def request_stop(self, signum, frame):
+        self.stopping = True
+
+    def run(self):
+        signal.signal(signal.SIGTERM, self.request_stop)
+        signal.signal(signal.SIGINT, self.request_stop)
+        for index in range(self.processes):
+            self.start_worker(index)
+        print(f"Supervisor started {self.processes} worker processes")
+        self.compactor = start_compactor()
+
+        next_reap = time.monotonic()
+        while not self.stopping:
+            try:
+                for index, process in list(self.workers.items()):
+                    if not process.is_alive():
+                        print(f"Worker {index + 1} (pid {process.pid}) exited with code {process.exitcode}, restarting")
+                        self.release(process)
+                        self.start_worker(index)
+                if time.monotonic() >= next_reap:
+                    self.reap()
+                    next_reap = time.monotonic() + WORKER_LEASE_SEC / 3
+            except Exception as e:
+                print(f"Supervisor error: {e}")
+            time.sleep(CHECK_INTERVAL)
+        self.shutdown()
+
+    def shutdown(self):
+        """Drain every worker with SIGTERM, kill the ones that outlive the drain and requeue their jobs"""
+        print(f"Supervisor draining {len(self.workers)} workers...")
+        if self.compactor is not None:
+            self.compactor.stop()
+        for process in self.workers.values():
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + WORKER_DRAIN_TIMEOUT + KILL_GRACE
+        for process in self.workers.values():
+            process.join(max(0.0, deadline - time.monotonic()))
+        for index, process in self.workers.items():
+            if process.is_alive():
+                print(f"Worker {index + 1} (pid {process.pid}) did not drain in time, killing it")
+                process.kill()
+                process.join()
+            try:
+                self.release(process)
+            except Exception as e:
+                print(f"Could not requeue the jobs of worker {index + 1}: {e}")
+        print("Supervisor stopped")
+
+if __name__ == "__main__":
+    print("Initializing worker supervisor...")
+    time.sleep(5)  # Wait for database to be ready
+    Supervisor().run()
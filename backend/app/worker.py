@@ -1,192 +1,703 @@
+import os
+
+# Pool settings are read when app.database is first imported: use the WORKER_DB_* ones
+os.environ.setdefault("DB_POOL_ROLE", "worker")
+
 import time
-import random
-import math
-from sqlalchemy.orm import Session
+import signal
+import socket
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+import numpy as np
+from sqlalchemy import and_, delete, func, insert, or_, select, update
+from sqlalchemy.orm import Session, joinedload
+from prometheus_client import start_http_server
 from app.database import SessionLocal, engine
-from app.models import Job, Metric, ComputeMetric, RiskAnalysis, Insight, Base
-from app.services.openai_service import generate_performance_insight, generate_safety_insight
-import os
+from app.instrumentation import JOB_STAGE_LATENCY, JOB_WAIT, WORKER_RUNNING_JOBS
+from app.models import Job, Metric, ComputeMetric, RiskAnalysis, Insight, LapResult, DrivingSession, Base
+from app.compaction import start_compactor
+from app.job_events import JobListener, supports_notify
+from app.insight_stage import InsightStage, insight_payload, insights_enabled
+from app.metrics_writer import JobInterrupted, MetricsWriter, still_leased
+from app.services.analytics import add_to_rollups, rollup_entry
+from app.services.simulation import simulate_batch, final_values
+from app.services.risk_engine import evaluate_risk, evaluate_risk_batch
+from app.services.track_maps import get_map
+from app.services.lap_engine import simulate_laps, driver_params, select_cars, car_frames
+from app.services.driving_telemetry import CHUNK_FRAMES, append_frames
 
 # Create tables if they don't exist
 Base.metadata.create_all(bind=engine)
 
-def simulate_job(job: Job, db: Session):
-    """Simulate a training job with realistic metrics"""
+def parse_tier_limits(raw: str) -> dict:
+    """Parse "small=4,medium=2,large=1" into a tier -> max concurrent jobs map"""
+    limits = {}
+    for part in raw.split(","):
+        if "=" not in part:
+            continue
+        tier, value = part.split("=", 1)
+        limits[tier.strip().lower()] = max(1, int(value))
+    return limits
+
+# Concurrency limits per compute tier; tiers not listed share DEFAULT_TIER_CONCURRENCY
+TIER_CONCURRENCY = parse_tier_limits(os.getenv("WORKER_TIER_CONCURRENCY", "small=4,medium=2,large=1"))
+DEFAULT_TIER_CONCURRENCY = int(os.getenv("WORKER_DEFAULT_CONCURRENCY", "2"))
+POLL_INTERVAL = float(os.getenv("WORKER_POLL_INTERVAL", "2"))
+# When LISTEN/NOTIFY wakes the worker, polling only recovers missed notifications
+FALLBACK_POLL_INTERVAL = float(os.getenv("WORKER_FALLBACK_POLL_INTERVAL", "30"))
+
+# Scales the simulated wall-clock time of a job (1.0 = real time, 0 = no sleeping)
+SIMULATION_TIME_SCALE = float(os.getenv("SIMULATION_TIME_SCALE", "1.0"))
+
+# Fast-forward jobs are claimed and simulated this many at a time
+FAST_FORWARD_BATCH = int(os.getenv("WORKER_FAST_FORWARD_BATCH", "500"))
+# Seed of simulated job values, combined with each job's number so a rerun reproduces the job
+# whatever batch it runs in; unset means fresh randomness
+SIMULATION_SEED = int(os.environ["SIMULATION_SEED"]) if os.getenv("SIMULATION_SEED") else None
+
+# Running jobs whose lease is not renewed for this long are requeued (seconds); leases are renewed every third of it
+WORKER_LEASE_SEC = float(os.getenv("WORKER_LEASE_SEC", "60"))
+# A job whose worker died this many times is marked failed instead of requeued again
+WORKER_MAX_ATTEMPTS = int(os.getenv("WORKER_MAX_ATTEMPTS", "3"))
+# On SIGTERM, in-flight jobs get this long to finish before they are interrupted and requeued (seconds)
+WORKER_DRAIN_TIMEOUT = float(os.getenv("WORKER_DRAIN_TIMEOUT", "20"))
+# Pin worker process i to the i-th allowed CPU (Linux only)
+WORKER_PIN_CPUS = os.getenv("WORKER_PIN_CPUS", "false").lower() in ("1", "true", "yes")
+# Serve Prometheus metrics on this port (process i of a pool on port + i); unset disables the exporter
+WORKER_METRICS_PORT = int(os.environ["WORKER_METRICS_PORT"]) if os.getenv("WORKER_METRICS_PORT") else None
+
+# Bucket for jobs whose compute_tier has no explicit limit
+OTHER_TIERS = "*"
+# Bucket for fast-forward jobs, which run as batches independent of tier limits
+FAST_FORWARD = "fast-forward"
+
+def worker_id(pid: int = None) -> str:
+    """Identity a worker process writes to the jobs it claims: host:pid"""
+    return f"{socket.gethostname()}:{os.getpid() if pid is None else pid}"
+
+def lease_deadline() -> datetime:
+    return datetime.utcnow() + timedelta(seconds=WORKER_LEASE_SEC)
+
+def job_rng(job: Job) -> np.random.Generator:
+    """Generator of a job's simulated values, seeded from SIMULATION_SEED and the job"""
+    if SIMULATION_SEED is None:
+        return np.random.default_rng()
+    # Jobs created before the seq column was backfilled fall back to their id
+    key = job.seq if job.seq is not None else job.id.int
+    return np.random.default_rng(np.random.SeedSequence([SIMULATION_SEED, key]))
+
+def load_job(job_id):
+    """A job with its scenario, detached: the session that loaded it is already closed"""
+    db = SessionLocal()
+    try:
+        return db.query(Job).options(joinedload(Job.scenario)).filter(Job.id == job_id).first()
+    finally:
+        db.close()
+
+def fallback_insight_text(scenario, accuracy: float, safety_score: float) -> str:
+    """Insight text used when OpenAI is not configured"""
+    return (f"Job completed with {accuracy:.1%} accuracy. Safety score: {safety_score:.1f}/100. "
+            f"The model shows {'strong' if accuracy > 0.85 else 'moderate'} performance in "
+            f"{scenario.weather} conditions with {scenario.traffic_density:.0%} traffic density.")
+
+def simulate_lap_job(job: Job, interrupted: threading.Event = None):
+    """Race job.cars AI drivers for job.epochs laps on job.map and store every car's result.
+
+    The fastest car is re-run alone with telemetry recorded (cars never
+    interact, so its run is the same) and stored as an AI driving session on
+    the map, next to human runs. Nothing touches the database until the
+    results are written in one short transaction. Setting `interrupted`
+    stops either run within a simulated second, with JobInterrupted.
+    """
+    print(f"Starting lap simulation for job {job.id} ({job.cars} cars on {job.map})")
+    track = get_map(job.map)
+    params = driver_params(job.cars, job_rng(job))
+    start = time.perf_counter()
+    with JOB_STAGE_LATENCY.labels("laps").time():
+        result = simulate_laps(track, params, job.epochs, interrupted=interrupted)
+        if result is None:
+            raise JobInterrupted(job.id)
+
+        # Most laps first, then the shortest total time
+        fastest = int(np.lexsort((np.nan_to_num(result["total_time"], nan=np.inf), -result["laps"]))[0])
+        replay = simulate_laps(track, select_cars(params, [fastest]), job.epochs, record=True, interrupted=interrupted)
+        if replay is None:
+            raise JobInterrupted(job.id)
+
+    rows = [
+        {"job_id": job.id, "car": car, "laps": int(result["laps"][car]),
+         "best_lap": None if np.isnan(result["best_lap"][car]) else float(result["best_lap"][car]),
+         "total_time": None if np.isnan(result["total_time"][car]) else float(result["total_time"][car]),
+         "off_track_frames": int(result["off_track_frames"][car]),
+         **{name: float(params[name][car]) for name in ("target_speed", "brake_angle", "boost_angle", "reach_radius")}}
+        for car in range(job.cars)
+    ]
+    started_ms = (job.started_at or datetime.utcnow()).replace(tzinfo=timezone.utc).timestamp() * 1000
+    db = SessionLocal()
+    timer = time.perf_counter()
+    try:
+        completed = db.execute(update(Job).where(still_leased(job)).values(
+            status="completed", progress=100.0, runtime_sec=round(time.perf_counter() - start, 2)
+        ))
+        if not completed.rowcount:
+            db.rollback()
+            raise JobInterrupted(job.id)
+        db.connection().execute(insert(LapResult.__table__), rows)
+        session = DrivingSession(map=job.map, driver="ai", status="completed", job_id=job.id)
+        db.add(session)
+        db.flush()
+        append_frames(db, session, car_frames(replay, 0, t0=started_ms), chunk_frames=CHUNK_FRAMES)
+        db.commit()
+        JOB_STAGE_LATENCY.labels("complete").observe(time.perf_counter() - timer)
+    finally:
+        db.close()
+    print(f"Completed lap simulation for job {job.id}: {int((result['laps'] >= job.epochs).sum())}/{job.cars} cars finished")
+
+def simulate_job(job: Job, insights: InsightStage = None, interrupted: threading.Event = None):
+    """Simulate a training job with realistic metrics; OpenAI insights are handed to `insights` if given.
+
+    `job` is a detached row with its scenario loaded. Writes go through short
+    sessions of their own, so no connection is held while the job sleeps
+    between epochs. Setting `interrupted` stops the job between epochs with
+    JobInterrupted, discarding metrics that were not yet written; so does
+    losing the job's lease before it completes.
+    """
+    if job.job_type == "lap_simulation":
+        return simulate_lap_job(job, interrupted)
     print(f"Starting simulation for job {job.id}")
     
-    job.status = "running"
-    db.commit()
-    
-    # Job runtime: 10-30 seconds based on epochs and complexity
-    total_runtime = random.uniform(10, 30)
-    time_per_epoch = total_runtime / job.epochs
-    
     # Get scenario data for risk calculation
     scenario = job.scenario
     
-    # Calculate base risk factors from scenario
-    weather_risk = {"sunny": 0.1, "rain": 0.4, "fog": 0.7, "snow": 0.8}.get(scenario.weather.lower(), 0.3)
-    time_risk = {"day": 0.2, "night": 0.5, "dawn": 0.4, "dusk": 0.4}.get(scenario.time_of_day.lower(), 0.3)
-    traffic_risk = scenario.traffic_density * 0.5
+    # Precompute every epoch's metrics; the loop below only paces and stores them
+    with JOB_STAGE_LATENCY.labels("simulate").time():
+        series = simulate_batch([job.epochs], [job.compute_tier], [job_rng(job)])
+    total_runtime = float(series["total_runtime"][0])
+    time_per_epoch = float(series["time_per_epoch"][0])
     
-    # Simulate training epochs
-    for epoch in range(1, job.epochs + 1):
-        # Generate realistic training metrics (exponential decay for loss, inverse for accuracy)
-        base_loss = 2.5
-        loss = base_loss * math.exp(-0.15 * epoch) + random.uniform(-0.05, 0.05)
-        
-        base_accuracy = 0.5
-        accuracy = min(0.98, base_accuracy + (1 - base_accuracy) * (1 - math.exp(-0.2 * epoch))) + random.uniform(-0.02, 0.02)
-        
-        detection_score = min(0.95, accuracy * 0.9 + random.uniform(0, 0.1))
-        
-        # Store training metrics
-        metric = Metric(
-            job_id=job.id,
-            epoch=epoch,
-            loss=round(loss, 4),
-            accuracy=round(accuracy, 4),
-            detection_score=round(detection_score, 4)
-        )
-        db.add(metric)
-        
-        # Generate compute telemetry
-        tier_utilization = {
-            "small": (60, 75),
-            "medium": (75, 90),
-            "large": (85, 95)
-        }
-        gpu_range = tier_utilization.get(job.compute_tier.lower(), (70, 85))
-        
-        compute_metric = ComputeMetric(
-            job_id=job.id,
-            gpu_utilization=round(random.uniform(*gpu_range), 2),
-            vram_usage=round(random.uniform(50, 95), 2),
-            cpu_usage=round(random.uniform(30, 60), 2)
-        )
-        db.add(compute_metric)
-        
-        # Update job progress
-        job.progress = round((epoch / job.epochs) * 100, 2)
-        job.runtime_sec = round(epoch * time_per_epoch, 2)
-        db.commit()
-        
-        # Sleep to simulate real training time
-        time.sleep(time_per_epoch)
+    # Simulate training epochs; rows are buffered and bulk-inserted by the writer
+    with MetricsWriter(job) as writer:
+        for i in range(job.epochs):
+            epoch = i + 1
+            writer.add(
+                metric={
+                    "epoch": epoch,
+                    "loss": float(series["loss"][0, i]),
+                    "accuracy": float(series["accuracy"][0, i]),
+                    "detection_score": float(series["detection_score"][0, i])
+                },
+                compute_metric={
+                    "gpu_utilization": float(series["gpu_utilization"][0, i]),
+                    "vram_usage": float(series["vram_usage"][0, i]),
+                    "cpu_usage": float(series["cpu_usage"][0, i]),
+                    "timestamp": datetime.utcnow()
+                },
+                progress=round((epoch / job.epochs) * 100, 2),
+                runtime_sec=round(epoch * time_per_epoch, 2)
+            )
+            
+            # Sleep to simulate real training time
+            delay = time_per_epoch * SIMULATION_TIME_SCALE
+            if interrupted is None:
+                time.sleep(delay)
+            elif interrupted.wait(delay):
+                writer.discard()
+                raise JobInterrupted(job.id)
+    
+    final = final_values(series, [job.epochs])
+    loss, accuracy, detection_score = (float(final[name][0]) for name in ("loss", "accuracy", "detection_score"))
     
-    # Generate final risk analysis with realistic danger assessment
-    # Base environmental risks (higher for dangerous conditions)
-    base_collision = (weather_risk * 0.5 + traffic_risk * 0.7) * 0.8
-    base_pedestrian = (time_risk * 0.6 + weather_risk * 0.5 + traffic_risk * 0.3) * 0.7
-    base_visibility = weather_risk * 0.9
+    with JOB_STAGE_LATENCY.labels("risk").time():
+        risk = evaluate_risk(scenario.weather, scenario.time_of_day, scenario.traffic_density, accuracy, detection_score)
     
-    # Model performance reduces risk, but not completely (dangerous is still dangerous)
-    collision_prob = min(0.95, base_collision * (1 - accuracy * 0.3))  # Less optimistic reduction
-    pedestrian_risk = min(0.95, base_pedestrian * (1 - detection_score * 0.35))
-    visibility_risk = min(0.95, base_visibility * (1 - accuracy * 0.25))
+    db = SessionLocal()
+    timer = time.perf_counter()
+    try:
+        # Mark job as completed together with its risk analysis; OpenAI insights
+        # are generated by the insight stage after the job completes
+        completed = db.execute(update(Job).where(still_leased(job)).values(
+            status="completed", progress=100.0, runtime_sec=round(total_runtime, 2),
+            insight_status="pending" if insights is not None else job.insight_status,
+            # The lease now covers the job's insights, renewed by the insight stage until they are stored
+            lease_expires_at=lease_deadline()
+        ))
+        if not completed.rowcount:
+            db.rollback()
+            raise JobInterrupted(job.id)
+        db.add(RiskAnalysis(job_id=job.id, **risk))
+        add_to_rollups(db, [rollup_entry(job, round(total_runtime, 2), loss, accuracy, risk["safety_score"])])
+        if insights is None:
+            # Fallback insights without OpenAI
+            db.add(Insight(job_id=job.id, insight_text=fallback_insight_text(scenario, accuracy, risk["safety_score"])))
+        db.commit()
+        JOB_STAGE_LATENCY.labels("complete").observe(time.perf_counter() - timer)
+    finally:
+        db.close()
     
-    # Safety score: 0-100 where lower is more dangerous
-    avg_risk = (collision_prob + pedestrian_risk + visibility_risk) / 3
-    safety_score = max(0, min(100, (1 - avg_risk) * 100))
+    if insights is not None:
+        insights.submit(job.id, insight_payload(job, loss, accuracy, detection_score, risk))
     
-    risk_analysis = RiskAnalysis(
-        job_id=job.id,
-        collision_probability=round(collision_prob, 4),
-        pedestrian_risk=round(pedestrian_risk, 4),
-        visibility_risk=round(visibility_risk, 4),
-        safety_score=round(safety_score, 2)
+    print(f"Completed simulation for job {job.id}")
+
+def fast_forward_jobs(jobs: list, db: Session, rng: np.random.Generator = None):
+    """Complete a batch of jobs at once: no sleeping, no per-epoch commits, no OpenAI calls.
+
+    Every series of the batch is synthesized as NumPy arrays in one pass, then
+    all rows are written with bulk INSERTs in a single transaction. Sample
+    timestamps are spread over each job's simulated runtime as if it had run live.
+    """
+    if rng is None:
+        # Per-job seeds only when seeded: unseeded, one Generator draws the whole batch at once
+        rng = [job_rng(job) for job in jobs] if SIMULATION_SEED is not None else np.random.default_rng()
+    epochs = [job.epochs for job in jobs]
+    series = simulate_batch(epochs, [job.compute_tier for job in jobs], rng)
+    final = final_values(series, epochs)
+    started_at = datetime.utcnow()
+
+    metric_rows, compute_rows = [], []
+    for j, job in enumerate(jobs):
+        n = job.epochs
+        offsets = (np.arange(1, n + 1) * series["time_per_epoch"][j]).tolist()
+        columns = {name: series[name][j, :n].tolist() for name in (
+            "loss", "accuracy", "detection_score", "gpu_utilization", "vram_usage", "cpu_usage"
+        )}
+        metric_rows.extend(
+            {"job_id": job.id, "epoch": i + 1, "loss": columns["loss"][i],
+             "accuracy": columns["accuracy"][i], "detection_score": columns["detection_score"][i]}
+            for i in range(n)
+        )
+        compute_rows.extend(
+            {"job_id": job.id, "gpu_utilization": columns["gpu_utilization"][i],
+             "vram_usage": columns["vram_usage"][i], "cpu_usage": columns["cpu_usage"][i],
+             "timestamp": started_at + timedelta(seconds=offsets[i])}
+            for i in range(n)
+        )
+
+    if metric_rows:
+        # Core executemany on the tables skips the ORM bulk-insert bookkeeping
+        connection = db.connection()
+        connection.execute(insert(Metric.__table__), metric_rows)
+        connection.execute(insert(ComputeMetric.__table__), compute_rows)
+
+    scores = evaluate_risk_batch(
+        [job.scenario.weather for job in jobs],
+        [job.scenario.time_of_day for job in jobs],
+        [job.scenario.traffic_density for job in jobs],
+        final["accuracy"],
+        final["detection_score"]
     )
-    db.add(risk_analysis)
+    rollups = []
+    for j, job in enumerate(jobs):
+        accuracy = float(final["accuracy"][j])
+        risk = {name: float(values[j]) for name, values in scores.items()}
+        db.add(RiskAnalysis(job_id=job.id, **risk))
+        db.add(Insight(job_id=job.id, insight_text=fallback_insight_text(job.scenario, accuracy, risk["safety_score"])))
+        job.status = "completed"
+        job.progress = 100.0
+        job.runtime_sec = round(float(series["total_runtime"][j]), 2)
+        rollups.append(rollup_entry(job, job.runtime_sec, float(final["loss"][j]), accuracy, risk["safety_score"]))
+    add_to_rollups(db, rollups)
     db.commit()
-    
-    # Generate AI insights (only if OpenAI API key is configured)
-    if os.getenv("OPENAI_API_KEY") and os.getenv("OPENAI_API_KEY") != "your_openai_api_key_here":
+    print(f"Fast-forwarded {len(jobs)} jobs")
+
+def claim_jobs(db: Session, tier: str, limit: int, known_tiers=()) -> list:
+    """Atomically move up to `limit` pending jobs of a tier to running and return their ids.
+
+    Candidates are locked with FOR UPDATE SKIP LOCKED so concurrent workers never
+    block on, or claim, the same rows. The conditional UPDATE keeps the claim safe
+    on backends without row locking (e.g. a SQLite stand-in). The OTHER_TIERS
+    bucket matches every tier not in `known_tiers`; the FAST_FORWARD bucket
+    matches fast-forward jobs of any tier, which the other buckets skip.
+    """
+    tier_column = func.lower(Job.compute_tier)
+    query = db.query(Job.id).filter(Job.status == "pending")
+    if tier == FAST_FORWARD:
+        query = query.filter(Job.fast_forward.is_(True))
+    elif tier == OTHER_TIERS:
+        query = query.filter(Job.fast_forward.is_(False), tier_column.notin_(list(known_tiers)))
+    else:
+        query = query.filter(Job.fast_forward.is_(False), tier_column == tier)
+
+    candidate_ids = [
+        row[0] for row in query.order_by(Job.created_at).limit(limit).with_for_update(skip_locked=True).all()
+    ]
+    if not candidate_ids:
+        db.rollback()
+        return []
+
+    now = datetime.utcnow()
+    claimed = db.execute(
+        update(Job)
+        .where(Job.id.in_(candidate_ids), Job.status == "pending")
+        .values(status="running", started_at=now, worker_id=worker_id(),
+                lease_expires_at=lease_deadline(), attempts=Job.attempts + 1)
+        .returning(Job.id, Job.compute_tier, Job.created_at)
+    ).all()
+    db.commit()
+    for _, compute_tier, created_at in claimed:
+        if created_at is not None:
+            JOB_WAIT.labels(compute_tier.lower()).observe(max(0.0, (now - created_at).total_seconds()))
+    return [job_id for job_id, _, _ in claimed]
+
+def requeue_jobs(db: Session, job_ids: list, worker: str = None, graceful: bool = False) -> list:
+    """Return running jobs to pending, dropping the metrics of their partial run; returns the requeued ids.
+
+    Only jobs leased to `worker` are touched when it is given. A job whose
+    worker died WORKER_MAX_ATTEMPTS times is marked failed instead, so one job
+    that crashes workers cannot take them all down in turn; a graceful requeue
+    (a draining worker giving the job back) does not count as an attempt.
+    """
+    if not job_ids:
+        return []
+    query = select(Job.id).where(Job.id.in_(job_ids), Job.status == "running")
+    if worker is not None:
+        query = query.where(Job.worker_id == worker)
+    ids = db.execute(query.with_for_update(skip_locked=True)).scalars().all()
+    if not ids:
+        db.rollback()
+        return []
+
+    failed = []
+    if not graceful:
+        failed = db.execute(
+            update(Job)
+            .where(Job.id.in_(ids), Job.attempts >= WORKER_MAX_ATTEMPTS)
+            .values(status="failed", worker_id=None, lease_expires_at=None)
+            .returning(Job.id)
+        ).scalars().all()
+        for job_id in failed:
+            print(f"Job {job_id} failed: its worker died {WORKER_MAX_ATTEMPTS} times")
+    requeued = [job_id for job_id in ids if job_id not in failed]
+    if requeued:
+        db.execute(delete(Metric.__table__).where(Metric.__table__.c.job_id.in_(requeued)))
+        db.execute(delete(ComputeMetric.__table__).where(ComputeMetric.__table__.c.job_id.in_(requeued)))
+        values = {"status": "pending", "progress": 0.0, "runtime_sec": 0.0, "started_at": None,
+                  "worker_id": None, "lease_expires_at": None}
+        if graceful:
+            values["attempts"] = Job.attempts - 1
+        db.execute(update(Job).where(Job.id.in_(requeued)).values(**values))
+    db.commit()
+    return requeued
+
+def reap_stale_jobs(db: Session) -> list:
+    """Requeue running jobs whose lease expired, i.e. whose worker died or hung; returns their ids.
+
+    Running jobs without a lease (claimed by a worker predating leases) count
+    as stale once they started more than WORKER_LEASE_SEC ago.
+    """
+    now = datetime.utcnow()
+    stale = db.execute(select(Job.id).where(Job.status == "running", or_(
+        Job.lease_expires_at < now,
+        and_(Job.lease_expires_at.is_(None), Job.started_at < now - timedelta(seconds=WORKER_LEASE_SEC))
+    ))).scalars().all()
+    return requeue_jobs(db, stale)
+
+def run_job(job_id, insights: InsightStage = None, interrupted: threading.Event = None):
+    """Run a claimed job, marking it failed on error and requeueing it when interrupted"""
+    try:
+        job = load_job(job_id)
+        if job:
+            simulate_job(job, insights, interrupted)
+    except JobInterrupted:
+        # Only requeue the job if this worker still holds it; a lost lease means it was requeued already
+        db = SessionLocal()
         try:
-            # Performance insight
-            job_data = {
-                "compute_tier": job.compute_tier,
-                "epochs": job.epochs,
-                "weather": scenario.weather,
-                "traffic_density": scenario.traffic_density
-            }
-            metrics_data = {
-                "final_loss": loss,
-                "final_accuracy": accuracy,
-                "detection_score": detection_score
-            }
-            perf_insight_text = generate_performance_insight(job_data, metrics_data)
-            
-            perf_insight = Insight(
-                job_id=job.id,
-                insight_text=perf_insight_text
-            )
-            db.add(perf_insight)
-            
-            # Safety insight
-            scenario_data = {
-                "weather": scenario.weather,
-                "time_of_day": scenario.time_of_day,
-                "traffic_density": scenario.traffic_density
-            }
-            risk_data = {
-                "collision_probability": collision_prob,
-                "pedestrian_risk": pedestrian_risk,
-                "visibility_risk": visibility_risk,
-                "safety_score": safety_score
-            }
-            safety_insight_text = generate_safety_insight(risk_data, scenario_data)
-            
-            safety_insight = Insight(
-                job_id=job.id,
-                insight_text=safety_insight_text
-            )
-            db.add(safety_insight)
+            if requeue_jobs(db, [job_id], worker=worker_id(), graceful=True):
+                print(f"Job {job_id} interrupted, requeued")
+        finally:
+            db.close()
+    except Exception as e:
+        print(f"Job {job_id} failed: {e}")
+        db = SessionLocal()
+        try:
+            db.query(Job).filter(Job.id == job_id).update({"status": "failed"})
             db.commit()
-            
-            print(f"Generated AI insights for job {job.id}")
-        except Exception as e:
-            print(f"Failed to generate insights: {e}")
-    else:
-        # Fallback insights without OpenAI
-        fallback_insight = Insight(
-            job_id=job.id,
-            insight_text=f"Job completed with {accuracy:.1%} accuracy. Safety score: {safety_score:.1f}/100. "
-                        f"The model shows {'strong' if accuracy > 0.85 else 'moderate'} performance in "
-                        f"{scenario.weather} conditions with {scenario.traffic_density:.0%} traffic density."
-        )
-        db.add(fallback_insight)
+        finally:
+            db.close()
+
+def run_fast_forward_batch(job_ids: list):
+    """Fast-forward a claimed batch in its own session, marking it failed on error"""
+    db = SessionLocal()
+    try:
+        jobs = db.query(Job).options(joinedload(Job.scenario)).filter(Job.id.in_(job_ids)).all()
+        if jobs:
+            fast_forward_jobs(jobs, db)
+    except Exception as e:
+        print(f"Fast-forward batch of {len(job_ids)} jobs failed: {e}")
+        db.rollback()
+        db.query(Job).filter(Job.id.in_(job_ids)).update({"status": "failed"}, synchronize_session=False)
         db.commit()
-    
-    # Mark job as completed
-    job.status = "completed"
-    job.progress = 100.0
-    job.runtime_sec = round(total_runtime, 2)
-    db.commit()
-    
-    print(f"Completed simulation for job {job.id}")
+    finally:
+        db.close()
 
-def worker_loop():
-    """Main worker loop that processes pending jobs"""
-    print("Worker started. Polling for jobs...")
-    
-    while True:
+def shard_limits(limits: dict, index: int, processes: int) -> dict:
+    """Process `index`'s share of per-tier limits split across `processes` worker processes.
+
+    The shares of a tier add up to its limit, so the pool as a whole honors
+    WORKER_TIER_CONCURRENCY; a tier with fewer slots than processes only runs
+    on the first processes.
+    """
+    return {tier: limit // processes + (index < limit % processes) for tier, limit in limits.items()}
+
+class JobScheduler:
+    """Claims pending jobs and runs them concurrently, bounded per compute tier.
+
+    Every running job has an `interrupted` event in `running`, set when the
+    scheduler drains or the job's lease is lost.
+    """
+
+    def __init__(
+        self,
+        tier_limits: dict = None,
+        default_limit: int = None,
+        poll_interval: float = None,
+        insights: InsightStage = None
+    ):
+        self.insights = insights
+        self.tier_limits = dict(TIER_CONCURRENCY if tier_limits is None else tier_limits)
+        self.tier_limits[OTHER_TIERS] = DEFAULT_TIER_CONCURRENCY if default_limit is None else default_limit
+        self.poll_interval = POLL_INTERVAL if poll_interval is None else poll_interval
+
+        # One fast-forward batch at a time; it already covers many jobs
+        self.limits = {**self.tier_limits, FAST_FORWARD: 1}
+        self.in_flight = {tier: 0 for tier in self.limits}
+        self.running = {}
+        self.lock = threading.Lock()
+        self.wakeup = threading.Event()
+        self.stopped = threading.Event()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, sum(self.limits.values())),
+            thread_name_prefix="job"
+        )
+
+    def free_slots(self, tier: str) -> int:
+        with self.lock:
+            return self.limits[tier] - self.in_flight[tier]
+
+    def dispatch(self) -> int:
+        """Claim jobs for every tier with free capacity and submit them to the pool"""
+        dispatched = 0
         db = SessionLocal()
         try:
-            # Find pending jobs
-            pending_jobs = db.query(Job).filter(Job.status == "pending").all()
-            
-            for job in pending_jobs:
-                simulate_job(job, db)
-            
+            if self.free_slots(FAST_FORWARD) > 0:
+                job_ids = claim_jobs(db, FAST_FORWARD, FAST_FORWARD_BATCH)
+                if job_ids:
+                    with self.lock:
+                        self.in_flight[FAST_FORWARD] += 1
+                    self.executor.submit(self._run, FAST_FORWARD, job_ids)
+                    dispatched += len(job_ids)
+
+            for tier in self.tier_limits:
+                slots = self.free_slots(tier)
+                if slots <= 0:
+                    continue
+                known_tiers = [t for t in self.tier_limits if t != OTHER_TIERS]
+                for job_id in claim_jobs(db, tier, slots, known_tiers):
+                    with self.lock:
+                        self.in_flight[tier] += 1
+                    self.executor.submit(self._run, tier, job_id)
+                    dispatched += 1
+        finally:
             db.close()
-            
-            # Poll every 2 seconds
-            time.sleep(2)
-            
-        except Exception as e:
-            print(f"Worker error: {e}")
+        return dispatched
+
+    def _run(self, tier: str, target):
+        # A fast-forward batch is one transaction and cannot be interrupted; its leases are still renewed
+        job_ids = target if tier == FAST_FORWARD else [target]
+        interrupted = threading.Event()
+        with self.lock:
+            self.running.update(dict.fromkeys(job_ids, interrupted))
+        try:
+            if tier == FAST_FORWARD:
+                run_fast_forward_batch(target)
+            else:
+                run_job(target, self.insights, interrupted)
+        finally:
+            with self.lock:
+                for job_id in job_ids:
+                    self.running.pop(job_id, None)
+                self.in_flight[tier] -= 1
+            # A slot just freed up, claim the next job without waiting for the poll
+            self.wakeup.set()
+
+    def idle(self) -> bool:
+        with self.lock:
+            return not any(self.in_flight.values())
+
+    def run(self):
+        while not self.stopped.is_set():
+            # Clear before dispatching so a notification arriving mid-dispatch is not lost
+            self.wakeup.clear()
+            try:
+                self.dispatch()
+            except Exception as e:
+                print(f"Worker error: {e}")
+                self.stopped.wait(5)
+                continue
+            self.wakeup.wait(self.poll_interval)
+
+    def renew_leases(self, db: Session):
+        """Extend the leases of running jobs, interrupting jobs whose lease was lost (reaped as stale)"""
+        with self.lock:
+            running = dict(self.running)
+        if not running:
+            return
+        renewed = set(db.execute(
+            update(Job)
+            .where(Job.id.in_(list(running)), Job.status == "running", Job.worker_id == worker_id())
+            .values(lease_expires_at=lease_deadline())
+            .returning(Job.id)
+        ).scalars())
+        db.commit()
+        with self.lock:
+            lost = [job_id for job_id in running if job_id not in renewed and job_id in self.running]
+        for job_id in lost:
+            print(f"Lost the lease of job {job_id}, interrupting it")
+            running[job_id].set()
+
+    def request_stop(self):
+        """Stop claiming jobs; run() returns after the current dispatch"""
+        self.stopped.set()
+        self.wakeup.set()
+
+    def drain(self, timeout: float = None) -> bool:
+        """Stop claiming, wait up to `timeout` seconds for in-flight jobs, then interrupt the rest.
+
+        Interrupted jobs are requeued by run_job. Returns True when every job finished in time.
+        """
+        timeout = WORKER_DRAIN_TIMEOUT if timeout is None else timeout
+        self.request_stop()
+        deadline = time.monotonic() + timeout
+        while not self.idle() and time.monotonic() < deadline:
+            time.sleep(0.1)
+        drained = self.idle()
+        if not drained:
+            with self.lock:
+                events = set(self.running.values())
+            for interrupted in events:
+                interrupted.set()
+        self.executor.shutdown(wait=True)
+        return drained
+
+    def stop(self, wait: bool = True):
+        self.request_stop()
+        self.executor.shutdown(wait=wait)
+
+class LeaseKeeper(threading.Thread):
+    """Background thread renewing the scheduler's and insight stage's leases and, with `reap`, requeueing stale jobs.
+
+    With an insight stage it also claims pending insights whose lease expired,
+    i.e. whose worker died before storing them.
+    """
+
+    def __init__(
+        self,
+        scheduler: JobScheduler = None,
+        reap: bool = False,
+        interval: float = None,
+        insights: InsightStage = None
+    ):
+        super().__init__(daemon=True, name="lease-keeper")
+        self.scheduler = scheduler
+        self.insights = insights
+        self.reap = reap
+        self.interval = WORKER_LEASE_SEC / 3 if interval is None else interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"Lease keeper error: {e}")
+
+    def tick(self):
+        db = SessionLocal()
+        try:
+            if self.scheduler is not None:
+                self.scheduler.renew_leases(db)
+            if self.insights is not None:
+                self.insights.renew_leases(db)
+                recovered = self.insights.recover()
+                if recovered:
+                    print(f"Claimed insights of {recovered} completed jobs left by other workers")
+            if self.reap:
+                requeued = reap_stale_jobs(db)
+                if requeued:
+                    print(f"Requeued {len(requeued)} jobs with expired leases")
+        finally:
             db.close()
-            time.sleep(5)
+
+    def stop(self):
+        self.stopped.set()
+
+def start_insight_stage():
+    """Start the OpenAI insight stage when a key is configured and claim unfinished jobs no live worker holds"""
+    if not insights_enabled():
+        return None
+    insights = InsightStage(worker_id(), WORKER_LEASE_SEC)
+    insights.start()
+    recovered = insights.recover()
+    if recovered:
+        print(f"Resubmitted insights for {recovered} completed jobs")
+    return insights
+
+def pin_cpu(index: int):
+    """Pin this process to one of the CPUs it may run on, chosen by its index in the pool"""
+    if not WORKER_PIN_CPUS or not hasattr(os, "sched_setaffinity"):
+        return
+    cpus = sorted(os.sched_getaffinity(0))
+    os.sched_setaffinity(0, {cpus[index % len(cpus)]})
+
+def worker_loop(index: int = 0, processes: int = 1):
+    """Main worker loop that processes pending jobs.
+
+    As process `index` of a pool of `processes` (see app.supervisor) it runs
+    its shard of the tier limits. SIGTERM drains it: no new claims, in-flight
+    jobs get WORKER_DRAIN_TIMEOUT to finish and are requeued otherwise.
+    """
+    pin_cpu(index)
+    tier_limits = shard_limits(TIER_CONCURRENCY, index, processes)
+    default_limit = shard_limits({OTHER_TIERS: DEFAULT_TIER_CONCURRENCY}, index, processes)[OTHER_TIERS]
+    limits = ", ".join(f"{tier}={limit}" for tier, limit in tier_limits.items())
+    name = f"Worker {index + 1}/{processes} ({worker_id()})" if processes > 1 else "Worker"
+    insights = start_insight_stage()
+
+    notify = supports_notify()
+    scheduler = JobScheduler(
+        tier_limits, default_limit, poll_interval=FALLBACK_POLL_INTERVAL if notify else None, insights=insights
+    )
+    # Event.set() takes a lock the interrupted main thread may be holding, so stop from another thread
+    signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=scheduler.request_stop).start())
+    WORKER_RUNNING_JOBS.set_function(lambda: len(scheduler.running))
+    if WORKER_METRICS_PORT is not None:
+        start_http_server(WORKER_METRICS_PORT + index)
+        print(f"{name} serving metrics on port {WORKER_METRICS_PORT + index}")
+    # A lone worker reaps stale leases and compacts old telemetry itself; in a pool the supervisor does
+    keeper = LeaseKeeper(scheduler, reap=processes == 1, insights=insights)
+    keeper.start()
+    compactor = start_compactor() if processes == 1 else None
+    listener = JobListener(scheduler.wakeup) if notify else None
+    if listener:
+        listener.start()
+        print(f"{name} started ({limits}, other={default_limit}). "
+              f"Listening for jobs, fallback poll every {FALLBACK_POLL_INTERVAL:g}s...")
+    else:
+        print(f"{name} started ({limits}, other={default_limit}). Polling for jobs...")
+    try:
+        scheduler.run()
+    finally:
+        if listener:
+            listener.stop()
+        print(f"{name} draining...")
+        drained = scheduler.drain()
+        keeper.stop()
+        if compactor is not None:
+            compactor.stop()
+        if insights is not None:
+            insights.stop(WORKER_DRAIN_TIMEOUT)
+        print(f"{name} stopped" + ("" if drained else " (unfinished jobs requeued)"))
 
 if __name__ == "__main__":
     print("Initializing worker...")
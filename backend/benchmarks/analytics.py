@@ -0,0 +1,125 @@
+"""Latency of GET /api/analytics/ as completed jobs accumulate, versus aggregating the raw tables.
+
+Run from the backend directory:
+
+    python -m benchmarks.analytics --jobs 1000 10000 50000
+
+Jobs over a grid of scenarios and the three tiers are completed with
+fast_forward_jobs, which adds them to the rollups as the worker does. At each
+size the endpoint (tiers x weather, mean and percentiles) is timed against the
+same per-group means computed from jobs, last-epoch metrics and risk rows.
+Then rebuild_rollups must reproduce the incrementally maintained rollups.
+
+Set DATABASE_URL to benchmark a real Postgres instance; otherwise a SQLite
+stand-in is used.
+"""
+import argparse
+import itertools
+import time
+
+from benchmarks import standin
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy import and_, func
+from sqlalchemy.orm import joinedload
+from app.database import SessionLocal, engine, Base
+from app.models import Scenario, Job, Metric, RiskAnalysis, AnalyticsRollup, AnalyticsHistogram
+from app.services.analytics import rebuild_rollups
+from app.main import app
+from app import worker
+
+WEATHERS = ["clear", "rain", "fog", "snow"]
+TIMES = ["day", "dusk", "night"]
+ROADS = ["highway", "city", "rural"]
+TIERS = ["small", "medium", "large"]
+
+def seed_scenarios(db) -> list:
+    scenarios = [
+        Scenario(weather=weather, time_of_day=time_of_day, traffic_density=0.5, road_type=road,
+                 object_count=20, dataset_size_mb=100.0)
+        for weather, time_of_day, road in itertools.product(WEATHERS, TIMES, ROADS)
+    ]
+    db.add_all(scenarios)
+    db.commit()
+    return scenarios
+
+def complete_jobs(db, scenarios: list, count: int, epochs: int, rng):
+    """Complete `count` more jobs in fast-forward batches, like the worker"""
+    for start in range(0, count, worker.FAST_FORWARD_BATCH):
+        batch = [
+            Job(scenario_id=scenarios[i % len(scenarios)].id, compute_tier=TIERS[i % len(TIERS)], epochs=epochs,
+                cost_estimate=round(0.1 * (1 + i % 3), 2), status="running", fast_forward=True)
+            for i in range(start, min(count, start + worker.FAST_FORWARD_BATCH))
+        ]
+        db.add_all(batch)
+        db.flush()
+        jobs = db.query(Job).options(joinedload(Job.scenario)).filter(Job.id.in_([job.id for job in batch])).all()
+        worker.fast_forward_jobs(jobs, db, rng)
+
+def raw_groups(db) -> dict:
+    """Per (tier, weather) job count and mean final accuracy from the raw tables"""
+    rows = db.query(
+        Job.compute_tier, Scenario.weather, func.count(Job.id), func.avg(Metric.accuracy), func.avg(RiskAnalysis.safety_score)
+    ).join(Scenario, Scenario.id == Job.scenario_id).join(
+        Metric, and_(Metric.job_id == Job.id, Metric.epoch == Job.epochs)
+    ).join(RiskAnalysis, RiskAnalysis.job_id == Job.id).filter(
+        Job.status == "completed"
+    ).group_by(Job.compute_tier, Scenario.weather).all()
+    return {(tier, weather): (jobs, accuracy, safety) for tier, weather, jobs, accuracy, safety in rows}
+
+def best_of(fn, repeat: int = 5) -> tuple:
+    times, result = [], None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000, result
+
+def snapshot(db) -> tuple:
+    rollups = sorted(
+        (r.compute_tier, r.weather, r.time_of_day, r.road_type, r.jobs, round(r.accuracy, 6), round(r.cost, 6))
+        for r in db.query(AnalyticsRollup)
+    )
+    histograms = sorted(
+        (h.compute_tier, h.weather, h.time_of_day, h.road_type, h.metric, h.bucket, h.jobs)
+        for h in db.query(AnalyticsHistogram)
+    )
+    return rollups, histograms
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[1000, 10000, 50000], help="completed job counts")
+    parser.add_argument("--epochs", type=int, default=5)
+    args = parser.parse_args()
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    scenarios = seed_scenarios(db)
+    rng = np.random.default_rng(42)
+    client = TestClient(app)
+    url = "/api/analytics/?group_by=compute_tier&group_by=weather"
+
+    backend = "sqlite stand-in" if standin.is_sqlite() else "postgres"
+    print(f"{len(scenarios)} scenarios x {len(TIERS)} tiers, {args.epochs} epochs per job, {backend}")
+    print(f"{'jobs':>8} {'rollups ms':>11} {'raw tables ms':>14}")
+    completed = 0
+    for total in sorted(args.jobs):
+        complete_jobs(db, scenarios, total - completed, args.epochs, rng)
+        completed = total
+        rollup_ms, response = best_of(lambda: client.get(url).json())
+        raw_ms, raw = best_of(lambda: raw_groups(db))
+        for group in response:
+            jobs, accuracy, _ = raw[(group["group"]["compute_tier"], group["group"]["weather"])]
+            assert group["jobs"] == jobs and abs(group["accuracy"]["mean"] - accuracy) < 1e-9, group
+        print(f"{total:>8} {rollup_ms:>11.1f} {raw_ms:>14.1f}")
+
+    before = snapshot(db)
+    rebuilt = rebuild_rollups(db)
+    assert rebuilt == completed and snapshot(db) == before, "rebuild does not match the incremental rollups"
+    print(f"rebuild_rollups reproduces the rollups of {rebuilt} jobs")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,166 @@
+"""API responsiveness under dashboard load while jobs are running.
+
+Run from the backend directory:
+
+    python -m benchmarks.api_load --clients 200 --jobs 20 --duration 30
+
+Starts the API (uvicorn) and a worker as separate processes on a seeded
+database, with `--jobs` live training jobs running for the whole test. Each of
+`--clients` concurrent dashboard clients repeatedly loads the job list, then a
+job with its metrics, compute metrics and risk analysis, like the job details
+page. Reports request latency percentiles, throughput and errors, plus the
+number of running jobs sampled during the test.
+
+Pool settings come from the usual environment (API_DB_*, WORKER_DB_*,
+DB_PGBOUNCER), so configurations can be compared run against run. Set
+DATABASE_URL to test a real Postgres instance; otherwise a SQLite stand-in
+(in WAL mode, so readers and the worker do not block each other) is used.
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+
+import httpx
+import numpy as np
+from sqlalchemy import func, insert, text
+
+from benchmarks import standin
+
+from app.database import SessionLocal, engine, Base
+from app.models import Scenario, Job, Metric, ComputeMetric, RiskAnalysis
+
+SERVE = "from benchmarks import standin; import uvicorn; uvicorn.run('app.main:app', host='127.0.0.1', port={port}, log_level='warning')"
+WORK = "from benchmarks import standin; from app.worker import worker_loop; worker_loop()"
+
+def seed(history: int, epochs: int, jobs: int) -> list:
+    """`history` completed jobs with metrics, plus `jobs` pending ones for the worker; returns completed ids"""
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    if standin.is_sqlite():
+        with engine.connect() as conn:
+            conn.execute(text("PRAGMA journal_mode=WAL"))
+    db = SessionLocal()
+    try:
+        scenario = Scenario(
+            weather="rain", time_of_day="night", traffic_density=0.5,
+            road_type="city", object_count=20, dataset_size_mb=100.0
+        )
+        db.add(scenario)
+        db.flush()
+        done = [Job(scenario_id=scenario.id, compute_tier="small", epochs=epochs, cost_estimate=0.0,
+                    status="completed", progress=100.0, runtime_sec=60.0) for _ in range(history)]
+        db.add_all(done)
+        db.flush()
+        start = datetime.utcnow() - timedelta(hours=1)
+        db.execute(insert(Metric), [
+            {"job_id": job.id, "epoch": e + 1, "loss": 1 / (e + 1), "accuracy": 0.9, "detection_score": 0.8}
+            for job in done for e in range(epochs)
+        ])
+        db.execute(insert(ComputeMetric), [
+            {"job_id": job.id, "gpu_utilization": 80.0, "vram_usage": 12.0, "cpu_usage": 40.0,
+             "timestamp": start + timedelta(seconds=e)}
+            for job in done for e in range(epochs)
+        ])
+        db.add_all([RiskAnalysis(job_id=job.id, collision_probability=0.1, pedestrian_risk=0.1,
+                                 visibility_risk=0.2, safety_score=80.0) for job in done])
+        tiers = ["small", "medium", "large"]
+        db.add_all([Job(scenario_id=scenario.id, compute_tier=tiers[i % 3], epochs=epochs, cost_estimate=0.0,
+                        status="pending") for i in range(jobs)])
+        db.commit()
+        return [str(job.id) for job in done]
+    finally:
+        db.close()
+
+def running_jobs() -> int:
+    db = SessionLocal()
+    try:
+        return db.query(func.count(Job.id)).filter(Job.status == "running").scalar()
+    finally:
+        db.close()
+
+async def dashboard_client(client: httpx.AsyncClient, job_ids: list, deadline: float, latencies: list, errors: list):
+    while time.perf_counter() < deadline:
+        job_id = random.choice(job_ids)
+        for path in ("/api/jobs/?limit=20", f"/api/jobs/{job_id}", f"/api/metrics/{job_id}",
+                     f"/api/compute/{job_id}", f"/api/risk/{job_id}"):
+            start = time.perf_counter()
+            try:
+                response = await client.get(path)
+                if response.status_code != 200:
+                    errors.append(response.status_code)
+            except httpx.HTTPError as e:
+                errors.append(type(e).__name__)
+            latencies.append(time.perf_counter() - start)
+
+async def load(base_url: str, clients: int, duration: float, job_ids: list) -> tuple:
+    latencies, errors, running = [], [], []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30) as client:
+        deadline = time.perf_counter() + duration
+        tasks = [asyncio.create_task(dashboard_client(client, job_ids, deadline, latencies, errors))
+                 for _ in range(clients)]
+        while time.perf_counter() < deadline:
+            running.append(await asyncio.to_thread(running_jobs))
+            await asyncio.sleep(1)
+        await asyncio.gather(*tasks)
+    return latencies, errors, running
+
+def wait_for(base_url: str, timeout: float = 30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{base_url}/health").status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("API did not start")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=200)
+    parser.add_argument("--jobs", type=int, default=20, help="live jobs running during the test")
+    parser.add_argument("--duration", type=float, default=30, help="seconds of load")
+    parser.add_argument("--history", type=int, default=500, help="completed jobs with metrics to browse")
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    job_ids = seed(args.history, args.epochs, args.jobs)
+    base_url = f"http://127.0.0.1:{args.port}"
+    env = {
+        **os.environ,
+        # Every live job runs at real speed and gets a slot, so all of them stay running through the test
+        "SIMULATION_TIME_SCALE": os.getenv("SIMULATION_TIME_SCALE", "1"),
+        "WORKER_TIER_CONCURRENCY": f"small={args.jobs},medium={args.jobs},large={args.jobs}",
+        "METRICS_FLUSH_INTERVAL": os.getenv("METRICS_FLUSH_INTERVAL", "0"),
+        # Stop the worker right away at the end instead of letting its jobs finish
+        "WORKER_DRAIN_TIMEOUT": "0",
+    }
+    api = subprocess.Popen([sys.executable, "-c", SERVE.format(port=args.port)], env=env)
+    worker = subprocess.Popen([sys.executable, "-c", WORK], env=env, stdout=subprocess.DEVNULL)
+    try:
+        wait_for(base_url)
+        latencies, errors, running = asyncio.run(load(base_url, args.clients, args.duration, job_ids))
+    finally:
+        for process in (api, worker):
+            process.terminate()
+        for process in (api, worker):
+            process.wait(30)
+
+    backend = "sqlite stand-in" if standin.is_sqlite() else "postgres"
+    ms = np.array(latencies) * 1000
+    print(f"{args.clients} clients, {args.jobs} live jobs, {args.duration:g} s on {backend}")
+    print(f"running jobs during the test: min {min(running)}, max {max(running)}")
+    print(f"requests: {len(ms)} ({len(ms) / args.duration:.0f}/s), errors: {dict(Counter(errors)) or 0}")
+    print(f"latency ms: p50 {np.percentile(ms, 50):.1f}  p95 {np.percentile(ms, 95):.1f}  "
+          f"p99 {np.percentile(ms, 99):.1f}  max {ms.max():.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Compute telemetry compaction: table size, compaction time and GET /api/compute/ before and after.
+
+Run from the backend directory:
+
+    python -m benchmarks.compaction --jobs 50 --samples 20000
+
+Every job gets `--samples` compute samples `--interval` seconds apart. Then
+compact() runs at a time where the raw retention cutoff falls halfway through
+each job's series, so older halves become COMPACTION_BUCKET_SEC summaries.
+Paging through a job with the keyset cursor must still return one continuous
+series: the summaries (covering every compacted sample, with matching means)
+followed by the untouched raw samples.
+
+Set DATABASE_URL to benchmark a real Postgres instance; otherwise a SQLite
+stand-in is used.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import standin
+
+import numpy as np
+from fastapi.testclient import TestClient
+from sqlalchemy import func, insert
+from app.database import SessionLocal, engine, Base
+from app.models import Scenario, Job, ComputeMetric, ComputeMetricSummary
+from app.compaction import COMPACTION_BUCKET_SEC, COMPUTE_RAW_RETENTION_DAYS, bucket_start, compact
+from app.main import app
+
+START = datetime(2026, 1, 1)
+
+def seed(db, jobs: int, samples: int, interval: float, rng) -> list:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    scenario = Scenario(
+        weather="clear", time_of_day="day", traffic_density=0.5,
+        road_type="highway", object_count=20, dataset_size_mb=100.0
+    )
+    db.add(scenario)
+    db.flush()
+    job_ids = []
+    for _ in range(jobs):
+        job = Job(scenario_id=scenario.id, compute_tier="large", epochs=samples, cost_estimate=0.0, status="completed")
+        db.add(job)
+        db.flush()
+        gpu = rng.uniform(50, 100, samples)
+        db.execute(insert(ComputeMetric), [
+            {"job_id": job.id, "gpu_utilization": float(gpu[i]), "vram_usage": 60.0, "cpu_usage": 40.0,
+             "timestamp": START + timedelta(seconds=i * interval)}
+            for i in range(samples)
+        ])
+        db.commit()
+        job_ids.append(job.id)
+    return job_ids
+
+def walk(client, job_id, limit: int) -> list:
+    """Every row of a job's telemetry, one keyset page after the other"""
+    rows, cursor = [], None
+    while True:
+        response = client.get(f"/api/compute/{job_id}", params={"limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200, response.text
+        rows.extend(response.json())
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            return rows
+
+def best_of(fn, repeat: int = 5) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=50)
+    parser.add_argument("--samples", type=int, default=20000, help="compute samples per job")
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between samples")
+    parser.add_argument("--limit", type=int, default=1000, help="page size")
+    args = parser.parse_args()
+
+    db = SessionLocal()
+    rng = np.random.default_rng(42)
+    job_ids = seed(db, args.jobs, args.samples, args.interval, rng)
+    client = TestClient(app)
+    job_id = job_ids[-1]
+    before = walk(client, job_id, args.limit)
+    raw_rows = db.query(func.count(ComputeMetric.id)).scalar()
+    page_before = best_of(lambda: client.get(f"/api/compute/{job_id}?limit={args.limit}"))
+    walk_before = best_of(lambda: walk(client, job_id, args.limit), 2)
+
+    # The retention cutoff falls halfway through every job
+    middle = START + timedelta(seconds=args.samples * args.interval / 2)
+    now = middle + timedelta(days=COMPUTE_RAW_RETENTION_DAYS)
+    cutoff = bucket_start(middle)
+    start = time.perf_counter()
+    jobs = samples = 0
+    while True:
+        compacted_jobs, compacted_samples, _ = compact(db, now)
+        jobs, samples = jobs + compacted_jobs, samples + compacted_samples
+        if compacted_jobs == 0:
+            break
+    compact_ms = (time.perf_counter() - start) * 1000
+
+    after = walk(client, job_id, args.limit)
+    summaries = [row for row in after if "samples" in row]
+    raw = [row for row in after if "samples" not in row]
+    old = [row for row in before if datetime.fromisoformat(row["timestamp"]) < cutoff]
+    timestamps = [row["timestamp"] for row in after]
+    assert jobs == args.jobs and timestamps == sorted(timestamps), "series out of order"
+    assert sum(row["samples"] for row in summaries) == len(old), "compacted samples missing"
+    assert raw == before[len(old):], "raw samples changed"
+    mean = sum(row["gpu_utilization"] * row["samples"] for row in summaries) / len(old)
+    assert abs(mean - np.mean([row["gpu_utilization"] for row in old])) < 1e-6, "summary means do not match"
+    assert all(row["gpu_utilization_min"] <= row["gpu_utilization_p95"] <= row["gpu_utilization_max"] for row in summaries)
+    downsampled = client.get(f"/api/compute/{job_id}?points=500").json()
+    assert len(downsampled) == min(500, len(after)), "downsampled series has the wrong length"
+
+    page_after = best_of(lambda: client.get(f"/api/compute/{job_id}?limit={args.limit}"))
+    walk_after = best_of(lambda: walk(client, job_id, args.limit), 2)
+    summary_rows = db.query(func.count(ComputeMetricSummary.id)).scalar()
+    raw_after = db.query(func.count(ComputeMetric.id)).scalar()
+    db.close()
+
+    backend = "sqlite stand-in" if standin.is_sqlite() else "postgres"
+    print(f"{args.jobs} jobs x {args.samples} samples {args.interval:g}s apart, "
+          f"{COMPACTION_BUCKET_SEC}s buckets, {backend}")
+    print(f"compacted {samples} samples of {jobs} jobs in {compact_ms:.0f} ms")
+    print(f"{'':<12} {'raw rows':>10} {'summaries':>10} {'page ms':>8} {'all pages ms':>13} {'job rows':>9}")
+    print(f"{'before':<12} {raw_rows:>10} {0:>10} {page_before:>8.1f} {walk_before:>13.1f} {len(before):>9}")
+    print(f"{'after':<12} {raw_after:>10} {summary_rows:>10} {page_after:>8.1f} {walk_after:>13.1f} {len(after):>9}")
+    print("series continuous: summaries cover every compacted sample, raw samples unchanged")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""Enqueue-to-running latency: 2 s polling versus LISTEN/NOTIFY dispatch.
+
+Run from the backend directory:
+
+    python -m benchmarks.dispatch_latency --jobs 20
+
+Jobs are created through the API handler (so the notification is emitted
+exactly as in production) at random intervals while a scheduler drains the
+queue; latency is `started_at - created_at`. On Postgres the notify mode uses
+a real JobListener. The SQLite stand-in has no NOTIFY, so there the delivered
+notification is emulated by setting the scheduler's wakeup event.
+"""
+import argparse
+import os
+import random
+import statistics
+import threading
+import time
+
+from benchmarks import standin
+
+os.environ.setdefault("SIMULATION_TIME_SCALE", "0.01")
+
+from app.database import SessionLocal, engine, Base
+from app.models import Scenario, Job
+from app.schemas import JobCreate
+from app.routers.jobs import create_job
+from app.job_events import JobListener
+from app import worker
+
+def reset(db):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    scenario = Scenario(
+        weather="sunny", time_of_day="day", traffic_density=0.2,
+        road_type="highway", object_count=5, dataset_size_mb=100.0
+    )
+    db.add(scenario)
+    db.commit()
+    return scenario.id
+
+def run(mode: str, jobs: int, poll_interval: float) -> list:
+    db = SessionLocal()
+    scenario_id = reset(db)
+
+    scheduler = worker.JobScheduler(poll_interval=poll_interval if mode == "poll" else worker.FALLBACK_POLL_INTERVAL)
+    listener = None
+    if mode == "notify" and not standin.is_sqlite():
+        listener = JobListener(scheduler.wakeup)
+        listener.start()
+        time.sleep(0.5)
+    thread = threading.Thread(target=scheduler.run, daemon=True)
+    thread.start()
+
+    for _ in range(jobs):
+        time.sleep(random.uniform(0.05, 0.5))
+        create_job(JobCreate(scenario_id=scenario_id, compute_tier="small", epochs=2), db)
+        if mode == "notify" and listener is None:
+            scheduler.wakeup.set()
+
+    while db.query(Job).filter(Job.started_at.is_(None)).count():
+        time.sleep(0.1)
+    latencies = [
+        (started - created).total_seconds() * 1000
+        for created, started in db.query(Job.created_at, Job.started_at).all()
+    ]
+
+    scheduler.stop()
+    if listener:
+        listener.stop()
+    db.close()
+    return latencies
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=20)
+    parser.add_argument("--poll-interval", type=float, default=2.0)
+    args = parser.parse_args()
+
+    backend = "sqlite stand-in (notify emulated)" if standin.is_sqlite() else "postgres"
+    print(f"{args.jobs} jobs on {backend}")
+    print(f"{'mode':>8} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9}")
+    for mode in ["poll", "notify"]:
+        latencies = sorted(run(mode, args.jobs, args.poll_interval))
+        p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+        print(f"{mode:>8} {statistics.median(latencies):>9.1f} {p95:>9.1f} {latencies[-1]:>9.1f}")
+
+if __name__ == "__main__":
+    main()
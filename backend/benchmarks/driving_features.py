@@ -0,0 +1,98 @@
+"""Driving-session feature extraction: JSON frame objects vs. columnar payloads.
+
+Run from the backend directory:
+
+    python -m benchmarks.driving_features --minutes 10 --hz 60
+
+Times everything between receiving the request body and calling the coach
+(the OpenAI call itself is excluded): Pydantic validation plus the Python
+loop of POST /api/insights/driving-session, against decoding a columnar JSON
+or packed binary payload into the NumPy FeatureAccumulator, whole or in
+5-second chunks as uploaded while driving.
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from benchmarks import standin
+
+from app.schemas import DrivingSession
+from app.services.openai_service import driving_features
+from app.services.driving_telemetry import (
+    FeatureAccumulator, FRAME_DTYPE, decode_binary, decode_columnar,
+    INPUT_UP, INPUT_DOWN, INPUT_LEFT, INPUT_RIGHT, INPUT_BOOST
+)
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--minutes", type=float, default=10)
+    parser.add_argument("--hz", type=int, default=60)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    n = int(args.minutes * 60 * args.hz)
+    rng = np.random.default_rng(0)
+    frames = np.empty(n, dtype=FRAME_DTYPE)
+    frames["t"] = 1.7e12 + np.arange(n) * 1000 // args.hz
+    frames["x"] = rng.uniform(0, 800, n)
+    frames["y"] = rng.uniform(0, 600, n)
+    frames["speed"] = rng.uniform(-2, 25, n)
+    frames["angle"] = rng.uniform(-np.pi, np.pi, n)
+    frames["surface"] = rng.random(n) < 0.1
+    frames["input"] = rng.integers(0, 32, n)
+
+    bits = {"up": INPUT_UP, "down": INPUT_DOWN, "left": INPUT_LEFT, "right": INPUT_RIGHT, "boost": INPUT_BOOST}
+    surfaces = np.where(frames["surface"] == 1, "Grass (Low Grip)", "Tarmac (100%)")
+    objects = json.dumps({"telemetry": [
+        {"t": int(f["t"]), "speed": float(f["speed"]), "angle": float(f["angle"]), "surface": str(surface),
+         "input": {name: bool(f["input"] & bit) for name, bit in bits.items()}}
+        for f, surface in zip(frames, surfaces)
+    ]}).encode()
+    columnar = json.dumps({field: frames[field].tolist() for field in FRAME_DTYPE.names}).encode()
+    binary = frames.tobytes()
+
+    def legacy():
+        session = DrivingSession.model_validate_json(objects)
+        return driving_features([f.model_dump() for f in session.telemetry])
+
+    def accumulate(decoded):
+        accumulator = FeatureAccumulator()
+        accumulator.add(decoded)
+        return accumulator.features()
+
+    chunk_bytes = 5 * args.hz * FRAME_DTYPE.itemsize
+    def chunked():
+        accumulator = FeatureAccumulator()
+        for offset in range(0, len(binary), chunk_bytes):
+            accumulator.add(decode_binary(binary[offset:offset + chunk_bytes]))
+        return accumulator.features()
+
+    expected = legacy()
+    for name, fn in (("columnar", lambda: accumulate(decode_columnar(columnar))),
+                     ("binary", lambda: accumulate(decode_binary(binary))), ("chunked", chunked)):
+        got = fn()
+        assert got["frames"] == expected["frames"] and got["trail_braking_frames"] == expected["trail_braking_frames"], name
+        assert abs(got["avg_speed"] - expected["avg_speed"]) < 1e-3, name
+
+    print(f"{n} frames ({args.minutes:g} min at {args.hz} Hz)")
+    rows = [
+        ("JSON frame objects", len(objects), best_of(args.repeat, legacy)),
+        ("columnar JSON", len(columnar), best_of(args.repeat, lambda: accumulate(decode_columnar(columnar)))),
+        ("packed binary", len(binary), best_of(args.repeat, lambda: accumulate(decode_binary(binary)))),
+        ("binary, 5 s chunks", len(binary), best_of(args.repeat, chunked)),
+    ]
+    for name, size, seconds in rows:
+        print(f"{name:20s} {size / 1e6:6.2f} MB  {seconds * 1000:8.1f} ms")
+
+if __name__ == "__main__":
+    main()
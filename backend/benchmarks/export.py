@@ -0,0 +1,127 @@
+"""Throughput and memory of the streaming export as the number of exported rows grows.
+
+Run from the backend directory:
+
+    python -m benchmarks.export --jobs 100 500 2000 --epochs 200
+
+Each size adds jobs with `--epochs` metrics and compute samples (half of the
+samples compacted into summaries), then exports the metrics and compute
+datasets in every format with the peak of the Python heap traced. For
+comparison, the same metrics are loaded as ORM objects and serialized to JSON
+in one piece, as the per-job endpoints would. Every file is read back and its
+row count checked.
+
+Set DATABASE_URL to benchmark a real Postgres instance; otherwise a SQLite
+stand-in is used.
+"""
+import argparse
+import csv
+import io
+import json
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from benchmarks import standin
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import func, insert
+from app.database import SessionLocal, engine, Base
+from app.models import Scenario, Job, Metric, ComputeMetric
+from app.compaction import COMPUTE_RAW_RETENTION_DAYS, compact
+from app.schemas import MetricResponse
+from app.services.export import FORMATS, export, job_filters
+
+START = datetime(2026, 1, 1)
+
+def add_jobs(db, scenario_id, count: int, epochs: int):
+    jobs = [Job(scenario_id=scenario_id, compute_tier="small", epochs=epochs, cost_estimate=0.0, status="completed")
+            for _ in range(count)]
+    db.add_all(jobs)
+    db.flush()
+    for job in jobs:
+        db.execute(insert(Metric), [
+            {"job_id": job.id, "epoch": e + 1, "loss": 1 / (e + 1), "accuracy": 0.9, "detection_score": 0.8}
+            for e in range(epochs)
+        ])
+        db.execute(insert(ComputeMetric), [
+            {"job_id": job.id, "gpu_utilization": 80.0 + e % 7, "vram_usage": 12.0, "cpu_usage": 40.0,
+             "timestamp": START + timedelta(seconds=60 * e)}
+            for e in range(epochs)
+        ])
+    db.commit()
+
+def read_rows(data: bytes, format: str) -> int:
+    if format == "parquet":
+        return pq.read_table(io.BytesIO(data)).num_rows
+    if format == "arrow":
+        return pa.ipc.open_stream(data).read_all().num_rows
+    return sum(1 for _ in csv.reader(io.StringIO(data.decode()))) - 1
+
+def traced(fn) -> tuple:
+    """(seconds, peak MiB of the Python heap) of a call"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    fn()
+    elapsed = time.perf_counter() - start
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak / 2**20
+
+def stream(dataset: str, format: str) -> int:
+    """Bytes of an export, dropping each chunk as a client writing it to disk would"""
+    with engine.connect() as conn:
+        return sum(len(chunk) for chunk in export(conn, dataset, format, job_filters(status="completed")))
+
+def exported_rows(dataset: str, format: str) -> int:
+    with engine.connect() as conn:
+        return read_rows(b"".join(export(conn, dataset, format, job_filters(status="completed"))), format)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, nargs="+", default=[100, 500, 2000], help="job counts")
+    parser.add_argument("--epochs", type=int, default=200, help="metrics and compute samples per job")
+    args = parser.parse_args()
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    scenario = Scenario(weather="fog", time_of_day="day", traffic_density=0.3, road_type="rural",
+                        object_count=10, dataset_size_mb=50.0)
+    db.add(scenario)
+    db.commit()
+    scenario_id = scenario.id
+
+    backend = "sqlite stand-in" if standin.is_sqlite() else "postgres"
+    print(f"{args.epochs} epochs and compute samples per job, {backend}")
+    print(f"{'jobs':>6} {'dataset':<8} {'format':<8} {'rows':>9} {'rows/s':>9} {'peak MiB':>9}")
+    added = 0
+    for total in sorted(args.jobs):
+        add_jobs(db, scenario_id, total - added, args.epochs)
+        added = total
+        # Compact the first half of every job's samples
+        compact(db, START + timedelta(seconds=30 * args.epochs, days=COMPUTE_RAW_RETENTION_DAYS), batch_jobs=total)
+        raw = db.query(func.count(ComputeMetric.id)).scalar()
+
+        for dataset in ("metrics", "compute"):
+            for format in FORMATS:
+                elapsed, peak = traced(lambda: stream(dataset, format))
+                # Checked on a second run, which holds the whole file in memory
+                rows = exported_rows(dataset, format)
+                expected = total * args.epochs if dataset == "metrics" else None
+                assert expected is None or rows == expected, (dataset, format, rows)
+                assert dataset != "compute" or rows > raw, "compute export is missing the summaries"
+                print(f"{total:>6} {dataset:<8} {format:<8} {rows:>9} {rows / elapsed:>9.0f} {peak:>9.1f}")
+
+        def orm_json():
+            metrics = db.query(Metric).all()
+            return len(json.dumps([MetricResponse.model_validate(m).model_dump(mode="json") for m in metrics]))
+        elapsed, peak = traced(orm_json)
+        db.expunge_all()
+        print(f"{total:>6} {'metrics':<8} {'ORM+JSON':<8} {total * args.epochs:>9} "
+              f"{total * args.epochs / elapsed:>9.0f} {peak:>9.1f}")
+    db.close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+"""Fast-forward backfill versus the live per-epoch path.
+
+Run from the backend directory:
+
+    python -m benchmarks.fast_forward --jobs 1000 --epochs 50
+
+Both paths run with sleeping disabled, so the comparison is pure
+synthesis-and-write cost: simulate_job one job at a time, versus
+fast_forward_jobs over the whole batch.
+"""
+import argparse
+import os
+import time
+
+from benchmarks import standin
+
+os.environ["SIMULATION_TIME_SCALE"] = "0"
+
+import numpy as np
+from sqlalchemy.orm import joinedload
+from app.database import SessionLocal, engine, Base
+from app.models import Scenario, Job, Metric
+from app import worker
+
+def seed(jobs: int, epochs: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    scenario = Scenario(
+        weather="snow", time_of_day="dusk", traffic_density=0.4,
+        road_type="highway", object_count=15, dataset_size_mb=100.0
+    )
+    db.add(scenario)
+    db.flush()
+    tiers = ["small", "medium", "large"]
+    db.add_all([
+        Job(scenario_id=scenario.id, compute_tier=tiers[i % 3], epochs=epochs,
+            cost_estimate=0.0, status="running", fast_forward=True)
+        for i in range(jobs)
+    ])
+    db.commit()
+    return db
+
+def load_jobs(db):
+    return db.query(Job).options(joinedload(Job.scenario)).all()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=1000)
+    parser.add_argument("--epochs", type=int, default=50)
+    parser.add_argument("--live-jobs", type=int, default=50, help="jobs timed on the live path (it is slow)")
+    args = parser.parse_args()
+
+    db = seed(args.live_jobs, args.epochs)
+    start = time.perf_counter()
+    for job in load_jobs(db):
+        worker.simulate_job(job)
+    live = (time.perf_counter() - start) / args.live_jobs
+    db.close()
+
+    db = seed(args.jobs, args.epochs)
+    start = time.perf_counter()
+    worker.fast_forward_jobs(load_jobs(db), db, np.random.default_rng(42))
+    fast = (time.perf_counter() - start) / args.jobs
+    assert db.query(Metric).count() == args.jobs * args.epochs
+    db.close()
+
+    backend = "sqlite stand-in" if standin.is_sqlite() else "postgres"
+    print(f"{args.epochs} epochs per job, {backend}")
+    print(f"live path:    {live * 1000:8.2f} ms/job  ({args.live_jobs} jobs)")
+    print(f"fast-forward: {fast * 1000:8.2f} ms/job  ({args.jobs} jobs, {fast * args.jobs:.2f} s total)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""Latency of completed-job reads: uncached, from the in-process response cache, and as 304 revalidations.
+
+Run from the backend directory:
+
+    python -m benchmarks.http_caching --epochs 5000
+
+Seeds one completed job with `--epochs` metrics and compute samples, a risk
+analysis and insights, then times each endpoint with the response cache
+cleared before every request, served from the cache, and with If-None-Match
+set to the ETag the client already holds. A running job must never be cached.
+
+Set DATABASE_URL to benchmark a real Postgres instance; otherwise a SQLite
+stand-in is used.
+"""
+import argparse
+import time
+from datetime import datetime, timedelta
+
+from benchmarks import standin
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from app.database import SessionLocal, engine, Base
+from app.models import Scenario, Job, Metric, ComputeMetric, RiskAnalysis, Insight
+from app.services.response_cache import response_cache
+from app.main import app
+
+ENDPOINTS = {
+    "metrics": "/api/metrics/{job_id}",
+    "compute": "/api/compute/{job_id}",
+    "compute page": "/api/compute/{job_id}?limit=500",
+    "downsampled": "/api/metrics/{job_id}?points=500",
+    "risk": "/api/risk/{job_id}",
+    "insights": "/api/insights/{job_id}",
+}
+
+def seed(epochs: int) -> tuple:
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    scenario = Scenario(
+        weather="rain", time_of_day="night", traffic_density=0.5,
+        road_type="city", object_count=20, dataset_size_mb=100.0
+    )
+    db.add(scenario)
+    db.flush()
+    jobs = [Job(scenario_id=scenario.id, compute_tier="small", epochs=epochs, cost_estimate=0.0, status=status)
+            for status in ("completed", "running")]
+    db.add_all(jobs)
+    db.flush()
+    start = datetime.utcnow() - timedelta(hours=1)
+    for job in jobs:
+        db.execute(insert(Metric), [
+            {"job_id": job.id, "epoch": e + 1, "loss": 1 / (e + 1), "accuracy": 0.9, "detection_score": 0.8}
+            for e in range(epochs)
+        ])
+        db.execute(insert(ComputeMetric), [
+            {"job_id": job.id, "gpu_utilization": 80.0, "vram_usage": 12.0, "cpu_usage": 40.0,
+             "timestamp": start + timedelta(seconds=e * 0.5)}
+            for e in range(epochs)
+        ])
+        db.add(RiskAnalysis(job_id=job.id, collision_probability=0.1, pedestrian_risk=0.1,
+                            visibility_risk=0.2, safety_score=80.0))
+        db.add_all([Insight(job_id=job.id, insight_text=f"Insight {i}") for i in range(3)])
+    job_ids = jobs[0].id, jobs[1].id
+    db.commit()
+    db.close()
+    return job_ids
+
+def best_of(fn, repeat: int) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return min(times) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--epochs", type=int, default=5000, help="metrics and compute samples of the job")
+    parser.add_argument("--repeat", type=int, default=10)
+    args = parser.parse_args()
+
+    completed, running = seed(args.epochs)
+    client = TestClient(app)
+
+    def uncached(url):
+        response_cache.invalidate(completed)
+        return client.get(url)
+
+    backend = "sqlite stand-in" if standin.is_sqlite() else "postgres"
+    print(f"completed job with {args.epochs} epochs/samples, {backend}")
+    print(f"{'endpoint':<13} {'uncached ms':>12} {'cached ms':>10} {'304 ms':>8} {'KiB':>7}")
+    for name, path in ENDPOINTS.items():
+        url = path.format(job_id=completed)
+        first = uncached(url)
+        etag = first.headers["ETag"]
+        assert first.headers["Cache-Control"].startswith("max-age"), first.headers
+        cached = client.get(url)
+        assert cached.content == first.content and cached.headers["ETag"] == etag
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 304
+
+        cold_ms = best_of(lambda: uncached(url), args.repeat)
+        client.get(url)
+        hit_ms = best_of(lambda: client.get(url), args.repeat)
+        not_modified_ms = best_of(lambda: client.get(url, headers={"If-None-Match": etag}), args.repeat)
+        print(f"{name:<13} {cold_ms:>12.1f} {hit_ms:>10.1f} {not_modified_ms:>8.1f} {len(first.content) / 1024:>7.0f}")
+
+        response = client.get(path.format(job_id=running))
+        assert response.headers["Cache-Control"] == "no-cache" and running not in response_cache.job_urls
+    print("running job responses are revalidated every time and never cached")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""Wall time and request count of insights for a finished sweep, batched vs. per job.
+
+Run from the backend directory:
+
+    python -m benchmarks.insight_batching --jobs 500 --batch-sizes 1,10,25
+
+Every run starts from an empty database and insight cache, marks `--jobs`
+jobs completed with insight_status "pending" under this process's lease and
+hands them all to an InsightStage at once, the way a sweep finishing would.
+Insights are answered by benchmarks.stub_openai; `--malformed-rate` makes a
+share of the batched answers unparseable to exercise the per-job fallback.
+"""
+import argparse
+import os
+import time
+import uuid
+
+from benchmarks.stub_openai import StubOpenAI
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=500)
+    parser.add_argument("--batch-sizes", default="1,10,25")
+    parser.add_argument("--latency", type=float, default=0.5)
+    parser.add_argument("--item-latency", type=float, default=0.02)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    stub = StubOpenAI(latency=args.latency, item_latency=args.item_latency, malformed_rate=args.malformed_rate).start()
+    os.environ.update({"OPENAI_API_KEY": "stub-key", "OPENAI_BASE_URL": stub.base_url})
+
+    from benchmarks import standin
+    import numpy as np
+    from sqlalchemy import insert
+    from app.database import SessionLocal, engine, Base
+    from app.models import Scenario, Job, Insight
+    from app.insight_stage import InsightStage, insight_payload
+    from app.worker import WORKER_LEASE_SEC, lease_deadline, worker_id
+    from app.services.insight_cache import insight_cache
+
+    print(f"{args.jobs} jobs, stub latency {args.latency:g}s + {args.item_latency:g}s per batched insight, "
+          f"{args.concurrency} requests in flight")
+    for batch_size in (int(size) for size in args.batch_sizes.split(",")):
+        Base.metadata.drop_all(bind=engine)
+        Base.metadata.create_all(bind=engine)
+        insight_cache.memory.clear()
+        rng = np.random.default_rng(0)
+
+        db = SessionLocal()
+        scenarios = [
+            {"id": uuid.uuid4(), "weather": weather, "time_of_day": time_of_day, "traffic_density": density,
+             "road_type": "city", "object_count": 20, "dataset_size_mb": 100.0}
+            for weather in ("sunny", "rain", "fog", "snow")
+            for time_of_day in ("day", "night")
+            for density in (0.2, 0.5, 0.8)
+        ]
+        db.execute(insert(Scenario), scenarios)
+        db.execute(insert(Job), [
+            {"id": uuid.uuid4(), "scenario_id": scenarios[i % len(scenarios)]["id"], "compute_tier": "small",
+             "epochs": 10 + i % 41, "cost_estimate": 0.0, "status": "completed", "insight_status": "pending",
+             "worker_id": worker_id(), "lease_expires_at": lease_deadline()}
+            for i in range(args.jobs)
+        ])
+        db.commit()
+        jobs = db.query(Job).all()
+        payloads = [
+            insight_payload(job, float(rng.uniform(0.05, 0.5)), float(rng.uniform(0.7, 0.98)), float(rng.uniform(0.6, 0.95)), {
+                "collision_probability": float(rng.uniform(0, 0.6)),
+                "pedestrian_risk": float(rng.uniform(0, 0.6)),
+                "visibility_risk": float(rng.uniform(0, 0.7)),
+                "safety_score": float(rng.uniform(40, 95))
+            })
+            for job in jobs
+        ]
+
+        stage = InsightStage(worker_id(), WORKER_LEASE_SEC, concurrency=args.concurrency,
+                             batch_size=batch_size, batch_window=0.2)
+        stage.start()
+        requests_before, batches_before = stub.requests, stub.batches
+        start = time.perf_counter()
+        futures = [stage.submit(job.id, payload) for job, payload in zip(jobs, payloads)]
+        for future in futures:
+            future.result()
+        elapsed = time.perf_counter() - start
+        stage.stop(timeout=5)
+
+        stored = db.query(Insight).count()
+        pending = db.query(Job).filter(Job.insight_status == "pending").count()
+        db.close()
+        print(f"batch size {batch_size:3d}: {elapsed:6.2f} s, {stub.requests - requests_before:4d} requests "
+              f"({stub.batches - batches_before} batched), {stored} insights stored, {pending} jobs pending")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,44 @@
+"""Headless lap simulation throughput: AI laps per second of CPU.
+
+Run from the backend directory:
+
+    python -m benchmarks.lap_simulation --cars 1 100 1000 4000 --laps 1
+
+Races the given numbers of AI drivers on every raceable preset map with the
+NumPy lockstep engine (no telemetry recorded, as in a lap simulation job) and
+reports CPU time, completed laps per CPU second and the lap times reached.
+Surface grids are built before timing; see benchmarks.track_grid for their cost.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.track_maps import get_map, map_keys
+from app.services.lap_engine import driver_params, simulate_laps
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cars", type=int, nargs="+", default=[1, 100, 1000, 4000])
+    parser.add_argument("--laps", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    tracks = [get_map(key) for key in map_keys() if get_map(key).lappable]
+    for track in tracks:
+        track.grids
+    print(f"{'map':8s} {'cars':>6s} {'cpu s':>8s} {'laps/cpu s':>11s} {'finished':>9s} {'best lap':>9s} {'median':>7s}")
+    for track in tracks:
+        for cars in args.cars:
+            params = driver_params(cars, np.random.default_rng(args.seed))
+            start = time.process_time()
+            result = simulate_laps(track, params, args.laps)
+            cpu = time.process_time() - start
+            laps = int(result["laps"].sum())
+            finished = result["total_time"][~np.isnan(result["total_time"])]
+            best = np.nanmin(result["best_lap"]) if laps else float("nan")
+            median = np.median(finished) if len(finished) else float("nan")
+            print(f"{track.key:8s} {cars:6d} {cpu:8.2f} {laps / cpu:11.0f} {len(finished):9d} {best:8.2f}s {median:6.2f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+"""Latency of GET /api/jobs/ and /api/scenarios/ at growing table sizes.
+
+Run from the backend directory:
+
+    python -m benchmarks.list_latency --rows 10000,100000,1000000
+
+"before" replays the previous implementation (a full COUNT plus loading every
+scenario id to build display indices); "after" calls the endpoints, which read
+one page and take the indices from the persisted seq columns.
+"""
+import argparse
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks import standin
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert
+from sqlalchemy.orm import joinedload
+from app.database import SessionLocal, engine, Base
+from app.models import Scenario, Job
+from app.main import app
+
+WEATHER = ["sunny", "rain", "fog", "snow"]
+TIERS = ["small", "medium", "large"]
+STATUSES = ["completed"] * 8 + ["running", "pending"]
+CHUNK = 50000
+
+def seed(rows: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    start = datetime(2025, 1, 1)
+    with engine.begin() as conn:
+        for offset in range(0, rows, CHUNK):
+            scenarios = [
+                {"id": uuid.uuid4(), "seq": i + 1, "weather": random.choice(WEATHER), "time_of_day": "day",
+                 "traffic_density": 0.5, "road_type": "city", "object_count": 10, "dataset_size_mb": 100.0,
+                 "created_at": start + timedelta(seconds=i)}
+                for i in range(offset, min(rows, offset + CHUNK))
+            ]
+            conn.execute(insert(Scenario), scenarios)
+            conn.execute(insert(Job), [
+                {"id": uuid.uuid4(), "seq": s["seq"], "scenario_id": s["id"], "compute_tier": random.choice(TIERS),
+                 "epochs": 20, "status": random.choice(STATUSES), "progress": 100.0, "runtime_sec": 20.0,
+                 "cost_estimate": 1.0, "created_at": s["created_at"]}
+                for s in scenarios
+            ])
+
+def list_jobs_before(skip: int = 0, limit: int = 100):
+    """The pre-seq implementation of list_jobs, kept here for comparison"""
+    db = SessionLocal()
+    try:
+        jobs = db.query(Job).options(joinedload(Job.scenario)).order_by(Job.created_at.desc()).offset(skip).limit(limit).all()
+        total_jobs = db.query(Job).count()
+        scenario_ids = db.query(Scenario.id).order_by(Scenario.created_at.asc()).all()
+        scenario_map = {sid[0]: i + 1 for i, sid in enumerate(scenario_ids)}
+        return [(total_jobs - skip - i, scenario_map.get(job.scenario_id)) for i, job in enumerate(jobs)]
+    finally:
+        db.close()
+
+def list_scenarios_before(skip: int = 0, limit: int = 100):
+    db = SessionLocal()
+    try:
+        total_count = db.query(Scenario).count()
+        scenarios = db.query(Scenario).order_by(Scenario.created_at.desc()).offset(skip).limit(limit).all()
+        return [total_count - skip - i for i in range(len(scenarios))]
+    finally:
+        db.close()
+
+def best_of(fn, repeat=3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", default="10000,100000")
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    backend = "sqlite stand-in" if standin.is_sqlite() else "postgres"
+    print(f"page of 100, {backend}, best of 3 (ms)")
+    print(f"{'rows':>9} {'jobs before':>12} {'jobs after':>11} {'scen. before':>13} {'scen. after':>12} "
+          f"{'status=running':>15} {'tier=large':>11} {'weather=fog':>12}")
+    for rows in [int(r) for r in args.rows.split(",")]:
+        seed(rows)
+        get = lambda url: client.get(url).raise_for_status()
+        print(
+            f"{rows:>9} "
+            f"{best_of(list_jobs_before):>12.1f} "
+            f"{best_of(lambda: get('/api/jobs/')):>11.1f} "
+            f"{best_of(list_scenarios_before):>13.1f} "
+            f"{best_of(lambda: get('/api/scenarios/')):>12.1f} "
+            f"{best_of(lambda: get('/api/jobs/?status=running')):>15.1f} "
+            f"{best_of(lambda: get('/api/jobs/?tier=large')):>11.1f} "
+            f"{best_of(lambda: get('/api/jobs/?weather=fog')):>12.1f}"
+        )
+
+if __name__ == "__main__":
+    main()
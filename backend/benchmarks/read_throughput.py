@@ -0,0 +1,94 @@
+"""Read endpoint throughput of a single uvicorn worker.
+
+Run from the backend directory:
+
+    python -m benchmarks.read_throughput --clients 50 --duration 20
+
+Starts one uvicorn worker on a seeded database and has `--clients` concurrent
+clients hammer the read endpoints the dashboard polls (job list, job, metrics,
+compute metrics, risk analysis, insights), each request for a random job.
+Reports requests per second overall and per endpoint, with latency percentiles,
+so the same run against another checkout (e.g. a `git worktree` of an older
+commit) compares implementations on the same machine.
+
+Set DATABASE_URL to benchmark a real Postgres instance (reads go through
+asyncpg); otherwise a SQLite stand-in in WAL mode is used, read through
+aiosqlite (pip install aiosqlite).
+"""
+import argparse
+import asyncio
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter, defaultdict
+
+import httpx
+import numpy as np
+
+from benchmarks import standin
+from benchmarks.api_load import SERVE, seed, wait_for
+
+ENDPOINTS = {
+    "jobs list": "/api/jobs/?limit=20",
+    "job": "/api/jobs/{job_id}",
+    "metrics": "/api/metrics/{job_id}?limit=100",
+    "compute": "/api/compute/{job_id}?limit=100",
+    "risk": "/api/risk/{job_id}",
+    "insights": "/api/insights/{job_id}",
+}
+
+async def client_loop(client: httpx.AsyncClient, job_ids: list, deadline: float, latencies: dict, errors: list):
+    while time.perf_counter() < deadline:
+        name, path = random.choice(list(ENDPOINTS.items()))
+        start = time.perf_counter()
+        try:
+            response = await client.get(path.format(job_id=random.choice(job_ids)))
+            if response.status_code != 200:
+                errors.append(response.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies[name].append(time.perf_counter() - start)
+
+async def load(base_url: str, clients: int, duration: float, job_ids: list) -> tuple:
+    latencies, errors = defaultdict(list), []
+    limits = httpx.Limits(max_connections=clients, max_keepalive_connections=clients)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        # Warm up connections and caches before measuring
+        await client_loop(client, job_ids, time.perf_counter() + 1, defaultdict(list), [])
+        deadline = time.perf_counter() + duration
+        await asyncio.gather(*(client_loop(client, job_ids, deadline, latencies, errors) for _ in range(clients)))
+    return latencies, errors
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, default=50)
+    parser.add_argument("--duration", type=float, default=20, help="seconds of load")
+    parser.add_argument("--history", type=int, default=500, help="completed jobs with metrics to read")
+    parser.add_argument("--epochs", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8766)
+    args = parser.parse_args()
+
+    job_ids = seed(args.history, args.epochs, 0)
+    base_url = f"http://127.0.0.1:{args.port}"
+    api = subprocess.Popen([sys.executable, "-c", SERVE.format(port=args.port)], env=dict(os.environ))
+    try:
+        wait_for(base_url)
+        latencies, errors = asyncio.run(load(base_url, args.clients, args.duration, job_ids))
+    finally:
+        api.terminate()
+        api.wait(30)
+
+    backend = "sqlite stand-in" if standin.is_sqlite() else "postgres"
+    total = sum(len(values) for values in latencies.values())
+    print(f"{args.clients} clients, {args.duration:g} s on {backend}, one uvicorn worker")
+    print(f"requests: {total} ({total / args.duration:.0f}/s), errors: {dict(Counter(errors)) or 0}")
+    print(f"{'endpoint':<10} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name in ENDPOINTS:
+        ms = np.array(latencies[name]) * 1000
+        print(f"{name:<10} {len(ms) / args.duration:>7.0f} {np.percentile(ms, 50):>8.1f} "
+              f"{np.percentile(ms, 95):>8.1f} {np.percentile(ms, 99):>8.1f}")
+
+if __name__ == "__main__":
+    main()
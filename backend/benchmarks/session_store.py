@@ -0,0 +1,100 @@
+"""Persisted driving sessions: storage size and time-window frame queries.
+
+Run from the backend directory:
+
+    python -m benchmarks.session_store --sessions 20 --minutes 5
+
+Records sessions through the chunked upload endpoints (5-second chunks at
+10 Hz, as InteractiveDriving.jsx sends them), then compares the stored chunk
+bytes with the packed frames and with a row-per-frame layout, and times
+GET /api/sessions/{id}/frames for a 10-second window and a whole session.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from benchmarks import standin
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func
+from app.main import app
+from app.database import SessionLocal
+from app.models import DrivingSessionChunk
+from app.services.driving_telemetry import FRAME_DTYPE, FRAME_RATE
+
+# Approximate Postgres size of one frame as its own row: 24-byte tuple header,
+# 4-byte line pointer, a 16-byte id and a 16-byte session id plus the frame columns
+ROW_PER_FRAME_BYTES = 24 + 4 + 16 + 16 + 8 + 4 * 4 + 2 + 2
+
+def drive(rng, n: int, t0: float) -> np.ndarray:
+    """A lap-like trace: position on an ellipse, smoothly varying speed and inputs held for a while"""
+    frames = np.zeros(n, dtype=FRAME_DTYPE)
+    phase = np.cumsum(rng.uniform(0.01, 0.03, n))
+    frames["t"] = t0 + np.arange(n) * 1000 / FRAME_RATE
+    frames["x"] = 400 + 300 * np.cos(phase)
+    frames["y"] = 300 + 180 * np.sin(phase)
+    frames["speed"] = np.round(12 + 8 * np.sin(phase * 3) + rng.normal(0, 0.3, n), 2)
+    frames["angle"] = phase + np.pi / 2
+    frames["surface"] = np.repeat(rng.random(n // 20 + 1) < 0.1, 20)[:n]
+    frames["input"] = np.repeat(rng.integers(0, 32, n // 10 + 1), 10)[:n]
+    return frames
+
+def best_of(repeat: int, fn) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sessions", type=int, default=20)
+    parser.add_argument("--minutes", type=float, default=5)
+    parser.add_argument("--chunk", type=int, default=50, help="frames per uploaded chunk")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    client = TestClient(app)
+    rng = np.random.default_rng(0)
+    n = int(args.minutes * 60 * FRAME_RATE)
+    session_ids = []
+    start = time.perf_counter()
+    for i in range(args.sessions):
+        session_id = client.post("/api/insights/driving-sessions", json={"map": "oval"}).json()["session_id"]
+        frames = drive(rng, n, 1.7e12 + i * 1e7)
+        for offset in range(0, n, args.chunk):
+            response = client.post(f"/api/insights/driving-sessions/{session_id}/chunks",
+                                   content=frames[offset:offset + args.chunk].tobytes(),
+                                   headers={"Content-Type": "application/octet-stream"})
+            assert response.status_code == 200, response.text
+        session_ids.append(session_id)
+    upload = time.perf_counter() - start
+
+    db = SessionLocal()
+    chunks, stored = db.query(func.count(DrivingSessionChunk.id), func.sum(func.length(DrivingSessionChunk.data))).one()
+    db.close()
+    total = args.sessions * n
+    packed = total * FRAME_DTYPE.itemsize
+    print(f"{args.sessions} sessions x {n} frames ({args.minutes:g} min at {FRAME_RATE} Hz), {chunks} chunks")
+    print(f"upload:            {upload / chunks * 1000:6.2f} ms per chunk")
+    print(f"row per frame:     {total * ROW_PER_FRAME_BYTES / 1e6:6.2f} MB (estimated, {total} rows)")
+    print(f"packed frames:     {packed / 1e6:6.2f} MB")
+    print(f"compressed chunks: {stored / 1e6:6.2f} MB ({packed / stored:.1f}x smaller than packed)")
+
+    session_id = session_ids[-1]
+    whole = client.get(f"/api/sessions/{session_id}/frames").json()
+    assert whole["frames"] == n
+    window = client.get(f"/api/sessions/{session_id}/frames", params={"start": 60, "end": 70}).json()
+    assert window["frames"] == 10 * FRAME_RATE + 1, window["frames"]
+
+    for name, params in (("10 s window", {"start": 60, "end": 70}), ("whole session", {}),
+                         ("whole session, binary", {"format": "binary"})):
+        seconds = best_of(args.repeat, lambda: client.get(f"/api/sessions/{session_id}/frames", params=params))
+        print(f"frames, {name:22s} {seconds * 1000:6.2f} ms")
+    seconds = best_of(args.repeat, lambda: client.get("/api/sessions/", params={"map": "oval", "driver": "human"}))
+    print(f"list sessions:                  {seconds * 1000:6.2f} ms")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,24 @@
+"""Local database stand-in for the benchmarks.
+
+Import this module before anything from `app`. When DATABASE_URL is not set the
+benchmarks run against a throwaway SQLite file, with the Postgres UUID column
+type rendered as CHAR(32) so the models can be created there unchanged.
+"""
+import os
+import tempfile
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.ext.compiler import compiles
+
+@compiles(UUID, "sqlite")
+def _compile_uuid_sqlite(type_, compiler, **kw):
+    return "CHAR(32)"
+
+if "DATABASE_URL" not in os.environ:
+    _path = os.path.join(tempfile.mkdtemp(prefix="aumovio_bench_"), "bench.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{_path}"
+
+# The OpenAI client refuses to construct without a key; the placeholder keeps the worker on its fallback path
+os.environ.setdefault("OPENAI_API_KEY", "your_openai_api_key_here")
+
+def is_sqlite() -> bool:
+    return os.environ["DATABASE_URL"].startswith("sqlite")
@@ -0,0 +1,154 @@
+"""Local stand-in for the OpenAI chat completions API.
+
+Serves POST /v1/chat/completions with a canned completion after a configurable
+delay, and can inject server errors (at random, or for the next `fail_next`
+requests) and hung requests to exercise timeouts and retries. JSON-mode requests
+for batched insights are answered with one entry per request id, after an extra
+delay per entry; a share of them can be made malformed to exercise the per-job
+fallback. Point the client at it with
+OPENAI_BASE_URL=http://127.0.0.1:<port>/v1.
+
+Standalone:
+
+    python -m benchmarks.stub_openai --port 8765 --latency 0.3 --error-rate 0.1
+"""
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+class StubOpenAI(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.2,
+        error_rate: float = 0.0,
+        hang_rate: float = 0.0,
+        hang: float = 30.0,
+        item_latency: float = 0.02,
+        malformed_rate: float = 0.0
+    ):
+        super().__init__(("127.0.0.1", port), StubHandler)
+        self.latency = latency
+        self.item_latency = item_latency
+        self.malformed_rate = malformed_rate
+        self.error_rate = error_rate
+        self.hang_rate = hang_rate
+        self.hang = hang
+        self.fail_next = 0
+        self.requests = 0
+        self.errors = 0
+        self.hangs = 0
+        self.batches = 0
+        self.lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+    def outcome(self) -> str:
+        with self.lock:
+            self.requests += 1
+            if self.fail_next > 0:
+                self.fail_next -= 1
+                self.errors += 1
+                return "error"
+            roll = random.random()
+            if roll < self.error_rate:
+                self.errors += 1
+                return "error"
+            if roll < self.error_rate + self.hang_rate:
+                self.hangs += 1
+                return "hang"
+        return "ok"
+
+def batch_requests(prompt: str) -> list:
+    """The JSON list of {"id", "request"} objects that follows "Requests:" in a batched prompt"""
+    start = prompt.find("[", prompt.find("Requests:"))
+    if start < 0:
+        return []
+    requests, _ = json.JSONDecoder().raw_decode(prompt[start:])
+    return requests
+
+class StubHandler(BaseHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        if not self.path.endswith("/chat/completions"):
+            return self.reply(404, {"error": {"message": "not found"}})
+
+        outcome = self.server.outcome()
+        prompt = body.get("messages", [{}])[-1].get("content", "")
+        json_mode = (body.get("response_format") or {}).get("type") == "json_object"
+        requests = batch_requests(prompt) if json_mode else []
+        if outcome == "hang":
+            time.sleep(self.server.hang)
+        else:
+            time.sleep(self.server.latency + self.server.item_latency * len(requests))
+        if outcome == "error":
+            return self.reply(500, {"error": {"message": "injected failure", "type": "server_error"}})
+
+        if json_mode:
+            with self.server.lock:
+                self.server.batches += 1
+            if random.random() < self.server.malformed_rate:
+                content = '{"insights": [{"id": "0", "text": "trunc'
+            else:
+                content = json.dumps({"insights": [
+                    {"id": request["id"], "text": f"Stub insight for a {len(request['request'])}-character prompt."}
+                    for request in requests
+                ]})
+        else:
+            content = f"Stub insight for a {len(prompt)}-character prompt."
+        self.reply(200, {
+            "id": "chatcmpl-stub",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "stub"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+        })
+
+    def reply(self, status: int, payload: dict):
+        data = json.dumps(payload).encode()
+        try:
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+        except (BrokenPipeError, ConnectionResetError):
+            # The client gave up on a hung request
+            pass
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.2)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--hang-rate", type=float, default=0.0)
+    parser.add_argument("--item-latency", type=float, default=0.02)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = StubOpenAI(args.port, args.latency, args.error_rate, args.hang_rate,
+                        item_latency=args.item_latency, malformed_rate=args.malformed_rate)
+    print(f"Stub OpenAI API on {server.base_url}")
+    server.serve_forever()
+
+if __name__ == "__main__":
+    main()
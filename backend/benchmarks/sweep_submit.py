@@ -0,0 +1,56 @@
+"""Time to submit a parameter sweep through POST /api/sweeps/.
+
+Run from the backend directory:
+
+    python -m benchmarks.sweep_submit
+
+The default grid is 4 weathers x 4 times of day x 5 traffic densities x
+5 road types (400 scenarios) x 5 tiers x 5 epoch counts = 10,000 jobs.
+"""
+import argparse
+import time
+
+from benchmarks import standin
+
+from fastapi.testclient import TestClient
+from app.database import SessionLocal, engine, Base
+from app.models import Job
+from app.main import app
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--densities", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    payload = {
+        "weather": ["sunny", "rain", "fog", "snow"],
+        "time_of_day": ["day", "night", "dawn", "dusk"],
+        "traffic_density": [round(i / args.densities, 3) for i in range(args.densities)],
+        "road_type": ["city", "highway", "rural", "suburban", "mountain"],
+        "compute_tier": ["small", "medium", "large", "xlarge", "spot"],
+        "epochs": [10, 20, 30, 40, 50],
+        "fast_forward": True
+    }
+
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    client = TestClient(app)
+    timings = []
+    for _ in range(args.repeat):
+        start = time.perf_counter()
+        response = client.post("/api/sweeps/", json=payload)
+        timings.append(time.perf_counter() - start)
+        response.raise_for_status()
+    total_jobs = response.json()["total_jobs"]
+
+    db = SessionLocal()
+    assert db.query(Job).count() == total_jobs * args.repeat
+    db.close()
+
+    backend = "sqlite stand-in" if standin.is_sqlite() else "postgres"
+    print(f"{total_jobs} jobs per sweep, {backend}: best {min(timings) * 1000:.0f} ms, "
+          f"worst {max(timings) * 1000:.0f} ms over {args.repeat} sweeps")
+
+if __name__ == "__main__":
+    main()
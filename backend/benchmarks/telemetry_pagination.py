@@ -0,0 +1,116 @@
+"""Metrics/telemetry endpoint latency on a job with 100k samples.
+
+Run from the backend directory:
+
+    python -m benchmarks.telemetry_pagination --samples 100000 --other-jobs 4
+
+Compares a full download with incremental "since" polls, keyset pages and an
+LTTB-downsampled series,
+with and without the (job_id, epoch) / (job_id, timestamp) indexes. Other
+jobs' rows are added so the indexes have something to skip over.
+"""
+import argparse
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from benchmarks import standin
+
+from fastapi.testclient import TestClient
+from sqlalchemy import insert, text
+from app.database import SessionLocal, engine, Base
+from app.models import Scenario, Job, Metric, ComputeMetric
+from app.main import app
+
+INDEXES = ["ix_metrics_job_id_epoch", "ix_compute_metrics_job_id_timestamp"]
+
+def seed(samples: int, other_jobs: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    scenario = Scenario(
+        weather="fog", time_of_day="night", traffic_density=0.7,
+        road_type="city", object_count=40, dataset_size_mb=100.0
+    )
+    db.add(scenario)
+    db.flush()
+    job_ids = []
+    for _ in range(other_jobs + 1):
+        # Running, so every request reaches the database instead of the response cache
+        job = Job(scenario_id=scenario.id, compute_tier="large", epochs=samples, cost_estimate=0.0, status="running")
+        db.add(job)
+        db.flush()
+        job_ids.append(job.id)
+    db.commit()
+
+    start = datetime(2026, 1, 1)
+    for job_id in job_ids:
+        db.execute(insert(Metric), [
+            {"id": uuid.uuid4(), "job_id": job_id, "epoch": i, "loss": 1.0, "accuracy": 0.9, "detection_score": 0.8}
+            for i in range(1, samples + 1)
+        ])
+        db.execute(insert(ComputeMetric), [
+            {"id": uuid.uuid4(), "job_id": job_id, "gpu_utilization": 80.0, "vram_usage": 60.0,
+             "cpu_usage": 40.0, "timestamp": start + timedelta(seconds=i)}
+            for i in range(samples)
+        ])
+        db.commit()
+    db.close()
+    return job_ids[-1], start + timedelta(seconds=samples - 1)
+
+def timed(client, url, repeat=3) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        response = client.get(url)
+        best = min(best, time.perf_counter() - t0)
+        response.raise_for_status()
+    return best * 1000
+
+def walk_pages(client, url, page_size) -> float:
+    t0 = time.perf_counter()
+    cursor_param = "since_epoch" if "/metrics/" in url else "cursor"
+    next_url = f"{url}?limit={page_size}"
+    while next_url:
+        response = client.get(next_url)
+        cursor = response.headers.get("X-Next-Cursor")
+        next_url = f"{url}?limit={page_size}&{cursor_param}={cursor}" if cursor else None
+    return (time.perf_counter() - t0) * 1000
+
+def run_suite(client, job_id, last_ts, samples):
+    metrics_url, compute_url = f"/api/metrics/{job_id}", f"/api/compute/{job_id}"
+    mid = samples // 2
+    return [
+        ("metrics full download", timed(client, metrics_url, 1)),
+        ("metrics since last epoch", timed(client, f"{metrics_url}?since_epoch={samples}")),
+        ("metrics page of 500 mid-series", timed(client, f"{metrics_url}?since_epoch={mid}&limit=500")),
+        ("metrics walk all, pages of 5000", walk_pages(client, metrics_url, 5000)),
+        ("compute full download", timed(client, compute_url, 1)),
+        ("compute since last sample", timed(client, f"{compute_url}?since={last_ts.isoformat()}")),
+        ("compute walk all, pages of 5000", walk_pages(client, compute_url, 5000)),
+        ("compute downsampled to 500 points", timed(client, f"{compute_url}?points=500", 1)),
+    ]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--samples", type=int, default=100000)
+    parser.add_argument("--other-jobs", type=int, default=4)
+    args = parser.parse_args()
+
+    job_id, last_ts = seed(args.samples, args.other_jobs)
+    client = TestClient(app)
+
+    with_indexes = run_suite(client, job_id, last_ts, args.samples)
+    with engine.begin() as conn:
+        for name in INDEXES:
+            conn.execute(text(f"DROP INDEX {name}"))
+    without_indexes = run_suite(client, job_id, last_ts, args.samples)
+
+    backend = "sqlite stand-in" if standin.is_sqlite() else "postgres"
+    print(f"{args.samples} samples per job, {args.other_jobs + 1} jobs, {backend}")
+    print(f"{'query':<34} {'indexed ms':>11} {'no index ms':>12}")
+    for (name, indexed), (_, unindexed) in zip(with_indexes, without_indexes):
+        print(f"{name:<34} {indexed:>11.1f} {unindexed:>12.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Surface lookups: exact road geometry vs. the precomputed per-map grids.
+
+Run from the backend directory:
+
+    python -m benchmarks.track_grid --points 1000000
+
+For every preset map with a road, reports the one-off grid build time, then
+classifies random canvas positions as road/off-road with the exact
+O(segments) geometry test and with the occupancy grid, and compares the
+grid's signed and centerline distances with the exact ones.
+"""
+import argparse
+import time
+
+import numpy as np
+
+from app.services.track_maps import TRACK_GRID_CELL, get_map, map_keys
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--points", type=int, default=1_000_000)
+    parser.add_argument("--exact-points", type=int, default=100_000, help="positions checked with the exact test")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    print(f"grid cell {TRACK_GRID_CELL:g} px")
+    print(f"{'map':8s} {'segments':>8s} {'build':>7s} {'exact/pt':>9s} {'grid/pt':>8s} {'speedup':>8s} "
+          f"{'agree':>8s} {'max sdf err':>11s} {'max cl err':>10s}")
+    for key in map_keys():
+        track = get_map(key)
+        if not len(track.centerline_starts):
+            continue
+        _, build = timed(lambda: track.grids)
+        x = rng.uniform(0, track.width, args.points)
+        y = rng.uniform(0, track.height, args.points)
+        n = args.exact_points
+
+        (signed, centerline), exact = timed(lambda: track.exact_distances(x[:n], y[:n]))
+        road, grid = timed(lambda: track.on_road(x, y))
+        agree = np.mean(road[:n] == (signed <= 0))
+        sdf_error = np.abs(track.road_distance(x[:n], y[:n]) - signed).max()
+        cl_error = np.abs(track.centerline_distance(x[:n], y[:n]) - centerline).max()
+        exact_per_point, grid_per_point = exact / n, grid / args.points
+        print(f"{key:8s} {len(track.centerline_starts):8d} {build:6.2f}s {exact_per_point * 1e9:7.0f}ns "
+              f"{grid_per_point * 1e9:6.1f}ns {exact_per_point / grid_per_point:7.0f}x {agree:8.3%} "
+              f"{sdf_error:9.2f}px {cl_error:8.2f}px")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Worker pool benchmark: lap simulation throughput against pool size, plus crash and drain recovery.
+
+Run from the backend directory:
+
+    python -m benchmarks.worker_pool --processes 1 2 4 --jobs 24 --cars 500
+
+Each run starts app.supervisor with the given number of worker processes on a
+queue of CPU-bound lap_simulation jobs and reports completed jobs per minute
+(every process builds the map's surface grids once, included in the time).
+Then two recovery checks run on live training jobs:
+
+- crash: one worker is SIGKILLed mid-job; the supervisor restarts it and
+  requeues its jobs, and every job still completes.
+- drain: the supervisor gets SIGTERM while jobs are running; jobs that do not
+  finish within WORKER_DRAIN_TIMEOUT are back to pending and none is left running.
+
+Set DATABASE_URL to benchmark a real Postgres instance; otherwise a SQLite
+stand-in is used.
+"""
+import argparse
+import os
+import signal
+import threading
+import time
+
+from sqlalchemy import func
+
+from benchmarks import standin
+
+# Training epochs take ~0.2 s and draining gives up after 1 s, so the recovery checks finish quickly
+os.environ.setdefault("SIMULATION_TIME_SCALE", "0.02")
+os.environ.setdefault("WORKER_DRAIN_TIMEOUT", "1")
+os.environ.setdefault("WORKER_POLL_INTERVAL", "0.2")
+os.environ.setdefault("WORKER_TIER_CONCURRENCY", "small=4,medium=4,large=4")
+
+from app.database import SessionLocal, engine, Base
+from app.models import Scenario, Job
+from app.supervisor import Supervisor
+
+def reset_queue(jobs: int, **fields):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        scenario = Scenario(
+            weather="rain", time_of_day="night", traffic_density=0.5,
+            road_type="city", object_count=20, dataset_size_mb=100.0
+        )
+        db.add(scenario)
+        db.flush()
+        tiers = ["small", "medium", "large"]
+        for i in range(jobs):
+            db.add(Job(scenario_id=scenario.id, compute_tier=tiers[i % len(tiers)], cost_estimate=0.0,
+                       status="pending", **fields))
+        db.commit()
+    finally:
+        db.close()
+
+def status_counts() -> dict:
+    db = SessionLocal()
+    try:
+        counts = dict(db.query(Job.status, func.count(Job.id)).group_by(Job.status).all())
+        return {status: counts.get(status, 0) for status in ("pending", "running", "completed", "failed")}
+    finally:
+        db.close()
+
+def supervise(processes: int, until, on_start=None) -> float:
+    """Run a supervisor in this (main) thread until `until(counts)` holds, then SIGTERM it; returns seconds"""
+    supervisor = Supervisor(processes)
+
+    def monitor():
+        if on_start:
+            on_start(supervisor)
+        while not until(status_counts()):
+            time.sleep(0.1)
+        os.kill(os.getpid(), signal.SIGTERM)
+
+    start = time.perf_counter()
+    threading.Thread(target=monitor, daemon=True).start()
+    supervisor.run()
+    return time.perf_counter() - start
+
+def throughput(processes: int, jobs: int, cars: int, laps: int) -> float:
+    reset_queue(jobs, job_type="lap_simulation", map="oval", cars=cars, epochs=laps)
+    elapsed = supervise(processes, lambda counts: counts["completed"] + counts["failed"] >= jobs)
+    return jobs / elapsed * 60
+
+def crash_check(processes: int, jobs: int) -> dict:
+    reset_queue(jobs, epochs=10)
+
+    def kill_one(supervisor):
+        while status_counts()["running"] == 0:
+            time.sleep(0.05)
+        time.sleep(0.5)
+        victim = supervisor.workers[0]
+        print(f"  killing worker 1 (pid {victim.pid})")
+        os.kill(victim.pid, signal.SIGKILL)
+
+    supervise(processes, lambda counts: counts["completed"] + counts["failed"] >= jobs, kill_one)
+    return status_counts()
+
+def drain_check(processes: int, jobs: int) -> dict:
+    reset_queue(jobs, epochs=100)
+    # Real-time jobs (10-30 s) cannot finish within the drain timeout; workers read it when spawned
+    os.environ["SIMULATION_TIME_SCALE"] = "1"
+    supervise(processes, lambda counts: counts["running"] >= processes)
+    return status_counts()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--jobs", type=int, default=24)
+    parser.add_argument("--cars", type=int, default=500)
+    parser.add_argument("--laps", type=int, default=1)
+    args = parser.parse_args()
+
+    backend = "sqlite stand-in" if standin.is_sqlite() else "postgres"
+    print(f"{args.jobs} lap jobs x {args.cars} cars x {args.laps} laps on {backend}, {os.cpu_count()} CPUs")
+    print(f"{'processes':>9} {'jobs/min':>10}")
+    for processes in args.processes:
+        print(f"{processes:>9} {throughput(processes, args.jobs, args.cars, args.laps):>10.1f}")
+
+    processes = max(args.processes)
+    print(f"crash check ({processes} processes): {crash_check(processes, 12)}")
+    print(f"drain check ({processes} processes): {drain_check(processes, 12)}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""Worker throughput benchmark: completed jobs per minute against worker count.
+
+Run from the backend directory:
+
+    python -m benchmarks.worker_throughput --jobs 60 --replicas 1,2,4 --concurrency 1,4
+
+Each replica is an independent JobScheduler draining the same queue, the way
+several worker containers would. Set DATABASE_URL to benchmark a real Postgres
+instance; otherwise a SQLite stand-in is used.
+"""
+import argparse
+import os
+import threading
+import time
+
+from benchmarks import standin
+
+# Jobs normally take 10-30 s; compress them so a run finishes in seconds
+os.environ.setdefault("SIMULATION_TIME_SCALE", "0.02")
+
+from app.database import SessionLocal, engine, Base
+from app.models import Scenario, Job
+from app import worker
+
+def reset_queue(jobs: int, epochs: int):
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        scenario = Scenario(
+            weather="rain", time_of_day="night", traffic_density=0.5,
+            road_type="city", object_count=20, dataset_size_mb=100.0
+        )
+        db.add(scenario)
+        db.flush()
+        tiers = ["small", "medium", "large"]
+        for i in range(jobs):
+            db.add(Job(
+                scenario_id=scenario.id, compute_tier=tiers[i % len(tiers)],
+                epochs=epochs, cost_estimate=0.0, status="pending"
+            ))
+        db.commit()
+    finally:
+        db.close()
+
+def completed_jobs() -> int:
+    db = SessionLocal()
+    try:
+        return db.query(Job).filter(Job.status.in_(["completed", "failed"])).count()
+    finally:
+        db.close()
+
+def run(jobs: int, epochs: int, replicas: int, concurrency: int) -> float:
+    reset_queue(jobs, epochs)
+    limits = {"small": concurrency, "medium": concurrency, "large": concurrency}
+    schedulers = [worker.JobScheduler(limits, concurrency, poll_interval=0.1) for _ in range(replicas)]
+    threads = [threading.Thread(target=s.run, daemon=True) for s in schedulers]
+
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    while completed_jobs() < jobs:
+        time.sleep(0.1)
+    elapsed = time.perf_counter() - start
+
+    for s in schedulers:
+        s.stop()
+    return jobs / elapsed * 60
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--jobs", type=int, default=60)
+    parser.add_argument("--epochs", type=int, default=10)
+    parser.add_argument("--replicas", default="1,2,4")
+    parser.add_argument("--concurrency", default="1,4", help="per-tier concurrency of each replica")
+    args = parser.parse_args()
+
+    backend = "sqlite stand-in" if standin.is_sqlite() else "postgres"
+    print(f"{args.jobs} jobs x {args.epochs} epochs on {backend}, time scale {worker.SIMULATION_TIME_SCALE}")
+    print(f"{'replicas':>8} {'per-tier':>8} {'jobs/min':>10}")
+    for replicas in [int(r) for r in args.replicas.split(",")]:
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            rate = run(args.jobs, args.epochs, replicas, concurrency)
+            print(f"{replicas:>8} {concurrency:>8} {rate:>10.1f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""Export jobs, their training metrics and compute telemetry for offline analysis.
+
+Run from the backend directory, e.g. for one sweep:
+
+    python export_data.py --out exports --sweep-id <id> --format parquet
+
+Writes jobs, metrics and compute files (or the --dataset ones) to --out, each
+streamed from a server-side cursor like GET /api/export/{dataset}. Rows carry
+job_id to join on. Reads DATABASE_URL.
+"""
+import argparse
+import os
+import time
+from uuid import UUID
+from app.database import engine
+from app.services.export import DATASETS, FORMATS, export, job_filters
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", default="exports", help="output directory")
+    parser.add_argument("--format", choices=list(FORMATS), default="parquet")
+    parser.add_argument("--dataset", choices=list(DATASETS), nargs="+", default=list(DATASETS))
+    parser.add_argument("--status")
+    parser.add_argument("--tier")
+    parser.add_argument("--weather")
+    parser.add_argument("--sweep-id", type=UUID)
+    parser.add_argument("--job-id", type=UUID, nargs="+")
+    args = parser.parse_args()
+
+    filters = job_filters(args.status, args.tier, args.weather, args.sweep_id, args.job_id)
+    os.makedirs(args.out, exist_ok=True)
+    for dataset in args.dataset:
+        path = os.path.join(args.out, f"{dataset}.{FORMATS[args.format][1]}")
+        start = time.perf_counter()
+        with engine.connect() as conn, open(path, "wb") as f:
+            for chunk in export(conn, dataset, args.format, filters):
+                f.write(chunk)
+        print(f"{path}: {os.path.getsize(path) / 2**20:.1f} MiB in {time.perf_counter() - start:.1f} s")
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,91 @@ import sys
 import os
 sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import Session
 from app.database import engine, Base
-from app.models import Scenario, Job, Metric, ComputeMetric, RiskAnalysis, Insight
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.services.analytics import rebuild_rollups
+
+# Serializes upgrades when several containers start at once (any key unique to this app)
+UPGRADE_LOCK_KEY = 0x41756D6F
+
+# Columns added to tables that already existed; IF NOT EXISTS makes each a no-op once applied
+ADDED_COLUMNS = [
+    ("scenarios", "seq INTEGER UNIQUE"),
+    ("jobs", "seq INTEGER UNIQUE"),
+    ("jobs", "fast_forward BOOLEAN NOT NULL DEFAULT false"),
+    ("jobs", "started_at TIMESTAMP"),
+    ("jobs", "sweep_id UUID REFERENCES sweeps (id)"),
+    ("jobs", "worker_id VARCHAR"),
+    ("jobs", "lease_expires_at TIMESTAMP"),
+    ("jobs", "attempts INTEGER NOT NULL DEFAULT 0"),
+    ("jobs", "insight_status VARCHAR"),
+    ("jobs", "job_type VARCHAR NOT NULL DEFAULT 'training'"),
+    ("jobs", "map VARCHAR"),
+    ("jobs", "cars INTEGER"),
+    ("driving_sessions", "positioned_frames INTEGER NOT NULL DEFAULT 0"),
+    ("driving_sessions", "off_road_frames INTEGER NOT NULL DEFAULT 0"),
+    ("driving_sessions", "centerline_sum DOUBLE PRECISION NOT NULL DEFAULT 0"),
+    ("driving_sessions", "job_id UUID REFERENCES jobs (id)"),
+]
+
+# Indexes replaced by ones with a different name or columns
+DROPPED_INDEXES = [
+    "ix_scenarios_created_at", "ix_scenarios_weather_created_at",
+    "ix_jobs_created_at", "ix_jobs_status_created_at", "ix_jobs_compute_tier_created_at",
+    "ix_jobs_compute_tier_created_at_id",
+]
+
+# Display-number columns and their sequences; rows from before the column are numbered oldest first
+SEQUENCES = [("scenarios", "scenarios_seq_seq"), ("jobs", "jobs_seq_seq")]
+
+def backfill_seq(conn, table: str, sequence: str):
+    """Number the rows without a seq after the numbered ones, by created_at, and move the sequence past them"""
+    if conn.execute(text(f"SELECT 1 FROM {table} WHERE seq IS NULL LIMIT 1")).first() is None:
+        return
+    conn.execute(text(f"""
+        UPDATE {table} SET seq = numbered.seq FROM (
+            SELECT id, (SELECT coalesce(max(seq), 0) FROM {table}) + row_number() OVER (ORDER BY created_at, id) AS seq
+            FROM {table} WHERE seq IS NULL
+        ) AS numbered
+        WHERE {table}.id = numbered.id
+    """))
+    conn.execute(text(f"SELECT setval('{sequence}', greatest((SELECT max(seq) FROM {table}), (SELECT last_value FROM {sequence})))"))
+
+def upgrade_database(bind=engine):
+    """Create missing tables and bring existing ones up to the current models; safe to run repeatedly"""
+    with bind.begin() as conn:
+        if conn.dialect.name != "postgresql":
+            # The SQLite stand-in is always created from scratch
+            Base.metadata.create_all(bind=conn)
+            return
+        # DDL is transactional in Postgres: the whole upgrade applies or none of it
+        conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": UPGRADE_LOCK_KEY})
+        existing = set(inspect(conn).get_table_names())
+        Base.metadata.create_all(bind=conn)
+        for _, sequence in SEQUENCES:
+            conn.execute(text(f"CREATE SEQUENCE IF NOT EXISTS {sequence}"))
+        for table, column in ADDED_COLUMNS:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS {column}"))
+        for table, sequence in SEQUENCES:
+            backfill_seq(conn, table, sequence)
+        for name in DROPPED_INDEXES:
+            conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        # create_all only indexes the tables it creates
+        for table in Base.metadata.sorted_tables:
+            if table.name in existing:
+                for index in table.indexes:
+                    index.create(conn, checkfirst=True)
+        if "jobs" in existing and "analytics_rollups" not in existing:
+            # Roll up the jobs completed before the rollups existed; workers wait on the lock meanwhile
+            with Session(bind=conn) as db:
+                print(f"Rolled up {rebuild_rollups(db)} completed jobs")
 
 def init_database():
     """Initialize database tables"""
     print("Creating database tables...")
-    Base.metadata.create_all(bind=engine)
+    upgrade_database()
     print("Database initialized successfully!")
 
 if __name__ == "__main__":
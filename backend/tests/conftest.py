@@ -0,0 +1,22 @@
+import os
+import pytest
+
+# Never run against the database in DATABASE_URL: use TEST_DATABASE_URL (e.g. a scratch
+# Postgres database) or, by default, the benchmarks' throwaway SQLite stand-in
+os.environ.pop("DATABASE_URL", None)
+if os.getenv("TEST_DATABASE_URL"):
+    os.environ["DATABASE_URL"] = os.environ["TEST_DATABASE_URL"]
+import benchmarks.standin  # noqa: E402,F401  (before anything from app)
+
+@pytest.fixture(scope="session", autouse=True)
+def database():
+    from init_db import upgrade_database
+    upgrade_database()
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+    from app.main import app
+    # Entered, so the async engine's connections share TestClient's event loop
+    with TestClient(app) as c:
+        yield c
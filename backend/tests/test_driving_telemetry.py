@@ -0,0 +1,87 @@
+import json
+import numpy as np
+import pytest
+from app.services.driving_telemetry import FRAME_DTYPE, decode_binary, decode_columnar
+
+def frames(n=3, **values) -> np.ndarray:
+    data = np.zeros(n, dtype=FRAME_DTYPE)
+    data["t"] = np.arange(n) * 100.0
+    data["speed"] = 20.0
+    for field, value in values.items():
+        data[field][0] = value
+    return data
+
+def columnar(**values) -> bytes:
+    data = {"t": [0, 100], "x": [1, 2], "y": [3, 4], "speed": [10.5, 20], "angle": [0, 1.5], "surface": ["Road", "Grass"], "input": [1, 9]}
+    data.update(values)
+    return json.dumps(data).encode()
+
+def test_binary_roundtrip():
+    decoded = decode_binary(frames(x=12.5).tobytes())
+    assert len(decoded) == 3 and decoded["x"][0] == 12.5
+
+def test_binary_partial_record():
+    with pytest.raises(ValueError):
+        decode_binary(frames().tobytes()[:-1])
+
+@pytest.mark.parametrize("field", ["t", "x", "y", "speed", "angle"])
+@pytest.mark.parametrize("value", [np.nan, np.inf, -np.inf])
+def test_binary_rejects_non_finite(field, value):
+    with pytest.raises(ValueError, match=field):
+        decode_binary(frames(**{field: value}).tobytes())
+
+def test_columnar_surface_names_and_codes():
+    assert decode_columnar(columnar())["surface"].tolist() == [0, 1]
+    assert decode_columnar(columnar(surface=[1, 0]))["surface"].tolist() == [1, 0]
+
+def test_columnar_optional_position():
+    data = json.loads(columnar())
+    del data["x"], data["y"]
+    assert decode_columnar(json.dumps(data).encode())["x"].tolist() == [0, 0]
+
+@pytest.mark.parametrize("values", [
+    {"surface": ["Grass", 1]},
+    {"surface": [1, "Grass"]},
+    {"input": [300, 1]},
+    {"input": [-1, 1]},
+    {"input": [1.5, 1]},
+    {"input": [10 ** 30, 1]},
+    {"speed": ["fast", 1]},
+    {"speed": [None, 1]},
+    {"speed": [[1], [2]]},
+    {"speed": [1e300, 1]},
+    {"speed": [1]},
+])
+def test_columnar_rejects_bad_values(values):
+    with pytest.raises(ValueError):
+        decode_columnar(columnar(**values))
+
+@pytest.mark.parametrize("literal", ["NaN", "Infinity"])
+def test_columnar_rejects_non_finite(literal):
+    payload = columnar().replace(b'"speed": [10.5', f'"speed": [{literal}'.encode())
+    with pytest.raises(ValueError, match="speed"):
+        decode_columnar(payload)
+
+@pytest.mark.parametrize("values", [{"speed": np.nan}, {"x": np.nan}, {"t": np.inf}])
+def test_chunk_upload_rejects_non_finite(client, values):
+    session = client.post("/api/insights/driving-sessions", json={"map": "oval"}).json()
+    response = client.post(
+        f"/api/insights/driving-sessions/{session['session_id']}/chunks",
+        content=frames(**values).tobytes(), headers={"content-type": "application/octet-stream"}
+    )
+    assert response.status_code == 400
+    # Nothing of the rejected chunk was folded into the session
+    response = client.post(
+        f"/api/insights/driving-sessions/{session['session_id']}/chunks",
+        content=frames().tobytes(), headers={"content-type": "application/octet-stream"}
+    )
+    assert response.status_code == 200
+    assert response.json()["features"]["frames"] == 3
+
+@pytest.mark.parametrize("content_type,payload", [
+    ("application/octet-stream", frames(x=np.nan).tobytes()),
+    ("application/json", columnar(input=[300, 1])),
+], ids=["binary", "columnar"])
+def test_columnar_analysis_rejects_bad_frames(client, content_type, payload):
+    response = client.post("/api/insights/driving-session/columnar?map=oval", content=payload, headers={"content-type": content_type})
+    assert response.status_code == 400
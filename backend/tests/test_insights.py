@@ -0,0 +1,163 @@
+import asyncio
+import time
+import uuid
+from datetime import datetime, timedelta
+import pytest
+from openai import AsyncOpenAI, InternalServerError
+from app.database import SessionLocal
+from app.insight_stage import InsightStage, claim_insights
+from app.models import Insight, InsightCacheEntry, Job, Scenario
+from app.services import openai_service
+from app.services.insight_cache import insight_cache
+from benchmarks.stub_openai import StubOpenAI
+
+@pytest.fixture
+def stub(monkeypatch):
+    """A stub OpenAI server with an empty insight cache and no backoff between retries"""
+    server = StubOpenAI(latency=0, item_latency=0).start()
+    monkeypatch.setattr(openai_service, "async_client",
+                        AsyncOpenAI(api_key="test", base_url=server.base_url, timeout=5, max_retries=0))
+    monkeypatch.setattr(openai_service, "OPENAI_BACKOFF", 0)
+    monkeypatch.setattr(openai_service, "OPENAI_MAX_RETRIES", 2)
+    insight_cache.memory.clear()
+    db = SessionLocal()
+    db.query(InsightCacheEntry).delete()
+    db.commit()
+    db.close()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def payload(accuracy: float) -> dict:
+    """generate_job_insights arguments; distinct accuracies give distinct performance prompts, the safety prompt is shared"""
+    return {
+        "job_data": {"compute_tier": "small", "epochs": 5, "weather": "rain", "traffic_density": 0.3},
+        "metrics_data": {"final_loss": 0.2, "final_accuracy": accuracy, "detection_score": 0.8},
+        "risk_data": {"collision_probability": 0.1, "pedestrian_risk": 0.2, "visibility_risk": 0.3, "safety_score": 70.0},
+        "scenario_data": {"weather": "rain", "time_of_day": "night", "traffic_density": 0.3}
+    }
+
+def create_jobs(count: int, owner: str, lease_sec: float = 60) -> list:
+    """Completed jobs with pending insights leased to `owner`; returns their ids"""
+    db = SessionLocal()
+    try:
+        scenario = Scenario(weather="rain", time_of_day="night", traffic_density=0.3, road_type="urban", object_count=4, dataset_size_mb=1)
+        db.add(scenario)
+        db.flush()
+        jobs = [Job(scenario_id=scenario.id, compute_tier="small", epochs=5, status="completed", cost_estimate=1,
+                    insight_status="pending", worker_id=owner,
+                    lease_expires_at=datetime.utcnow() + timedelta(seconds=lease_sec))
+                for _ in range(count)]
+        db.add_all(jobs)
+        db.commit()
+        return [job.id for job in jobs]
+    finally:
+        db.close()
+
+def insight_state(job_ids: list) -> dict:
+    """job id -> (insight_status, number of stored insights)"""
+    db = SessionLocal()
+    try:
+        return {
+            job_id: (db.get(Job, job_id).insight_status, db.query(Insight).filter(Insight.job_id == job_id).count())
+            for job_id in job_ids
+        }
+    finally:
+        db.close()
+
+def test_batch_is_one_request(stub):
+    results = asyncio.run(openai_service.generate_batch_insights([payload(0.5 + i / 10) for i in range(3)]))
+    assert stub.requests == 1 and stub.batches == 1
+    assert all(len(texts) == 2 and all(texts) for texts in results)
+
+def test_identical_prompts_are_asked_once(stub):
+    results = asyncio.run(openai_service.generate_batch_insights([payload(0.5), payload(0.5)]))
+    assert stub.requests == 1
+    assert results[0] == results[1]
+    # Both insights are cached now
+    asyncio.run(openai_service.generate_batch_insights([payload(0.5)]))
+    assert stub.requests == 1
+
+def test_malformed_batch_falls_back_per_insight(stub):
+    stub.malformed_rate = 1.0
+    results = asyncio.run(openai_service.generate_batch_insights([payload(0.5), payload(0.6)]))
+    # The batch, then one request per distinct prompt: two performance, one safety
+    assert stub.requests == 1 + 3
+    assert all(len(texts) == 2 and all(texts) for texts in results)
+
+def test_failed_batch_falls_back_per_insight(stub):
+    # Every attempt of the batched request fails
+    stub.fail_next = openai_service.OPENAI_MAX_RETRIES + 1
+    results = asyncio.run(openai_service.generate_batch_insights([payload(0.5), payload(0.6)]))
+    assert stub.requests == openai_service.OPENAI_MAX_RETRIES + 1 + 3
+    assert all(len(texts) == 2 and all(texts) for texts in results)
+
+def test_retries_transient_errors(stub):
+    stub.fail_next = openai_service.OPENAI_MAX_RETRIES
+    text, _ = asyncio.run(openai_service.complete_chat("system", "prompt"))
+    assert text.startswith("Stub insight")
+    assert stub.requests == openai_service.OPENAI_MAX_RETRIES + 1
+
+def test_gives_up_after_retries(stub):
+    stub.error_rate = 1.0
+    with pytest.raises(InternalServerError):
+        asyncio.run(openai_service.complete_chat("system", "prompt"))
+    assert stub.requests == openai_service.OPENAI_MAX_RETRIES + 1
+
+def test_stage_batches_and_stores_insights(stub):
+    owner = f"test-{uuid.uuid4().hex[:8]}"
+    job_ids = create_jobs(4, owner)
+    stage = InsightStage(owner, 60, concurrency=2, batch_size=10, batch_window=0.2)
+    stage.start()
+    try:
+        futures = [stage.submit(job_id, payload(0.5 + i / 10)) for i, job_id in enumerate(job_ids)]
+        for future in futures:
+            future.result(5)
+    finally:
+        stage.stop(5)
+    assert stub.batches == 1
+    assert insight_state(job_ids) == {job_id: ("completed", 2) for job_id in job_ids}
+
+def test_stage_marks_failed_insights(stub):
+    stub.error_rate = 1.0
+    owner = f"test-{uuid.uuid4().hex[:8]}"
+    job_ids = create_jobs(2, owner)
+    stage = InsightStage(owner, 60, batch_size=10, batch_window=0.2)
+    stage.start()
+    try:
+        for future in [stage.submit(job_id, payload(0.5 + i / 10)) for i, job_id in enumerate(job_ids)]:
+            future.result(5)
+    finally:
+        stage.stop(5)
+    assert insight_state(job_ids) == {job_id: ("failed", 0) for job_id in job_ids}
+
+def test_stage_stop_shares_one_deadline(stub):
+    stub.hang_rate, stub.hang = 1.0, 3
+    owner = f"test-{uuid.uuid4().hex[:8]}"
+    job_ids = create_jobs(4, owner)
+    stage = InsightStage(owner, 60, concurrency=4, batch_size=1, batch_window=0)
+    stage.start()
+    for i, job_id in enumerate(job_ids):
+        stage.submit(job_id, payload(0.5 + i / 10))
+    start = time.monotonic()
+    stage.stop(0.5)
+    assert time.monotonic() - start < 1.5
+    # The unfinished jobs are released for another worker to claim
+    db = SessionLocal()
+    try:
+        assert set(job_ids) <= set(claim_insights(db, "other", datetime.utcnow() + timedelta(seconds=60), 100))
+    finally:
+        db.close()
+
+def test_claims_skip_live_leases(stub):
+    expired = create_jobs(2, "dead", lease_sec=-1)
+    live = create_jobs(1, "alive")
+    db = SessionLocal()
+    try:
+        lease = datetime.utcnow() + timedelta(seconds=60)
+        claimed = claim_insights(db, "first", lease, 100)
+        assert set(expired) <= set(claimed) and live[0] not in claimed
+        # Claimed jobs hold a live lease now
+        assert not set(claim_insights(db, "second", lease, 100)) & set(expired + live)
+    finally:
+        db.close()
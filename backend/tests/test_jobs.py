@@ -0,0 +1,18 @@
+import uuid
+
+SCENARIO = {"weather": "fog", "time_of_day": "night", "traffic_density": 0.4, "road_type": "urban", "object_count": 12}
+
+def create_jobs(client, tiers):
+    """One job per tier on a new scenario; returns the scenario's unique weather, to filter on"""
+    weather = f"fog-{uuid.uuid4().hex[:8]}"
+    scenario = client.post("/api/scenarios/", json={**SCENARIO, "weather": weather}).json()
+    for tier in tiers:
+        response = client.post("/api/jobs/", json={"scenario_id": scenario["id"], "compute_tier": tier, "epochs": 2})
+        assert response.status_code == 200
+    return weather
+
+def test_tier_filter_ignores_case(client):
+    weather = create_jobs(client, ["GPU", "gpu", "Gpu", "small"])
+    for tier in ("GPU", "gpu", "gPu"):
+        jobs = client.get("/api/jobs/", params={"tier": tier, "weather": weather}).json()
+        assert sorted(job["compute_tier"] for job in jobs) == ["GPU", "Gpu", "gpu"]
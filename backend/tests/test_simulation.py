@@ -0,0 +1,76 @@
+import threading
+import time
+import uuid
+import numpy as np
+from app import worker
+from app.models import Job
+from app.services.lap_engine import driver_params, simulate_laps
+from app.services.simulation import simulate_batch
+
+SERIES = ("loss", "accuracy", "detection_score", "gpu_utilization", "vram_usage", "cpu_usage")
+
+def job(seq, epochs=5, tier="small"):
+    return Job(id=uuid.uuid4(), seq=seq, epochs=epochs, compute_tier=tier, cars=4)
+
+def job_series(jobs, target):
+    """The values simulated for `target` when `jobs` run as one batch"""
+    series = simulate_batch([j.epochs for j in jobs], [j.compute_tier for j in jobs], [worker.job_rng(j) for j in jobs])
+    row, n = jobs.index(target), target.epochs
+    return {name: series[name][row, :n].tolist() for name in SERIES} | {"total_runtime": float(series["total_runtime"][row])}
+
+def test_seeded_job_independent_of_batch(monkeypatch):
+    monkeypatch.setattr(worker, "SIMULATION_SEED", 42)
+    target = job(7)
+    alone = job_series([target], target)
+    mixed = job_series([job(1, 20, "large"), target, job(9, 2)], target)
+    assert alone == mixed
+
+def test_seeded_jobs_differ(monkeypatch):
+    monkeypatch.setattr(worker, "SIMULATION_SEED", 42)
+    first, second = job(1), job(2)
+    assert job_series([first, second], first) != job_series([first, second], second)
+
+def test_seed_changes_values(monkeypatch):
+    target = job(3)
+    monkeypatch.setattr(worker, "SIMULATION_SEED", 1)
+    one = job_series([target], target)
+    monkeypatch.setattr(worker, "SIMULATION_SEED", 2)
+    assert job_series([target], target) != one
+
+def test_lap_driver_params_per_job(monkeypatch):
+    from app.services.lap_engine import driver_params
+    monkeypatch.setattr(worker, "SIMULATION_SEED", 42)
+    first, second = job(1), job(2)
+    params = lambda j: driver_params(j.cars, worker.job_rng(j))["target_speed"].tolist()
+    assert params(first) == params(first)
+    assert params(first) != params(second)
+
+def test_single_generator_batch_shape():
+    series = simulate_batch([3, 5], ["small", "large"], np.random.default_rng(0))
+    assert series["loss"].shape == (2, 5)
+    assert series["mask"].sum() == 8
+
+def lappable_map():
+    from app.services.track_maps import get_map, map_keys
+    track = next(get_map(key) for key in map_keys() if get_map(key).lappable)
+    # Build the surface grids outside any timing
+    track.on_road(np.zeros(1), np.zeros(1))
+    return track
+
+def test_lap_race_stops_when_interrupted():
+    track = lappable_map()
+    params = driver_params(8, np.random.default_rng(0))
+    interrupted = threading.Event()
+    threading.Timer(0.2, interrupted.set).start()
+    start = time.perf_counter()
+    # Long enough to run for seconds if it were not stopped
+    assert simulate_laps(track, params, 50, record=True, interrupted=interrupted) is None
+    assert time.perf_counter() - start < 1
+
+def test_lap_race_unaffected_by_unset_event():
+    track = lappable_map()
+    params = driver_params(4, np.random.default_rng(0))
+    plain = simulate_laps(track, params, 1)
+    checked = simulate_laps(track, params, 1, interrupted=threading.Event())
+    assert np.array_equal(plain["laps"], checked["laps"])
+    assert np.allclose(plain["total_time"], checked["total_time"], equal_nan=True)
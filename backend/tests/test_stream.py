@@ -0,0 +1,90 @@
+import asyncio
+import json
+import threading
+import time
+from app.database import SessionLocal
+from app.models import Job, Metric, Scenario
+from app.routers import stream
+
+def create_job(status="running") -> Job:
+    db = SessionLocal()
+    try:
+        scenario = Scenario(weather="rain", time_of_day="day", traffic_density=0.3, road_type="urban", object_count=4, dataset_size_mb=1)
+        db.add(scenario)
+        db.flush()
+        job = Job(scenario_id=scenario.id, compute_tier="small", epochs=3, status=status, cost_estimate=1)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+        db.expunge(job)
+        return job
+    finally:
+        db.close()
+
+def advance(job_id, epoch: int, epochs: int):
+    """What the worker does per epoch: a metric row committed together with the progress"""
+    db = SessionLocal()
+    try:
+        db.add(Metric(job_id=job_id, epoch=epoch, loss=1.0, accuracy=0.5, detection_score=0.5))
+        db.query(Job).filter(Job.id == job_id).update(
+            {"progress": 100.0 * epoch / epochs, "status": "completed" if epoch == epochs else "running"}
+        )
+        db.commit()
+    finally:
+        db.close()
+
+def read_events(response) -> list:
+    events = []
+    for block in response.text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+def test_job_stream_follows_job_to_the_end(client, monkeypatch):
+    monkeypatch.setattr(stream.hub, "interval", 0.02)
+    job = create_job()
+
+    def worker():
+        for epoch in range(1, 4):
+            time.sleep(0.1)
+            advance(job.id, epoch, 3)
+    thread = threading.Thread(target=worker)
+    thread.start()
+    events = read_events(client.get(f"/api/stream/jobs/{job.id}"))
+    thread.join()
+
+    epochs = [metric["epoch"] for event, data in events if event == "metrics" for metric in data]
+    assert epochs == [1, 2, 3]
+    assert events[-1][0] == "end" and events[-1][1]["status"] == "completed"
+    assert not stream.hub.subscriptions
+
+def test_job_stream_unknown_job(client):
+    assert client.get("/api/stream/jobs/00000000-0000-0000-0000-000000000000").status_code == 404
+
+def test_streams_share_one_poll_per_tick(monkeypatch):
+    calls = []
+
+    def poll_states(job_ids, limit):
+        calls.append((sorted(job_ids), limit))
+        return [], {}
+    monkeypatch.setattr(stream, "poll_states", poll_states)
+
+    async def run():
+        hub = stream.StreamHub(0.01)
+        subscriptions = [stream.Subscription(newest=10 * (i % 5 + 1), job_ids=[i]) for i in range(100)]
+        for subscription in subscriptions:
+            hub.subscribe(subscription)
+        for _ in range(3):
+            await hub.wait()
+        ticks = len(calls)
+        for subscription in subscriptions:
+            hub.unsubscribe(subscription)
+        await asyncio.sleep(0.05)
+        return ticks, hub.task
+
+    ticks, task = asyncio.run(run())
+    # One poll per tick covering every stream's jobs and the largest page
+    assert ticks == 3
+    assert calls[0] == (list(range(100)), 50)
+    # The poller stops once no stream is open
+    assert task is None and len(calls) <= 4
@@ -0,0 +1,68 @@
+from datetime import datetime, timedelta
+import numpy as np
+from app.database import SessionLocal
+from app.models import ComputeMetric, Job, Scenario
+from app.services.downsample import lttb_indices
+
+def create_job_with_samples(count: int, per_timestamp: int = 1):
+    """A completed job with `count` compute samples, `per_timestamp` of them sharing each timestamp"""
+    db = SessionLocal()
+    try:
+        scenario = Scenario(weather="clear", time_of_day="day", traffic_density=0.2, road_type="highway", object_count=3, dataset_size_mb=1)
+        db.add(scenario)
+        db.flush()
+        job = Job(scenario_id=scenario.id, compute_tier="small", epochs=1, status="completed", cost_estimate=1)
+        db.add(job)
+        db.flush()
+        start = datetime(2026, 1, 1)
+        db.add_all(
+            ComputeMetric(job_id=job.id, timestamp=start + timedelta(seconds=i // per_timestamp),
+                          gpu_utilization=50 + 40 * (i == count // 2), vram_usage=4, cpu_usage=20)
+            for i in range(count)
+        )
+        db.commit()
+        return job.id
+    finally:
+        db.close()
+
+def test_lttb_keeps_ends_and_peaks():
+    x = np.arange(1000)
+    y = np.sin(x / 50)
+    y[437] = 10
+    indices = lttb_indices(x, y, 50)
+    assert len(indices) == 50 and indices[0] == 0 and indices[-1] == 999
+    assert np.all(np.diff(indices) > 0)
+    assert 437 in indices
+
+def test_lttb_short_series_unchanged():
+    assert lttb_indices(np.arange(5), np.arange(5), 10).tolist() == [0, 1, 2, 3, 4]
+    assert lttb_indices(np.arange(5), np.arange(5), 2).tolist() == [0, 4]
+
+def test_cursor_pages_cover_every_sample_once(client):
+    # Pages end in the middle of runs of equal timestamps
+    job_id = create_job_with_samples(25, per_timestamp=4)
+    expected = [row["id"] for row in client.get(f"/api/compute/{job_id}").json()]
+    assert len(expected) == 25
+
+    seen, params = [], {"limit": 7}
+    while True:
+        response = client.get(f"/api/compute/{job_id}", params=params)
+        assert response.status_code == 200
+        seen += [row["id"] for row in response.json()]
+        cursor = response.headers.get("X-Next-Cursor")
+        if cursor is None:
+            break
+        params = {"limit": 7, "cursor": cursor}
+    assert seen == expected
+
+def test_invalid_cursor(client):
+    job_id = create_job_with_samples(1)
+    assert client.get(f"/api/compute/{job_id}", params={"cursor": "yesterday"}).status_code == 400
+
+def test_downsampled_compute_metrics(client):
+    job_id = create_job_with_samples(200)
+    rows = client.get(f"/api/compute/{job_id}", params={"points": 20}).json()
+    assert len(rows) == 20
+    assert max(row["gpu_utilization"] for row in rows) == 90
+    timestamps = [row["timestamp"] for row in rows]
+    assert timestamps == sorted(timestamps)
@@ -0,0 +1,25 @@
+// Writes the geometry of PRESET_MAPS to backend/app/data/maps.json for the
+// backend lap simulation. Run with `npm run export-maps`.
+import { writeFileSync, mkdirSync } from 'node:fs';
+import { dirname, resolve } from 'node:path';
+import { fileURLToPath } from 'node:url';
+import { CANVAS_SIZE, PRESET_MAPS } from '../src/lib/maps.js';
+
+const here = dirname(fileURLToPath(import.meta.url));
+const target = resolve(here, '../../backend/app/data/maps.json');
+
+const maps = {};
+for (const [key, map] of Object.entries(PRESET_MAPS)) {
+    maps[key] = {
+        name: map.name,
+        difficulty: map.difficulty,
+        start: map.start,
+        finishLine: map.finishLine ?? null,
+        waypoints: map.waypoints ?? [],
+        road: map.road ?? []
+    };
+}
+
+mkdirSync(dirname(target), { recursive: true });
+writeFileSync(target, JSON.stringify({ canvas: CANVAS_SIZE, maps }, null, 2) + '\n');
+console.log(`Wrote ${Object.keys(maps).length} maps to ${target}`);
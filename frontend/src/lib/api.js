@@ -13,8 +13,9 @@ const api = axios.create({
 export const createScenario = (scenarioData) =>
     api.post('/scenarios/', scenarioData);
 
-export const getScenarios = () =>
-    api.get('/scenarios/');
+// params: { skip, limit, weather }
+export const getScenarios = (params = {}) =>
+    api.get('/scenarios/', { params });
 
 export const getScenario = (id) =>
     api.get(`/scenarios/${id}`);
@@ -23,27 +24,108 @@ export const getScenario = (id) =>
 export const createJob = (jobData) =>
     api.post('/jobs/', jobData);
 
-export const getJobs = () =>
-    api.get('/jobs/');
+// params: { skip, limit, status, tier, weather, sweep_id }
+export const getJobs = (params = {}) =>
+    api.get('/jobs/', { params });
 
 export const getJob = (id) =>
     api.get(`/jobs/${id}`);
 
+// Sweep APIs
+// sweepData: lists of weather, time_of_day, traffic_density, road_type, compute_tier, epochs
+export const createSweep = (sweepData) =>
+    api.post('/sweeps/', sweepData);
+
+export const getSweep = (id) =>
+    api.get(`/sweeps/${id}`);
+
 // Metrics APIs
-export const getJobMetrics = (jobId) =>
-    api.get(`/metrics/${jobId}`);
+// params: { since_epoch, limit } for metrics, { since, cursor, limit } for compute;
+// a full page returns the next cursor in the X-Next-Cursor header.
+// { points } instead returns a downsampled series of at most that many rows.
+export const getJobMetrics = (jobId, params = {}) =>
+    api.get(`/metrics/${jobId}`, { params });
 
-export const getComputeMetrics = (jobId) =>
-    api.get(`/compute/${jobId}`);
+export const getComputeMetrics = (jobId, params = {}) =>
+    api.get(`/compute/${jobId}`, { params });
 
 export const getRiskAnalysis = (jobId) =>
     api.get(`/risk/${jobId}`);
 
+// request: { candidates: [{ weather, time_of_day, traffic_density, accuracy, detection_score }], noise, seed }
+export const batchEvaluateRisk = (request) =>
+    api.post('/risk/batch-evaluate', request);
+
 export const getInsights = (jobId) =>
     api.get(`/insights/${jobId}`);
 
+// Live streams (Server-Sent Events)
+export const streamJobs = () =>
+    new EventSource(`${API_BASE_URL}/api/stream/jobs`);
+
+export const streamJob = (jobId, { sinceEpoch, since } = {}) => {
+    const params = new URLSearchParams();
+    if (sinceEpoch != null) params.set('since_epoch', sinceEpoch);
+    if (since) params.set('since', since);
+    const query = params.toString();
+    return new EventSource(`${API_BASE_URL}/api/stream/jobs/${jobId}${query ? `?${query}` : ''}`);
+};
+
 // Driving Sim API
 export const analyzeDrivingSession = (telemetryData) =>
     api.post('/insights/driving-session', { telemetry: telemetryData });
 
+// Packed little-endian frames, 26 bytes each:
+// t (float64 ms), x, y, speed, angle (float32), surface (uint8, 1 = grass),
+// input (uint8 bits: up 1, down 2, left 4, right 8, boost 16)
+const FRAME_BYTES = 26;
+const INPUT_BITS = { up: 1, down: 2, left: 4, right: 8, boost: 16 };
+
+export const packTelemetryFrames = (frames) => {
+    const buffer = new ArrayBuffer(frames.length * FRAME_BYTES);
+    const view = new DataView(buffer);
+    frames.forEach((frame, i) => {
+        const offset = i * FRAME_BYTES;
+        let bits = 0;
+        for (const [key, bit] of Object.entries(INPUT_BITS)) {
+            if (frame.input?.[key]) bits |= bit;
+        }
+        view.setFloat64(offset, frame.t, true);
+        view.setFloat32(offset + 8, frame.x ?? 0, true);
+        view.setFloat32(offset + 12, frame.y ?? 0, true);
+        view.setFloat32(offset + 16, frame.speed, true);
+        view.setFloat32(offset + 20, frame.angle, true);
+        view.setUint8(offset + 24, frame.surface?.includes('Grass') ? 1 : 0);
+        view.setUint8(offset + 25, bits);
+    });
+    return buffer;
+};
+
+// Chunked upload while driving: start, send chunks of frames, then analyze
+export const startDrivingUpload = (session = {}) =>
+    api.post('/insights/driving-sessions', session);
+
+export const uploadDrivingChunk = (sessionId, frames) =>
+    api.post(`/insights/driving-sessions/${sessionId}/chunks`, packTelemetryFrames(frames), {
+        headers: { 'Content-Type': 'application/octet-stream' }
+    });
+
+export const analyzeDrivingUpload = (sessionId) =>
+    api.post(`/insights/driving-sessions/${sessionId}/analyze`);
+
+// Lap simulation jobs: createJob({ ..., job_type: 'lap_simulation', map, cars, epochs: laps })
+export const getJobLaps = (jobId, params = {}) =>
+    api.get(`/jobs/${jobId}/laps`, { params });
+
+// Recorded sessions (human runs and AI laps)
+export const getDrivingSessions = (params = {}) =>
+    api.get('/sessions/', { params });
+
+export const getDrivingSession = (sessionId) =>
+    api.get(`/sessions/${sessionId}`);
+
+// Frames between `start` and `end` seconds into the session, one array per field
+export const getDrivingSessionFrames = (sessionId, params = {}) =>
+    api.get(`/sessions/${sessionId}/frames`, { params });
+
 export default api;
@@ -1,9 +1,17 @@
+// Canvas the maps are drawn on; cars wrap around its edges
+export const CANVAS_SIZE = { width: 1000, height: 600 };
+
+// `road` describes the drivable surface that `draw` paints (ellipse and path
+// strokes of `width`, filled rects). It is exported with start, finish line and
+// waypoints to backend/app/data/maps.json for the server-side lap simulation:
+// run `npm run export-maps` after changing a map.
 export const PRESET_MAPS = {
     oval: {
         name: "1. Beginner Oval",
         difficulty: 1,
         start: { x: 400, y: 500, angle: 0 },
         finishLine: { x1: 500, y1: 420, x2: 500, y2: 600 },
+        road: [{ type: 'ellipse', cx: 500, cy: 300, rx: 300, ry: 180, width: 120 }],
         waypoints: [
             { x: 500, y: 480 }, { x: 650, y: 450 }, { x: 750, y: 380 }, { x: 800, y: 300 }, // Right Turn
             { x: 750, y: 220 }, { x: 650, y: 150 }, { x: 500, y: 120 }, // Top
@@ -45,6 +53,12 @@ export const PRESET_MAPS = {
         difficulty: 2,
         start: { x: 100, y: 100, angle: 0 },
         finishLine: { x1: 80, y1: 80, x2: 120, y2: 80 },
+        road: [
+            { type: 'rect', x: 50, y: 50, w: 900, h: 100 },
+            { type: 'rect', x: 850, y: 50, w: 100, h: 700 },
+            { type: 'rect', x: 50, y: 650, w: 900, h: 100 },
+            { type: 'rect', x: 50, y: 50, w: 100, h: 700 }
+        ],
         waypoints: [{ x: 900, y: 100 }, { x: 900, y: 700 }, { x: 100, y: 700 }, { x: 100, y: 150 }],
         draw: (ctx, w, h) => {
             ctx.fillStyle = '#334155'; // City Ground
@@ -77,6 +91,14 @@ export const PRESET_MAPS = {
         difficulty: 5,
         start: { x: 150, y: 200, angle: 0 },
         finishLine: { x1: 200, y1: 100, x2: 200, y2: 300 },
+        road: [{
+            type: 'path', width: 140, commands: [
+                ['M', 150, 200], ['L', 600, 200],
+                ['C', 800, 200, 900, 300, 800, 450],
+                ['C', 700, 600, 400, 500, 300, 400],
+                ['C', 200, 300, 100, 300, 150, 200]
+            ]
+        }],
         waypoints: [
             { x: 300, y: 200 }, { x: 500, y: 200 }, { x: 700, y: 250 },
             { x: 850, y: 350 }, { x: 800, y: 500 }, { x: 600, y: 550 },
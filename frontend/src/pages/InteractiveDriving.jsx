@@ -1,8 +1,11 @@
 import { useState, useEffect, useRef } from 'react';
-import { analyzeDrivingSession } from '../lib/api';
+import { analyzeDrivingSession, startDrivingUpload, uploadDrivingChunk, analyzeDrivingUpload } from '../lib/api';
 import { Gamepad2, AlertTriangle, Gauge } from 'lucide-react';
 import { PRESET_MAPS } from '../lib/maps';
 
+// Telemetry is logged at 10 Hz; upload it in 5-second chunks while recording
+const UPLOAD_CHUNK_FRAMES = 50;
+
 export default function InteractiveDriving() {
     const canvasRef = useRef(null);
     const requestRef = useRef();
@@ -17,13 +20,48 @@ export default function InteractiveDriving() {
     const [analysis, setAnalysis] = useState(null);
     const [isLoading, setIsLoading] = useState(false);
 
+    // Chunked upload of the recording: frames are sent every UPLOAD_CHUNK_FRAMES while driving
+    const upload = useRef(null);
+
+    const startUpload = (map) => {
+        const session = { sent: 0, failed: false, chunks: Promise.resolve() };
+        session.started = startDrivingUpload({ map, driver: 'human' })
+            .then(response => response.data.session_id)
+            .catch(() => { session.failed = true; return null; });
+        upload.current = session;
+    };
+
+    const sendChunk = () => {
+        const session = upload.current;
+        if (!session || session.failed) return;
+        const frames = telemetryLog.current.slice(session.sent);
+        if (!frames.length) return;
+        session.sent += frames.length;
+        // Chained so chunks arrive in order
+        session.chunks = session.chunks
+            .then(() => session.started)
+            .then(sessionId => sessionId && uploadDrivingChunk(sessionId, frames))
+            .catch(() => { session.failed = true; });
+    };
+
     const handleAnalyze = async () => {
         setIsLoading(true);
         try {
-            // Send max 600 frames (60 seconds) to avoid token limits? 
-            // Or backend handles it? Backend summarizes. 
-            // 264 samples is fine. 
-            const response = await analyzeDrivingSession(telemetryLog.current);
+            const session = upload.current;
+            let response = null;
+            if (session && !session.failed) {
+                sendChunk();
+                await session.chunks;
+                const sessionId = await session.started;
+                if (sessionId && !session.failed) {
+                    response = await analyzeDrivingUpload(sessionId);
+                    upload.current = null;
+                }
+            }
+            // Fall back to sending the whole log if the chunked upload did not work out
+            if (!response) {
+                response = await analyzeDrivingSession(telemetryLog.current);
+            }
             setAnalysis(response.data);
         } catch (e) {
             console.error(e);
@@ -483,11 +521,16 @@ export default function InteractiveDriving() {
             if (isRecordingRef.current) {
                 telemetryLog.current.push({
                     t: Date.now(),
+                    x: p.x,
+                    y: p.y,
                     speed: p.speed,
                     angle: p.angle,
                     surface: telemetry.surface,
                     input: { ...input.current }
                 });
+                if (upload.current && telemetryLog.current.length - upload.current.sent >= UPLOAD_CHUNK_FRAMES) {
+                    sendChunk();
+                }
             }
             // Update UI less frequently (every 10 frames)
             if (frameCount.current % 10 === 0) {
@@ -571,6 +614,7 @@ export default function InteractiveDriving() {
                             }
                             // Reset Logs
                             telemetryLog.current = [];
+                            upload.current = null;
                             rivals.current = []; // Reset Rivals
                             setAnalysis(null);
                         }}
@@ -602,6 +646,7 @@ export default function InteractiveDriving() {
                             } else {
                                 telemetryLog.current = [];
                                 setAnalysis(null); // Reset analysis
+                                startUpload(currentMap);
                                 setIsRecording(true);
                                 isRecordingRef.current = true;
                             }
@@ -1,11 +1,14 @@
-import { useState, useEffect } from 'react';
-import { getJobs, getScenarios, createJob } from '../lib/api';
+import { useState, useEffect, useRef } from 'react';
+import { getJobs, getScenarios, createJob, streamJobs } from '../lib/api';
 import { Play, Clock, CheckCircle, XCircle, Cpu } from 'lucide-react';
 
 export default function JobDashboard() {
     const [jobs, setJobs] = useState([]);
     const [scenarios, setScenarios] = useState([]);
     const [showCreateModal, setShowCreateModal] = useState(false);
+    // null until the first list has loaded
+    const listedJobIds = useRef(null);
+    const reloadTimer = useRef(null);
     const [newJob, setNewJob] = useState({
         scenario_id: '',
         compute_tier: 'medium',
@@ -14,8 +17,47 @@ export default function JobDashboard() {
 
     useEffect(() => {
         loadData();
-        const interval = setInterval(loadData, 3000); // Refresh every 3 seconds
-        return () => clearInterval(interval);
+
+        // Progress is pushed by the server; polling is only the fallback when streaming is unavailable
+        let interval = null;
+        const startPolling = () => {
+            if (!interval) interval = setInterval(loadData, 3000); // Refresh every 3 seconds
+        };
+        if (typeof EventSource === 'undefined') {
+            startPolling();
+            return () => clearInterval(interval);
+        }
+
+        // Jobs we haven't listed yet (e.g. a sweep launched elsewhere) trigger one reload per second at most
+        const scheduleReload = () => {
+            if (reloadTimer.current) return;
+            reloadTimer.current = setTimeout(() => {
+                reloadTimer.current = null;
+                loadData();
+            }, 1000);
+        };
+
+        const stream = streamJobs();
+        stream.addEventListener('job', (event) => {
+            const update = JSON.parse(event.data);
+            if (!listedJobIds.current) return; // The first load is still in flight and will include it
+            if (!listedJobIds.current.has(update.id)) {
+                scheduleReload();
+                return;
+            }
+            setJobs((current) => current.map((job) => (job.id === update.id ? { ...job, ...update } : job)));
+        });
+        stream.onopen = () => {
+            clearInterval(interval);
+            interval = null;
+        };
+        stream.onerror = startPolling;
+
+        return () => {
+            stream.close();
+            clearInterval(interval);
+            clearTimeout(reloadTimer.current);
+        };
     }, []);
 
     const loadData = async () => {
@@ -25,6 +67,7 @@ export default function JobDashboard() {
                 getScenarios()
             ]);
             setJobs(jobsRes.data);
+            listedJobIds.current = new Set(jobsRes.data.map((job) => job.id));
             setScenarios(scenariosRes.data);
             if (scenariosRes.data.length > 0 && !newJob.scenario_id) {
                 setNewJob({ ...newJob, scenario_id: scenariosRes.data[0].id });
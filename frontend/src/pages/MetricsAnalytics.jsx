@@ -1,6 +1,9 @@
 import { useState, useEffect } from 'react';
 import { LineChart, Line, AreaChart, Area, BarChart, Bar, XAxis, YAxis, CartesianGrid, Tooltip, Legend, ResponsiveContainer } from 'recharts';
-import { getJobs, getJobMetrics, getComputeMetrics } from '../lib/api';
+import { getJobs, getJobMetrics, getComputeMetrics, streamJob } from '../lib/api';
+
+// Series are downsampled server-side so charts stay fast regardless of job length
+const CHART_POINTS = 500;
 
 export default function MetricsAnalytics() {
     const [jobs, setJobs] = useState([]);
@@ -13,9 +16,36 @@ export default function MetricsAnalytics() {
     }, []);
 
     useEffect(() => {
-        if (selectedJobId) {
-            loadMetrics(selectedJobId);
-        }
+        if (!selectedJobId) return;
+        let stream = null;
+        let cancelled = false;
+
+        loadMetrics(selectedJobId).then(({ training, compute }) => {
+            const job = jobs.find((j) => j.id === selectedJobId);
+            if (cancelled || !job || job.status === 'completed' || typeof EventSource === 'undefined') return;
+
+            // Tail the running job from the last rows we already have
+            stream = streamJob(selectedJobId, {
+                sinceEpoch: training.length ? training[training.length - 1].epoch : undefined,
+                since: compute.length ? compute[compute.length - 1].timestamp : undefined,
+            });
+            stream.addEventListener('metrics', (event) => {
+                setTrainingMetrics((current) => [...current, ...JSON.parse(event.data)]);
+            });
+            stream.addEventListener('compute', (event) => {
+                const rows = JSON.parse(event.data);
+                setComputeMetrics((current) => [
+                    ...current,
+                    ...rows.map((m, idx) => ({ ...m, index: current.length + idx + 1 })),
+                ]);
+            });
+            stream.addEventListener('end', () => stream.close());
+        });
+
+        return () => {
+            cancelled = true;
+            if (stream) stream.close();
+        };
     }, [selectedJobId]);
 
     const loadJobs = async () => {
@@ -34,13 +64,15 @@ export default function MetricsAnalytics() {
     const loadMetrics = async (jobId) => {
         try {
             const [trainingRes, computeRes] = await Promise.all([
-                getJobMetrics(jobId),
-                getComputeMetrics(jobId)
+                getJobMetrics(jobId, { points: CHART_POINTS }),
+                getComputeMetrics(jobId, { points: CHART_POINTS })
             ]);
             setTrainingMetrics(trainingRes.data);
             setComputeMetrics(computeRes.data.map((m, idx) => ({ ...m, index: idx + 1 })));
+            return { training: trainingRes.data, compute: computeRes.data };
         } catch (error) {
             console.error('Failed to load metrics:', error);
+            return { training: [], compute: [] };
         }
     };
 